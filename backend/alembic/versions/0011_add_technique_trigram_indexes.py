@@ -0,0 +1,36 @@
+"""add pg_trgm GIN indexes for technique / alias search
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TRGM_INDEXES = [
+    ("ix_technique_manufacturer_trgm", "technique", "manufacturer"),
+    ("ix_technique_model_trgm", "technique", "model"),
+    ("ix_technique_series_trgm", "technique", "series"),
+    ("ix_technique_alias_text_trgm", "technique_alias", "alias_text"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in _TRGM_INDEXES:
+        op.create_index(
+            name, table, [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(_TRGM_INDEXES):
+        op.drop_index(name, table_name=table)
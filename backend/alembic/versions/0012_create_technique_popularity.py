@@ -0,0 +1,34 @@
+"""create technique_popularity
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "technique_popularity",
+        sa.Column(
+            "technique_id", sa.Integer,
+            sa.ForeignKey("technique.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("usage_count", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.execute(
+        "INSERT INTO technique_popularity (technique_id, usage_count) "
+        "SELECT technique_id, count(*) FROM quote_items GROUP BY technique_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("technique_popularity")
@@ -0,0 +1,24 @@
+"""add quotes (status, updated_at) and (updated_at, id) indexes for keyset listing
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_quotes_status_updated_at", "quotes", ["status", "updated_at"])
+    op.create_index("ix_quotes_updated_at_id", "quotes", ["updated_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_quotes_updated_at_id", table_name="quotes")
+    op.drop_index("ix_quotes_status_updated_at", table_name="quotes")
@@ -0,0 +1,44 @@
+"""add quotes.search_text and generated search_vector with GIN index
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("quotes", sa.Column("search_text", sa.Text, nullable=True))
+    op.execute(
+        """
+        UPDATE quotes q SET search_text = concat_ws(
+            ' ', q.customer_name, q.comment,
+            (
+                SELECT string_agg(DISTINCT concat_ws(' ', t.manufacturer, t.model, t.series), ' ')
+                FROM quote_items qi JOIN technique t ON t.id = qi.technique_id
+                WHERE qi.quote_id = q.id
+            )
+        )
+        """
+    )
+    op.execute(
+        "ALTER TABLE quotes ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(search_text, ''))) STORED"
+    )
+    op.create_index(
+        "ix_quotes_search_vector", "quotes", ["search_vector"], postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_quotes_search_vector", table_name="quotes")
+    op.drop_column("quotes", "search_vector")
+    op.drop_column("quotes", "search_text")
@@ -0,0 +1,47 @@
+"""create quote_stats_daily and sku_volume rollups
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0015"
+down_revision: Union[str, None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "quote_stats_daily",
+        sa.Column("created_by", sa.Integer, sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("status", sa.String(50), primary_key=True),
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("quotes_count", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "sku_volume",
+        sa.Column(
+            "sku_id", sa.Integer,
+            sa.ForeignKey("sku.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("total_qty", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.execute(
+        "INSERT INTO quote_stats_daily (created_by, status, day, quotes_count) "
+        "SELECT created_by, status, date(created_at), count(*) FROM quotes "
+        "GROUP BY created_by, status, date(created_at)"
+    )
+    op.execute(
+        "INSERT INTO sku_volume (sku_id, total_qty) "
+        "SELECT sku_id, sum(qty) FROM quote_result_lines GROUP BY sku_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sku_volume")
+    op.drop_table("quote_stats_daily")
@@ -0,0 +1,38 @@
+"""create sku_demand rollup
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0016"
+down_revision: Union[str, None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sku_demand",
+        sa.Column(
+            "sku_id", sa.Integer,
+            sa.ForeignKey("sku.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("status", sa.String(50), primary_key=True),
+        sa.Column("period", sa.Date, primary_key=True),
+        sa.Column("total_qty", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.execute(
+        "INSERT INTO sku_demand (sku_id, status, period, total_qty) "
+        "SELECT l.sku_id, q.status, date_trunc('month', q.created_at)::date, sum(l.qty) "
+        "FROM quote_result_lines l JOIN quotes q ON q.id = l.quote_id "
+        "GROUP BY l.sku_id, q.status, date_trunc('month', q.created_at)::date"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sku_demand")
@@ -0,0 +1,45 @@
+"""create sku_availability, add quote_result_lines.availability_as_of
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0017"
+down_revision: Union[str, None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sku_availability",
+        sa.Column(
+            "sku_id", sa.Integer,
+            sa.ForeignKey("sku.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("availability_status", sa.String(50), nullable=False),
+        sa.Column("availability_comment", sa.Text, nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.add_column(
+        "quote_result_lines",
+        sa.Column("availability_as_of", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Latest reported state per SKU, judged by when its quote was last touched.
+    op.execute(
+        "INSERT INTO sku_availability (sku_id, availability_status, availability_comment, updated_at) "
+        "SELECT DISTINCT ON (l.sku_id) l.sku_id, l.availability_status, l.availability_comment, q.updated_at "
+        "FROM quote_result_lines l JOIN quotes q ON q.id = l.quote_id "
+        "WHERE l.availability_status IS NOT NULL "
+        "ORDER BY l.sku_id, q.updated_at DESC, l.id DESC"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("quote_result_lines", "availability_as_of")
+    op.drop_table("sku_availability")
@@ -0,0 +1,25 @@
+"""add previous refresh hash to auth_sessions
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0020"
+down_revision: Union[str, None] = "0019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("auth_sessions", sa.Column("prev_refresh_hash", sa.String(64), nullable=True))
+    op.add_column("auth_sessions", sa.Column("rotated_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("auth_sessions", "rotated_at")
+    op.drop_column("auth_sessions", "prev_refresh_hash")
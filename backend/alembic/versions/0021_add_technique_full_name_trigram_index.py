@@ -0,0 +1,26 @@
+"""add pg_trgm GIN index on "manufacturer model" for autocomplete
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0021"
+down_revision: Union[str, None] = "0020"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Must match TECHNIQUE_FULL_NAME in app/repo/technique_repo.py.
+    op.execute(
+        "CREATE INDEX ix_technique_full_name_trgm ON technique "
+        "USING gin ((manufacturer || ' ' || model) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_technique_full_name_trgm", table_name="technique")
@@ -0,0 +1,33 @@
+"""add (coalesce(col, ''), id) indexes for keyset sorts on nullable list columns
+
+Revision ID: 0022
+Revises: 0021
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0022"
+down_revision: Union[str, None] = "0021"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match the coalesced() sort columns of the list routes.
+_INDEXES = [
+    ("ix_technique_series_sort", "technique", "series"),
+    ("ix_technique_alias_note_sort", "technique_alias", "note"),
+    ("ix_sku_version_tag_sort", "sku", "version_tag"),
+    ("ix_users_role_sort", "users", "role"),
+    ("ix_quotes_customer_name_sort", "quotes", "customer_name"),
+]
+
+
+def upgrade() -> None:
+    for name, table, column in _INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {table} ((coalesce({column}, '')), id)")
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
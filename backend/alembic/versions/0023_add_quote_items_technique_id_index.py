@@ -0,0 +1,22 @@
+"""add quote_items (technique_id, quote_id) index for the rename search refresh
+
+Revision ID: 0023
+Revises: 0022
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0023"
+down_revision: Union[str, None] = "0022"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_quote_items_technique_id_quote_id", "quote_items", ["technique_id", "quote_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_quote_items_technique_id_quote_id", table_name="quote_items")
@@ -0,0 +1,17 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+def is_postgres(db: Session | AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def upsert_insert(db: Session, table):
+    """INSERT construct supporting ``on_conflict_do_update`` for the session's dialect."""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert(table)
+    if name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upsert is not supported for dialect '{name}'")
@@ -0,0 +1,94 @@
+"""
+Connection pool settings and metrics.
+
+Pool sizing comes from the environment (``DB_POOL_SIZE``, ``DB_MAX_OVERFLOW``,
+``DB_POOL_TIMEOUT``, ``DB_POOL_RECYCLE``). ``DB_PGBOUNCER=1`` disables
+psycopg's server-side prepared statements, which do not survive PgBouncer's
+transaction pooling (the next transaction may run on another server
+connection).
+
+Checkout latency and timeouts are recorded by the pool classes below; pool
+occupancy is read from each instrumented engine when metrics are rendered.
+"""
+
+import os
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.services import metrics
+
+DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT: float = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_PGBOUNCER: bool = os.environ.get("DB_PGBOUNCER", "0").lower() in ("1", "true", "yes")
+
+POOL_CHECKOUT_SECONDS = metrics.Histogram(
+    "db_pool_checkout_seconds", "Time to obtain a pooled connection, including waits and new connects.", ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+POOL_TIMEOUTS = metrics.Counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT.", ["pool"])
+POOL_SIZE = metrics.Gauge("db_pool_size", "Configured number of persistent connections.", ["pool"])
+POOL_CHECKED_OUT = metrics.Gauge("db_pool_checked_out", "Connections currently in use.", ["pool"])
+POOL_OVERFLOW = metrics.Gauge("db_pool_overflow", "Connections open beyond the pool size (negative: not yet opened).", ["pool"])
+
+
+class _TimedCheckout:
+    def connect(self):
+        label = self._orig_logging_name or "default"
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(pool=label)
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, pool=label)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, label: str, *, is_async: bool = False) -> dict:
+    """``create_engine`` keyword arguments for ``url`` under the configured pool settings."""
+    if url.startswith("sqlite"):
+        return {}
+    options: dict = {
+        "pool_pre_ping": True,
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_logging_name": label,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if DB_PGBOUNCER and "+psycopg" in url:
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
+_engines: dict[str, Engine] = {}
+
+
+def instrument(engine: Engine, label: str) -> None:
+    """Report ``engine``'s pool occupancy under ``label`` (pass ``AsyncEngine.sync_engine`` for async)."""
+    _engines[label] = engine
+
+
+@metrics.on_collect
+def _collect_pool_stats() -> None:
+    for label, engine in _engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        POOL_SIZE.set(pool.size(), pool=label)
+        POOL_CHECKED_OUT.set(pool.checkedout(), pool=label)
+        POOL_OVERFLOW.set(pool.overflow(), pool=label)
@@ -0,0 +1,118 @@
+"""
+Per-request SQL query count and database time.
+
+Listeners on every ``Engine`` (sync engines, and async ones through their
+``sync_engine``) add to the ``QueryStats`` of the current request, found via
+a context variable that follows the request into threadpool workers and
+SQLAlchemy's greenlets. Inside a trace sampled by ``TRACE_SQL_SAMPLE`` each
+statement also gets a CLIENT span, and slow statements are handed to ``app.db.slow_queries``.
+``QueryStatsMiddleware`` reports the totals in a ``Server-Timing`` header and
+logs requests over ``DB_QUERY_WARN_COUNT`` queries or ``DB_TIME_WARN_MS`` of
+database time. An executemany counts as one
+query, which is what it costs in round trips.
+
+The header is written when the response starts, so streamed bodies
+(exports) only report the queries made before the first chunk; the log line
+covers the whole request.
+"""
+
+import logging
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db import slow_queries
+from app.services import tracing
+
+DB_QUERY_WARN_COUNT: int = int(os.environ.get("DB_QUERY_WARN_COUNT", "30"))
+DB_TIME_WARN_MS: float = float(os.environ.get("DB_TIME_WARN_MS", "500"))
+SPAN_STATEMENT_CHARS = 2000
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track() -> Iterator[QueryStats]:
+    """Count the queries run in this context (and threads/greenlets it spawns) until exit."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._query_start = time.perf_counter()
+    context._query_span = None
+    parent = tracing.current_span()
+    if parent is not None and tracing.sql_sampled(parent.trace_id):
+        context._query_span = tracing.start_span("db.query", "CLIENT", {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:SPAN_STATEMENT_CHARS],
+        })
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context._query_start
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    slow_queries.record(conn, statement, parameters, elapsed, executemany)
+    if context._query_span is not None:
+        context._query_span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    span = getattr(exception_context.execution_context, "_query_span", None)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.end()
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track() as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("server-timing", stats.server_timing())
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+        if stats.count > DB_QUERY_WARN_COUNT or stats.seconds * 1000 > DB_TIME_WARN_MS:
+            logger.warning(
+                "%s %s: %d queries, %.1f ms in the database",
+                scope["method"], scope["path"], stats.count, stats.seconds * 1000,
+            )
@@ -0,0 +1,61 @@
+"""
+Read-your-writes for replica routing.
+
+After a successful mutating request the response sets a short-lived cookie;
+while it is present, ``get_read_db`` hands that client the primary instead
+of a replica that may not have caught up yet. The cookie only steers routing
+and carries nothing sensitive. Being client-side, it works across worker
+processes.
+"""
+
+import os
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# How long (seconds) after a write the same client keeps reading from the primary; 0 disables.
+READ_YOUR_WRITES_SECONDS: int = int(os.environ.get("READ_YOUR_WRITES_SECONDS", "5"))
+COOKIE_NAME = "fd_primary_until"
+
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def prefers_primary(conn: HTTPConnection) -> bool:
+    raw = conn.cookies.get(COOKIE_NAME)
+    if not raw:
+        return False
+    try:
+        return float(raw) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Set ``COOKIE_NAME`` on successful non-GET responses while a replica is configured."""
+
+    def __init__(self, app: ASGIApp, *, enabled: bool):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            not self.enabled
+            or READ_YOUR_WRITES_SECONDS <= 0
+            or scope["type"] != "http"
+            or scope["method"] in _SAFE_METHODS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + READ_YOUR_WRITES_SECONDS
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{COOKIE_NAME}={until}; Max-Age={READ_YOUR_WRITES_SECONDS}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,169 @@
+"""
+Slow query log.
+
+Statements slower than ``SLOW_QUERY_MS`` are queued from the cursor event
+hook (``app.db.query_stats``) and written by one background thread as JSON
+lines to ``SLOW_QUERY_LOG``, rotated at ``SLOW_QUERY_LOG_MAX_BYTES``. The
+request only pays for a ``put_nowait``; when the queue is full the entry is
+dropped and counted.
+
+A ``SLOW_QUERY_EXPLAIN_SAMPLE`` fraction of slow SELECTs on PostgreSQL
+(psycopg) is re-run by the thread as ``EXPLAIN (ANALYZE, BUFFERS)`` on its
+own connection, in a READ ONLY transaction that is rolled back and bounded
+by ``SLOW_QUERY_EXPLAIN_TIMEOUT_MS``. Sampling keeps the extra load down:
+ANALYZE executes the query again.
+
+Entries include the bound parameters (each value cut to
+``PARAM_VALUE_CHARS``), so the file needs the same care as the database.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Connection, Engine
+from sqlalchemy.pool import NullPool
+
+from app.services import metrics, tracing
+
+SLOW_QUERY_MS: float = float(os.environ.get("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN_SAMPLE: float = float(os.environ.get("SLOW_QUERY_EXPLAIN_SAMPLE", "0.1"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = int(os.environ.get("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+SLOW_QUERY_LOG: str = os.environ.get("SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES: int = int(os.environ.get("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS: int = int(os.environ.get("SLOW_QUERY_LOG_BACKUPS", "5"))
+QUEUE_SIZE = 1000
+PARAM_VALUE_CHARS = 200
+EXECUTEMANY_PARAM_SETS = 5
+
+SLOW_QUERIES = metrics.Counter("db_slow_queries_total", "Statements over SLOW_QUERY_MS.", ["explained"])
+SLOW_QUERIES_DROPPED = metrics.Counter("db_slow_queries_dropped_total", "Slow query entries dropped on a full queue.")
+
+logger = logging.getLogger(__name__)
+# Entries go to their own file only, never to the application log.
+_file_logger = logging.getLogger(f"{__name__}.file")
+_file_logger.propagate = False
+_file_logger.setLevel(logging.INFO)
+
+_queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+_worker: threading.Thread | None = None
+_worker_lock = threading.Lock()
+_explain_engines: dict[str, Engine] = {}
+
+
+def _explainable(conn: Connection, statement: str) -> bool:
+    words = statement.split(None, 1)
+    return (
+        conn.dialect.name == "postgresql"
+        and conn.dialect.driver == "psycopg"
+        and bool(words) and words[0].upper() in ("SELECT", "WITH")
+    )
+
+
+def _short(value: Any) -> Any:
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = str(value)
+    return text if len(text) <= PARAM_VALUE_CHARS else text[:PARAM_VALUE_CHARS] + "…"
+
+
+def _loggable_params(parameters: Any, executemany: bool) -> Any:
+    def one(params: Any) -> Any:
+        if isinstance(params, dict):
+            return {k: _short(v) for k, v in params.items()}
+        if isinstance(params, (list, tuple)):
+            return [_short(v) for v in params]
+        return _short(params)
+
+    if executemany:
+        return [one(p) for p in list(parameters)[:EXECUTEMANY_PARAM_SETS]]
+    return one(parameters)
+
+
+def record(conn: Connection, statement: str, parameters: Any, seconds: float, executemany: bool) -> None:
+    """Queue ``statement`` for the slow query log if it took ``SLOW_QUERY_MS`` or longer."""
+    if SLOW_QUERY_MS <= 0 or seconds * 1000 < SLOW_QUERY_MS:
+        return
+    explain_url = None
+    if _explainable(conn, statement) and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE:
+        explain_url = conn.engine.url
+    span = tracing.current_span()
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "duration_ms": round(seconds * 1000, 1),
+        "db": conn.dialect.name,
+        "statement": statement,
+        "parameters": _loggable_params(parameters, executemany),
+        "executemany": executemany,
+        "trace_id": span.trace_id if span else None,
+    }
+    SLOW_QUERIES.inc(explained=str(explain_url is not None).lower())
+    _ensure_worker()
+    try:
+        _queue.put_nowait((entry, explain_url, statement, parameters))
+    except queue.Full:
+        SLOW_QUERIES_DROPPED.inc()
+
+
+def _explain(url: URL, statement: str, parameters: Any) -> list[str]:
+    key = url.render_as_string(hide_password=False)
+    engine = _explain_engines.get(key)
+    if engine is None:
+        # The worker has no event loop, so async URLs get a sync psycopg engine.
+        engine = _explain_engines[key] = create_engine(url.set(drivername="postgresql+psycopg"), poolclass=NullPool)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        # psycopg has already opened the transaction; this must be its first statement.
+        cur.execute("SET TRANSACTION READ ONLY")
+        cur.execute(f"SET LOCAL statement_timeout = {int(SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}")
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        raw.rollback()
+        raw.close()
+
+
+def _run() -> None:
+    while True:
+        entry, explain_url, statement, parameters = _queue.get()
+        try:
+            if explain_url is not None:
+                try:
+                    entry["plan"] = _explain(explain_url, statement, parameters)
+                except Exception as exc:
+                    entry["plan_error"] = f"{type(exc).__name__}: {exc}"
+            _file_logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+        except Exception:
+            logger.exception("slow query log write failed")
+        finally:
+            _queue.task_done()
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None:
+        return
+    with _worker_lock:
+        if _worker is None:
+            if not _file_logger.handlers:
+                handler = RotatingFileHandler(
+                    SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                    backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8", delay=True,
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                _file_logger.addHandler(handler)
+            _worker = threading.Thread(target=_run, name="slow-query-log", daemon=True)
+            _worker.start()
+
+
+def wait_idle() -> None:
+    """Block until every queued entry has been written (tests, shutdown)."""
+    _queue.join()
@@ -1,10 +1,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.user import User
+from app.services import principal_cache, revocation
 from app.services.auth import decode_access_token
+from app.services.principal_cache import Principal
 
 _bearer = HTTPBearer()
 
@@ -12,7 +15,7 @@ _bearer = HTTPBearer()
 def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(_bearer),
     db: Session = Depends(get_db),
-) -> User:
+) -> Principal:
     payload = decode_access_token(creds.credentials)
     if payload is None:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid or expired token")
@@ -21,8 +24,30 @@ def get_current_user(
     if user_id is None:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token payload")
 
-    user = db.get(User, int(user_id))
-    if user is None or not user.is_active:
+    # Every token since sessions were introduced carries a sid; one without
+    # it could not be revoked, so it is refused rather than trusted to expire.
+    sid: str | None = payload.get("sid")
+    if not sid:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token payload")
+    if revocation.is_revoked(db, sid):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Session revoked")
+
+    principal = principal_cache.get(int(user_id))
+    if principal is not None:
+        return principal
+
+    row = db.execute(
+        select(User.id, User.role, User.is_active).where(User.id == int(user_id))
+    ).first()
+    if row is None or not row.is_active:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found or inactive")
 
-    return user
+    principal = Principal(id=row.id, role=row.role, is_active=row.is_active)
+    principal_cache.put(principal)
+    return principal
+
+
+def current_session_id(creds: HTTPAuthorizationCredentials = Depends(_bearer)) -> str | None:
+    """``sid`` claim of the request's access token (``None`` if the token is invalid)."""
+    payload = decode_access_token(creds.credentials)
+    return payload.get("sid") if payload else None
@@ -0,0 +1,80 @@
+from fastapi import HTTPException, Query, Request, Response, status
+from sqlalchemy import ColumnElement, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.repo.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ListField, ListQuery, Page, PaginationError, paginate
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def list_query(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    cursor: str | None = Query(None, description="Значение X-Next-Cursor предыдущей страницы"),
+    sort: str | None = Query(None, description="Поле сортировки, '-' в начале — по убыванию"),
+    include_total: bool = Query(False, description="Вернуть X-Total-Count"),
+) -> ListQuery:
+    """Common list parameters; column filters are passed as ``filter[<field>]=<value>``."""
+    filters = {
+        key[len("filter["):-1]: value
+        for key, value in request.query_params.items()
+        if key.startswith("filter[") and key.endswith("]") and value != ""
+    }
+    return ListQuery(
+        limit=limit, cursor=cursor, sort=sort,
+        include_total=include_total, filters=filters,
+    )
+
+
+def paginate_response(
+    db: Session,
+    stmt: Select,
+    response: Response,
+    *,
+    fields: dict[str, ListField],
+    id_column: ColumnElement,
+    query: ListQuery,
+    default_sort: str,
+) -> list:
+    """Run ``paginate`` for a route: 400 on bad parameters, cursor/total in headers."""
+    try:
+        page = paginate(
+            db, stmt, fields=fields, id_column=id_column,
+            query=query, default_sort=default_sort,
+        )
+    except PaginationError as exc:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(exc)) from exc
+    return _page_items(page, response)
+
+
+async def paginate_response_async(
+    db: AsyncSession,
+    stmt: Select,
+    response: Response,
+    *,
+    fields: dict[str, ListField],
+    id_column: ColumnElement,
+    query: ListQuery,
+    default_sort: str,
+) -> list:
+    """``paginate_response`` for ``async def`` routes."""
+    try:
+        page = await db.run_sync(
+            lambda sync_db: paginate(
+                sync_db, stmt, fields=fields, id_column=id_column,
+                query=query, default_sort=default_sort,
+            )
+        )
+    except PaginationError as exc:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(exc)) from exc
+    return _page_items(page, response)
+
+
+def _page_items(page: Page, response: Response) -> list:
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
+    return page.items
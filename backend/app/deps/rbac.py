@@ -4,11 +4,11 @@ from typing import Callable
 from fastapi import Depends, HTTPException, status
 
 from app.deps.auth import get_current_user
-from app.models.user import User
+from app.services.principal_cache import Principal
 
 
-def require_role(allowed_roles: Sequence[str]) -> Callable[..., User]:
-    def _check(current_user: User = Depends(get_current_user)) -> User:
+def require_role(allowed_roles: Sequence[str]) -> Callable[..., Principal]:
+    def _check(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status.HTTP_403_FORBIDDEN,
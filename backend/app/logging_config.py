@@ -0,0 +1,166 @@
+"""
+Process-wide logging: JSON lines written off the request path.
+
+``configure_logging`` gives the root logger a single ``QueueHandler``; a
+``QueueListener`` thread does the formatting and the blocking stream write.
+The queue is bounded (``LOG_QUEUE_SIZE``): when it is full, records are
+dropped and counted rather than stalling a request. uvicorn's loggers are
+routed through the same queue.
+
+Each record carries the request id (``X-Request-ID``, taken from the client
+or generated by ``RequestIdMiddleware`` and echoed back) and the current
+trace id. These are captured in the emitting thread, because context
+variables do not reach the listener thread.
+
+High-volume debug events pass ``extra={"sampled": True}``; only a
+``LOG_SAMPLE_RATE`` fraction of them is kept.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services import metrics, tracing
+
+LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "json" (default) or "text" for local development.
+LOG_FORMAT: str = os.environ.get("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE: int = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATE: float = float(os.environ.get("LOG_SAMPLE_RATE", "0.1"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+LOG_RECORDS_DROPPED = metrics.Counter("log_records_dropped_total", "Log records dropped on a full log queue.")
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra``.
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class ContextFilter(logging.Filter):
+    """Stamp ``request_id`` / ``trace_id`` and apply debug sampling."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and random.random() >= LOG_SAMPLE_RATE:
+            return False
+        record.request_id = request_id_var.get()
+        span = tracing.current_span()
+        record.trace_id = span.trace_id if span else None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != "sampled" and value is not None:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args and pre-render the traceback, but leave formatting to the listener.
+
+        The stock ``prepare`` formats the whole record and folds the
+        traceback into ``msg``, which would hide it from ``JsonFormatter``.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None  # frames must not travel to another thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+_traceback_formatter = logging.Formatter()
+_listener: QueueListener | None = None
+
+
+def configure_logging() -> None:
+    """Route all logging through the queue; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uv = logging.getLogger(name)
+        uv.handlers = []
+        uv.propagate = True
+
+    _listener = QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(REQUEST_ID_HEADER, request_id)
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
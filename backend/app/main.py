@@ -1,25 +1,51 @@
-import logging
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
+from app.logging_config import REQUEST_ID_HEADER, RequestIdMiddleware, configure_logging
 
-from fastapi import FastAPI
+configure_logging()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.db.query_stats import QueryStatsMiddleware
+from app.db.read_your_writes import ReadYourWritesMiddleware
+from app.db.session import DATABASE_READ_URL
+from app.deps.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.routes.admin_traces import router as admin_traces_router
 from app.routes.admin_users import router as admin_users_router
 from app.routes.auth import router as auth_router
+from app.routes.exports import router as exports_router
+from app.routes.metrics import router as metrics_router
 from app.routes.quotes import router as quotes_router
 from app.routes.rules import router as rules_router
 from app.routes.skus import router as skus_router
 from app.routes.technique_aliases import router as technique_aliases_router
 from app.routes.techniques import router as techniques_router
+from app.routes.warehouse import router as warehouse_router
 from app.routes.zones import router as zones_router
+from app.services import bulk_export, password_hashing, xlsx_export
+from app.services.http_metrics import HttpMetricsMiddleware
+from app.services.password_hashing import PasswordHashBusy
+from app.services.tracing import TRACE_ID_HEADER, TracingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    # Worker processes would otherwise outlive a reload or a graceful stop.
+    password_hashing.shutdown_pool()
+    bulk_export.shutdown_pool()
+    xlsx_export.shutdown_pool()
 
-app = FastAPI(title="Fire Dynamics API")
+
+app = FastAPI(title="Fire Dynamics API", lifespan=lifespan)
 
 _cors_env = os.environ.get("CORS_ORIGINS", "")
 _cors_origins = (
@@ -33,16 +59,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, TRACE_ID_HEADER, REQUEST_ID_HEADER],
 )
+app.add_middleware(ReadYourWritesMiddleware, enabled=bool(DATABASE_READ_URL))
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(TracingMiddleware)
+# Added last so they are outermost: metrics time the other middleware and
+# every log record of the request carries its id.
+app.add_middleware(HttpMetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(auth_router)
 app.include_router(admin_users_router)
+app.include_router(admin_traces_router)
 app.include_router(techniques_router)
 app.include_router(technique_aliases_router)
 app.include_router(zones_router)
 app.include_router(skus_router)
 app.include_router(rules_router)
 app.include_router(quotes_router)
+app.include_router(warehouse_router)
+app.include_router(exports_router)
+app.include_router(metrics_router)
+
+
+@app.exception_handler(PasswordHashBusy)
+def password_hash_busy(request: Request, exc: PasswordHashBusy) -> JSONResponse:
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
 
 
 @app.get("/health")
@@ -1,17 +1,22 @@
 from app.models.user import User
 from app.models.technique import Technique
 from app.models.technique_alias import TechniqueAlias
+from app.models.technique_popularity import TechniquePopularity
 from app.models.engine_option import EngineOption
 from app.models.zone import Zone
 from app.models.sku import SKU
+from app.models.sku_availability import SkuAvailability
 from app.models.rule import Rule
 from app.models.quote import Quote, QuoteItem
 from app.models.quote_result_line import QuoteResultLine
 from app.models.quote_calc_run import QuoteCalcRun
+from app.models.quote_stats import QuoteStatsDaily, SkuDemand, SkuVolume
 from app.models.email_verify_token import EmailVerifyToken
+from app.models.auth_session import AuthSession
 
 __all__ = [
-    "User", "Technique", "TechniqueAlias", "EngineOption",
-    "Zone", "SKU", "Rule", "Quote", "QuoteItem",
-    "QuoteResultLine", "QuoteCalcRun", "EmailVerifyToken",
+    "User", "Technique", "TechniqueAlias", "TechniquePopularity", "EngineOption",
+    "Zone", "SKU", "SkuAvailability", "Rule", "Quote", "QuoteItem",
+    "QuoteResultLine", "QuoteCalcRun", "QuoteStatsDaily", "SkuVolume",
+    "SkuDemand", "EmailVerifyToken", "AuthSession",
 ]
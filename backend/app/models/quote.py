@@ -1,13 +1,17 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func, select
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 
 from app.db.base import Base
 
 
 class Quote(Base):
     __tablename__ = "quotes"
+    __table_args__ = (
+        Index("ix_quotes_status_updated_at", "status", "updated_at"),
+        Index("ix_quotes_updated_at_id", "updated_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     created_by: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -15,6 +19,9 @@ class Quote(Base):
     customer_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     comment: Mapped[str | None] = mapped_column(Text, nullable=True)
     zones_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    search_text: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    # Bumped whenever result lines change; part of the export cache key.
+    result_revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -23,6 +30,9 @@ class Quote(Base):
 
 class QuoteItem(Base):
     __tablename__ = "quote_items"
+    __table_args__ = (
+        Index("ix_quote_items_technique_id_quote_id", "technique_id", "quote_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     quote_id: Mapped[int] = mapped_column(Integer, ForeignKey("quotes.id", ondelete="CASCADE"), nullable=False)
@@ -34,3 +44,14 @@ class QuoteItem(Base):
     params_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     quote: Mapped["Quote"] = relationship(back_populates="items")
+
+
+# Deferred aggregate: load with options(undefer(Quote.items_count)) for list views
+# instead of pulling every QuoteItem row just to len() it.
+Quote.items_count = column_property(
+    select(func.count(QuoteItem.id))
+    .where(QuoteItem.quote_id == Quote.id)
+    .correlate_except(QuoteItem)
+    .scalar_subquery(),
+    deferred=True,
+)
@@ -1,4 +1,6 @@
-from sqlalchemy import ForeignKey, Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -14,3 +16,5 @@ class QuoteResultLine(Base):
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
     availability_status: Mapped[str | None] = mapped_column(String(50), nullable=True)
     availability_comment: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # When the availability above was last confirmed; older than the quote when prefilled.
+    availability_as_of: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,41 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class QuoteStatsDaily(Base):
+    """Number of quotes per (author, current status, creation day), maintained incrementally."""
+
+    __tablename__ = "quote_stats_daily"
+
+    created_by: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    quotes_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SkuVolume(Base):
+    """Sum of quote_result_lines.qty per SKU across all quotes, maintained incrementally."""
+
+    __tablename__ = "sku_volume"
+
+    sku_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("sku.id", ondelete="CASCADE"), primary_key=True,
+    )
+    total_qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SkuDemand(Base):
+    """Result line qty per (SKU, quote status, quote creation month), maintained incrementally."""
+
+    __tablename__ = "sku_demand"
+
+    sku_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("sku.id", ondelete="CASCADE"), primary_key=True,
+    )
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    period: Mapped[date] = mapped_column(Date, primary_key=True)
+    total_qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SkuAvailability(Base):
+    """Last availability the warehouse reported for each SKU, used to prefill new checks."""
+
+    __tablename__ = "sku_availability"
+
+    sku_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("sku.id", ondelete="CASCADE"), primary_key=True,
+    )
+    availability_status: Mapped[str] = mapped_column(String(50), nullable=False)
+    availability_comment: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
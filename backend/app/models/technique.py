@@ -8,6 +8,18 @@ class Technique(Base):
     __tablename__ = "technique"
     __table_args__ = (
         Index("ix_technique_mfr_model_series", "manufacturer", "model", "series"),
+        Index(
+            "ix_technique_manufacturer_trgm", "manufacturer",
+            postgresql_using="gin", postgresql_ops={"manufacturer": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_technique_model_trgm", "model",
+            postgresql_using="gin", postgresql_ops={"model": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_technique_series_trgm", "series",
+            postgresql_using="gin", postgresql_ops={"series": "gin_trgm_ops"},
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
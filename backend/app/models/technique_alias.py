@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Integer, String, Text
+from sqlalchemy import ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -6,6 +6,13 @@ from app.db.base import Base
 
 class TechniqueAlias(Base):
     __tablename__ = "technique_alias"
+    __table_args__ = (
+        Index("ix_technique_alias_text", "alias_text"),
+        Index(
+            "ix_technique_alias_text_trgm", "alias_text",
+            postgresql_using="gin", postgresql_ops={"alias_text": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     alias_text: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TechniquePopularity(Base):
+    """Number of quote_items rows per technique, maintained incrementally."""
+
+    __tablename__ = "technique_popularity"
+
+    technique_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("technique.id", ondelete="CASCADE"), primary_key=True,
+    )
+    usage_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,238 @@
+"""
+Keyset pagination, sorting and filtering shared by list endpoints.
+
+A route describes its sortable / filterable columns as ``ListField``s and
+hands a base SELECT to ``paginate``. Pages are addressed by an opaque cursor
+holding the last row's (sort value, id) instead of an OFFSET, so fetching
+page N costs the same as page 1 as long as (sort column, id) is indexed.
+Nullable columns are sorted through ``coalesced()``, the spelling the
+expression indexes of migration 0022 are built on.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Generic, Literal, TypeVar
+
+from sqlalchemy import ColumnElement, Select, func, literal_column, select
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+FilterKind = Literal["text", "exact", "int", "bool", "daterange"]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+LIKE_ESCAPE = "\\"
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def escape_like(text: str) -> str:
+    """``text`` with LIKE wildcards escaped, for use with ``escape=LIKE_ESCAPE``."""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        text = text.replace(char, LIKE_ESCAPE + char)
+    return text
+
+
+def coalesced(column: ColumnElement) -> ColumnElement:
+    """``coalesce(column, '')`` with a literal '' (a bound parameter would not match an expression index)."""
+    return func.coalesce(column, literal_column("''"))
+
+
+@dataclass(frozen=True)
+class ListField:
+    """A column exposed to clients for sorting and/or filtering.
+
+    ``column`` must be NOT NULL for sorting (wrap nullable text columns in
+    ``coalesced()``) — keyset comparisons do not order NULLs.
+    """
+
+    column: ColumnElement
+    sortable: bool = True
+    filter: FilterKind | None = None
+
+
+@dataclass
+class ListQuery:
+    limit: int | None = None
+    cursor: str | None = None
+    sort: str | None = None
+    include_total: bool = False
+    filters: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+def _encode_value(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return {"$dt": v.isoformat()}
+    if isinstance(v, date):
+        return {"$d": v.isoformat()}
+    return v
+
+
+def _decode_value(v: Any) -> Any:
+    if isinstance(v, dict):
+        if "$dt" in v:
+            return datetime.fromisoformat(v["$dt"])
+        if "$d" in v:
+            return date.fromisoformat(v["$d"])
+        raise PaginationError("Invalid cursor")
+    return v
+
+
+def encode_cursor(sort: str, values: list[Any]) -> str:
+    raw = json.dumps({"s": sort, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _check_value_type(column: ColumnElement, value: Any) -> None:
+    """Reject a cursor value the sort column could not compare with (a 500 on PostgreSQL)."""
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return
+    if expected is float:
+        expected = (int, float)
+    if (
+        value is None
+        or (isinstance(value, bool) and expected is not bool)
+        or (isinstance(value, datetime) and expected is date)
+        or not isinstance(value, expected)
+    ):
+        raise PaginationError("Invalid cursor")
+
+
+def decode_cursor(token: str, sort: str) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        values = data["v"]
+        # [sort value, id]: a scalar (or encoded date/datetime) and an integer id.
+        if (
+            not isinstance(values, list) or len(values) != 2
+            or not (values[0] is None or isinstance(values[0], (str, int, float, dict)))
+            or not isinstance(values[1], int) or isinstance(values[1], bool)
+        ):
+            raise PaginationError("Invalid cursor")
+        values = [_decode_value(v) for v in values]
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise PaginationError("Invalid cursor") from exc
+    if data.get("s") != sort:
+        raise PaginationError("Cursor does not match the requested sort")
+    return values
+
+
+def parse_sort(sort: str | None, fields: dict[str, ListField], default: str) -> tuple[str, bool]:
+    """``"code"`` → ascending, ``"-code"`` → descending."""
+    spec = sort or default
+    descending = spec.startswith("-")
+    name = spec.lstrip("-")
+    f = fields.get(name)
+    if f is None or not f.sortable:
+        raise PaginationError(f"Cannot sort by '{name}'")
+    return name, descending
+
+
+def _apply_daterange(stmt: Select, column: ColumnElement, name: str, raw: str) -> Select:
+    """``"2026-01-01|2026-01-31"`` — inclusive on both ends, either side may be empty."""
+    start, _, end = raw.partition("|")
+    try:
+        if start:
+            stmt = stmt.where(column >= datetime.combine(date.fromisoformat(start), datetime.min.time()))
+        if end:
+            stmt = stmt.where(
+                column < datetime.combine(date.fromisoformat(end) + timedelta(days=1), datetime.min.time())
+            )
+    except ValueError as exc:
+        raise PaginationError(f"Filter '{name}' expects YYYY-MM-DD|YYYY-MM-DD") from exc
+    return stmt
+
+
+def apply_filters(stmt: Select, fields: dict[str, ListField], filters: dict[str, str]) -> Select:
+    for name, raw in filters.items():
+        f = fields.get(name)
+        if f is None or f.filter is None:
+            raise PaginationError(f"Cannot filter by '{name}'")
+        if f.filter == "text":
+            stmt = stmt.where(f.column.ilike(f"%{escape_like(raw)}%", escape=LIKE_ESCAPE))
+        elif f.filter == "bool":
+            if raw not in ("true", "false"):
+                raise PaginationError(f"Filter '{name}' expects true or false")
+            stmt = stmt.where(f.column.is_(raw == "true"))
+        elif f.filter == "daterange":
+            stmt = _apply_daterange(stmt, f.column, name, raw)
+        elif f.filter == "int":
+            try:
+                stmt = stmt.where(f.column == int(raw))
+            except ValueError as exc:
+                raise PaginationError(f"Filter '{name}' expects an integer") from exc
+        else:
+            stmt = stmt.where(f.column == raw)
+    return stmt
+
+
+def _after(column: ColumnElement, id_column: ColumnElement, values: list[Any], descending: bool):
+    value, last_id = values
+    if descending:
+        return (column < value) | ((column == value) & (id_column < last_id))
+    return (column > value) | ((column == value) & (id_column > last_id))
+
+
+def paginate(
+    db: Session,
+    stmt: Select,
+    *,
+    fields: dict[str, ListField],
+    id_column: ColumnElement,
+    query: ListQuery,
+    default_sort: str,
+) -> Page:
+    """Filter, sort and cut one keyset page out of ``stmt``.
+
+    ``stmt`` must select a single ORM entity (or row) and must not be
+    ordered yet. Without ``query.limit`` every matching row is returned.
+    """
+    if query.limit is not None and not 1 <= query.limit <= MAX_PAGE_SIZE:
+        raise PaginationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    sort_name, descending = parse_sort(query.sort, fields, default_sort)
+    sort_col = fields[sort_name].column
+    cursor_key = f"-{sort_name}" if descending else sort_name
+
+    stmt = apply_filters(stmt, fields, query.filters)
+
+    total = None
+    if query.include_total:
+        total = db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar_one()
+
+    if query.cursor:
+        values = decode_cursor(query.cursor, cursor_key)
+        _check_value_type(sort_col, values[0])
+        stmt = stmt.where(_after(sort_col, id_column, values, descending))
+
+    if descending:
+        stmt = stmt.order_by(sort_col.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_col.asc(), id_column.asc())
+
+    if query.limit is None:
+        return Page(items=list(db.execute(stmt).scalars().all()), total=total)
+
+    stmt = stmt.add_columns(sort_col, id_column).limit(query.limit + 1)
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > query.limit:
+        rows = rows[: query.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(cursor_key, [last[-2], last[-1]])
+    return Page(items=[r[0] for r in rows], next_cursor=next_cursor, total=total)
@@ -1,8 +1,16 @@
-from sqlalchemy import select, union
+import math
+from collections.abc import Callable
+
+from sqlalchemy import Select, case, func, literal, literal_column, select, union_all
 from sqlalchemy.orm import Session
 
+from app.db.dialect import is_postgres
 from app.models.technique import Technique
 from app.models.technique_alias import TechniqueAlias
+from app.models.technique_popularity import TechniquePopularity
+from app.repo.pagination import LIKE_ESCAPE, escape_like
+
+SEARCH_LIMIT_DEFAULT = 50
 
 
 def search_techniques(
@@ -10,42 +18,172 @@ def search_techniques(
     *,
     search: str | None = None,
     manufacturer: str | None = None,
+    limit: int | None = None,
 ) -> list[Technique]:
+    """Active techniques, optionally filtered by a free-text search.
+
+    With a search term the result is ranked by pg_trgm similarity (best
+    match first) and capped at ``limit`` (``SEARCH_LIMIT_DEFAULT`` if not
+    given). Other dialects have no similarity() and fall back to
+    alphabetical order.
+    """
     if search:
         pattern = f"%{search}%"
+        trigram = is_postgres(db)
+
+        field_match = (
+            Technique.manufacturer.ilike(pattern)
+            | Technique.model.ilike(pattern)
+            | Technique.series.ilike(pattern)
+        )
+        alias_match = TechniqueAlias.alias_text.ilike(pattern)
+        if trigram:
+            field_score = func.greatest(
+                func.similarity(Technique.manufacturer, search),
+                func.similarity(Technique.model, search),
+                func.similarity(func.coalesce(Technique.series, ""), search),
+            )
+            alias_score = func.similarity(TechniqueAlias.alias_text, search)
+            field_match = (
+                field_match
+                | Technique.manufacturer.op("%")(search)
+                | Technique.model.op("%")(search)
+                | Technique.series.op("%")(search)
+            )
+            alias_match = alias_match | TechniqueAlias.alias_text.op("%")(search)
+        else:
+            field_score = alias_score = literal(0.0)
 
         by_fields = (
-            select(Technique.id)
+            select(Technique.id.label("id"), field_score.label("score"))
             .where(Technique.active.is_(True))
-            .where(
-                Technique.manufacturer.ilike(pattern)
-                | Technique.model.ilike(pattern)
-                | Technique.series.ilike(pattern)
-            )
+            .where(field_match)
         )
 
         by_alias = (
-            select(TechniqueAlias.technique_id.label("id"))
-            .where(TechniqueAlias.alias_text.ilike(pattern))
+            select(TechniqueAlias.technique_id.label("id"), alias_score.label("score"))
+            .where(alias_match)
         )
 
-        matched_ids = union(by_fields, by_alias).subquery()
+        matched = union_all(by_fields, by_alias).subquery()
+        best = (
+            select(matched.c.id, func.max(matched.c.score).label("score"))
+            .group_by(matched.c.id)
+            .subquery()
+        )
 
         stmt = (
             select(Technique)
-            .where(Technique.id.in_(select(matched_ids.c.id)))
+            .join(best, best.c.id == Technique.id)
             .where(Technique.active.is_(True))
+            .order_by(best.c.score.desc())
         )
+        limit = limit or SEARCH_LIMIT_DEFAULT
     else:
         stmt = select(Technique).where(Technique.active.is_(True))
 
     if manufacturer:
         stmt = stmt.where(Technique.manufacturer.ilike(manufacturer))
 
-    stmt = stmt.order_by(Technique.manufacturer, Technique.model)
+    stmt = stmt.order_by(Technique.manufacturer, Technique.model, Technique.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
     return list(db.execute(stmt).scalars().all())
 
 
+SUGGEST_POPULARITY_WEIGHT = 0.25
+
+
+# Spelled exactly like the expression index of migration 0021 (a bound " "
+# parameter would not match it).
+TECHNIQUE_FULL_NAME = Technique.manufacturer + literal_column("' '") + Technique.model
+
+
+def suggest_techniques(db: Session, prefix: str, *, limit: int = 10) -> list[Technique]:
+    """Top-``limit`` active techniques for an autocomplete prefix.
+
+    Match quality: 3 — exact manufacturer/model, 2 — manufacturer, model or
+    "manufacturer model" starts with the prefix, 1 — series or alias starts
+    with it. The final score adds ``SUGGEST_POPULARITY_WEIGHT * ln(1 + usage)``
+    from technique_popularity, so frequently quoted machines float up within
+    (and occasionally across) quality tiers.
+
+    Within a tier the score grows with usage, so the ``limit`` most used
+    matches of each tier are enough candidates for the blend. Every prefix
+    condition is served by a pg_trgm GIN index (0011, 0021).
+    """
+    rows = db.execute(_suggest_stmt(prefix, limit)).all()
+
+    def _score(row) -> float:
+        _, quality, used = row
+        return quality + SUGGEST_POPULARITY_WEIGHT * math.log1p(max(used, 0))
+
+    ranked = sorted(rows, key=_score, reverse=True)
+    return [t for t, _, _ in ranked[:limit]]
+
+
+def _suggest_stmt(prefix: str, limit: int) -> Select:
+    exact = escape_like(prefix)
+    starts = exact + "%"
+    full_name = TECHNIQUE_FULL_NAME
+
+    def like(expr, pattern: str):
+        return expr.ilike(pattern, escape=LIKE_ESCAPE)
+
+    field_quality = case(
+        (like(Technique.manufacturer, exact) | like(Technique.model, exact), 3),
+        (
+            like(Technique.manufacturer, starts)
+            | like(Technique.model, starts)
+            | like(full_name, starts),
+            2,
+        ),
+        else_=1,
+    )
+    by_fields = (
+        select(Technique.id.label("id"), field_quality.label("quality"))
+        .where(
+            like(Technique.manufacturer, starts)
+            | like(Technique.model, starts)
+            | like(full_name, starts)
+            | like(Technique.series, starts)
+        )
+    )
+    by_alias = (
+        select(TechniqueAlias.technique_id.label("id"), literal(1).label("quality"))
+        .where(like(TechniqueAlias.alias_text, starts))
+    )
+    matched = union_all(by_fields, by_alias).subquery()
+    best = (
+        select(matched.c.id, func.max(matched.c.quality).label("quality"))
+        .group_by(matched.c.id)
+        .subquery()
+    )
+    usage = func.coalesce(TechniquePopularity.usage_count, 0)
+    candidates = (
+        select(
+            best.c.id,
+            best.c.quality,
+            usage.label("usage"),
+            func.row_number().over(
+                partition_by=best.c.quality,
+                order_by=(usage.desc(), Technique.manufacturer, Technique.model),
+            ).label("tier_rank"),
+        )
+        .join(Technique, Technique.id == best.c.id)
+        .outerjoin(TechniquePopularity, TechniquePopularity.technique_id == Technique.id)
+        .where(Technique.active.is_(True))
+        .subquery()
+    )
+
+    return (
+        select(Technique, candidates.c.quality, candidates.c.usage)
+        .join(candidates, candidates.c.id == Technique.id)
+        .where(candidates.c.tier_rank <= limit)
+        .order_by(candidates.c.quality.desc(), candidates.c.usage.desc(), Technique.manufacturer, Technique.model)
+    )
+
+
 def get_technique_by_id(db: Session, technique_id: int) -> Technique | None:
     t = db.get(Technique, technique_id)
     if t and t.active:
@@ -77,10 +215,13 @@ def patch_technique(
     series: str | None = ...,
     meta: str | None = ...,
     active: bool | None = None,
+    on_rename: Callable[[Session, int], None] | None = None,
 ) -> Technique | None:
+    """Apply the given fields; ``on_rename(db, technique_id)`` runs before the commit if a name changed."""
     t = db.get(Technique, technique_id)
     if t is None:
         return None
+    old_names = (t.manufacturer, t.model, t.series)
     if manufacturer is not None:
         t.manufacturer = manufacturer
     if model is not None:
@@ -91,6 +232,9 @@ def patch_technique(
         t.meta = meta
     if active is not None:
         t.active = active
+    if on_rename is not None and (t.manufacturer, t.model, t.series) != old_names:
+        db.flush()
+        on_rename(db, technique_id)
     db.commit()
     db.refresh(t)
     return t
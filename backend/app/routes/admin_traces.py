@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from app.deps.rbac import require_role
+from app.services import tracing
+
+router = APIRouter(
+    prefix="/admin/traces",
+    tags=["admin-traces"],
+    dependencies=[Depends(require_role(["admin"]))],
+)
+
+
+class TraceSummaryOut(BaseModel):
+    trace_id: str
+    name: str
+    start_time_unix_nano: int
+    duration_ms: float
+    status: str
+    span_count: int
+
+
+@router.get("", response_model=list[TraceSummaryOut])
+def list_traces(
+    limit: int = Query(50, ge=1, le=500),
+    min_duration_ms: float = Query(0, ge=0),
+) -> list[TraceSummaryOut]:
+    """Traces in this worker's ring buffer, newest first, summarised by their root span."""
+    if "memory" not in tracing.TRACE_EXPORT:
+        raise HTTPException(status.HTTP_409_CONFLICT, "In-memory trace export is disabled (TRACE_EXPORT)")
+    spans = tracing.recent_spans()
+    counts: dict[str, int] = defaultdict(int)
+    for s in spans:
+        counts[s.trace_id] += 1
+    # A root here is a span without a parent in this process (remote parents included).
+    local_ids = {s.span_id for s in spans}
+    roots = [s for s in spans if s.parent_span_id is None or s.parent_span_id not in local_ids]
+    out = [
+        TraceSummaryOut(
+            trace_id=s.trace_id, name=s.name, start_time_unix_nano=s.start_time_unix_nano,
+            duration_ms=round(s.duration_ms, 3), status=s.status["code"], span_count=counts[s.trace_id],
+        )
+        for s in reversed(roots)
+        if s.duration_ms >= min_duration_ms
+    ]
+    return out[:limit]
+
+
+@router.get("/{trace_id}")
+def get_trace(trace_id: str) -> list[dict]:
+    """All buffered spans of one trace in start order, in the OTel span JSON shape."""
+    spans = sorted(
+        (s for s in tracing.recent_spans() if s.trace_id == trace_id),
+        key=lambda s: s.start_time_unix_nano,
+    )
+    if not spans:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Trace not found")
+    return [s.to_dict() for s in spans]
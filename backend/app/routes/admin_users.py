@@ -1,16 +1,20 @@
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.deps.auth import get_current_user
+from app.deps.pagination import list_query, paginate_response
 from app.deps.rbac import require_role
 from app.models.quote import Quote
 from app.models.user import User
+from app.repo.pagination import ListField, ListQuery, coalesced
+from app.services import principal_cache
 from app.services.auth import hash_password
+from app.services.principal_cache import Principal
 
 RoleType = Literal["admin", "manager", "warehouse"]
 
@@ -39,9 +43,24 @@ class UserPatch(BaseModel):
     is_active: bool | None = None
 
 
+_LIST_FIELDS = {
+    "id": ListField(User.id, filter="int"),
+    "login": ListField(User.login, filter="text"),
+    "role": ListField(coalesced(User.role), filter="exact"),
+    "is_active": ListField(User.is_active, filter="bool"),
+}
+
+
 @router.get("", response_model=list[UserOut])
-def list_users(db: Session = Depends(get_db)) -> list[UserOut]:
-    users = db.execute(select(User).order_by(User.id)).scalars().all()
+def list_users(
+    response: Response,
+    query: ListQuery = Depends(list_query),
+    db: Session = Depends(get_db),
+) -> list[UserOut]:
+    users = paginate_response(
+        db, select(User), response,
+        fields=_LIST_FIELDS, id_column=User.id, query=query, default_sort="id",
+    )
     return [UserOut(id=u.id, login=u.login, role=u.role, is_active=u.is_active) for u in users]
 
 
@@ -75,6 +94,7 @@ def patch_user(user_id: int, body: UserPatch, db: Session = Depends(get_db)) ->
         user.is_active = body.is_active
 
     db.commit()
+    principal_cache.invalidate(user_id)
     db.refresh(user)
     return UserOut(id=user.id, login=user.login, role=user.role, is_active=user.is_active)
 
@@ -83,7 +103,7 @@ def patch_user(user_id: int, body: UserPatch, db: Session = Depends(get_db)) ->
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     if user_id == current_user.id:
         raise HTTPException(status.HTTP_409_CONFLICT, "Нельзя удалить самого себя")
@@ -100,3 +120,4 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user_id)
@@ -1,16 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
-from app.deps.auth import get_current_user
+from app.deps.auth import current_session_id, get_current_user
+from app.models.auth_session import AuthSession
 from app.models.user import User
-from app.services.auth import create_access_token, hash_password, verify_password
+from app.services import principal_cache
+from app.services.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_access_token,
+    decode_access_token,
+    hash_password,
+    verify_password,
+)
+from app.services.auth_sessions import (
+    RefreshRejected,
+    open_session,
+    revoke,
+    revoke_user_sessions,
+    rotate,
+    session_for_token,
+)
 from app.services.email_verify import create_verify_token, send_verify_email, verify_token
+from app.services.principal_cache import Principal
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+_optional_bearer = HTTPBearer(auto_error=False)
+
 
 class LoginRequest(BaseModel):
     login: str
@@ -20,6 +40,27 @@ class LoginRequest(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    # None when a just-rotated token was replayed within the grace window:
+    # keep the refresh token obtained by the concurrent request.
+    refresh_token: str | None
+    expires_in: int
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: str | None = None
+
+
+def _issue_tokens(user: User, session: AuthSession, refresh_token: str | None) -> TokenResponse:
+    token = create_access_token({"sub": str(user.id), "role": user.role, "sid": session.id})
+    return TokenResponse(
+        access_token=token,
+        refresh_token=refresh_token,
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
 
 
 class UserMeResponse(BaseModel):
@@ -90,16 +131,42 @@ def login(body: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
     if user.role is None:
         raise HTTPException(status.HTTP_403_FORBIDDEN, "Роль не назначена. Обратитесь к администратору.")
 
-    token = create_access_token({"sub": str(user.id), "role": user.role})
-    return TokenResponse(access_token=token)
+    session, refresh_token = open_session(db, user.id)
+    db.commit()
+    return _issue_tokens(user, session, refresh_token)
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh(body: RefreshRequest, db: Session = Depends(get_db)) -> TokenResponse:
+    """Exchange a refresh token for a new access/refresh pair; no password check involved."""
+    try:
+        session, refresh_token = rotate(db, body.refresh_token)
+    except RefreshRejected as exc:
+        db.commit()  # keeps the revocation when a reused token was detected
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, str(exc))
+
+    user = db.get(User, session.user_id)
+    if user is None or not user.is_active or user.role is None:
+        revoke(db, session.id)
+        db.commit()
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found or inactive")
+
+    db.commit()
+    return _issue_tokens(user, session, refresh_token)
 
 
 @router.get("/me", response_model=UserMeResponse)
-def me(current_user: User = Depends(get_current_user)) -> UserMeResponse:
+def me(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> UserMeResponse:
+    user = db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found or inactive")
     return UserMeResponse(
-        id=current_user.id,
-        login=current_user.login,
-        role=current_user.role,
+        id=user.id,
+        login=user.login,
+        role=user.role,
     )
 
 
@@ -111,16 +178,40 @@ class ChangePasswordRequest(BaseModel):
 @router.patch("/me")
 def change_password(
     body: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    sid: str | None = Depends(current_session_id),
     db: Session = Depends(get_db),
 ) -> dict:
-    if not verify_password(body.current_password, current_user.password_hash):
+    user = db.get(User, current_user.id)
+    if user is None or not verify_password(body.current_password, user.password_hash):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Неверный текущий пароль")
-    current_user.password_hash = hash_password(body.new_password)
+    user.password_hash = hash_password(body.new_password)
+    # Sign out every other device; the session making the change stays.
+    revoke_user_sessions(db, user.id, keep=sid)
     db.commit()
+    principal_cache.invalidate(user.id)
     return {"detail": "ok"}
 
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
-def logout() -> dict:
+def logout(
+    body: LogoutRequest | None = None,
+    creds: HTTPAuthorizationCredentials | None = Depends(_optional_bearer),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Revoke the session of a valid refresh token or of the bearer access token, if any.
+
+    A refresh token must carry its secret: the session id alone is visible
+    in every access token and must not be enough to sign someone out.
+    """
+    sid = None
+    if body and body.refresh_token:
+        session = session_for_token(db, body.refresh_token)
+        sid = session.id if session else None
+    if sid is None and creds is not None:
+        payload = decode_access_token(creds.credentials)
+        sid = payload.get("sid") if payload else None
+    if sid is not None:
+        revoke(db, sid)
+        db.commit()
     return {"detail": "ok"}
@@ -0,0 +1,49 @@
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.db.session import get_read_db
+from app.deps.rbac import require_role
+from app.services.analytics_export import (
+    iter_batches,
+    result_lines_stmt,
+    stream_csv,
+    stream_parquet,
+)
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["exports"],
+    dependencies=[Depends(require_role(["admin", "manager"]))],
+)
+
+PARQUET_MIME = "application/vnd.apache.parquet"
+
+
+@router.get("/result-lines")
+def export_result_lines(
+    format: Literal["csv", "parquet"] = Query("csv"),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    status_filter: list[str] = Query([], alias="status"),
+    db: Session = Depends(get_read_db),
+):
+    """All result lines with quote, SKU and technique columns, one row per line.
+
+    ``date_from`` / ``date_to`` bound the quote creation day. The body is
+    streamed batch by batch.
+    """
+    stmt = result_lines_stmt(date_from=date_from, date_to=date_to, statuses=status_filter)
+    stamp = date.today().strftime("%Y%m%d")
+    if format == "parquet":
+        body, media_type, ext = stream_parquet(iter_batches(db.get_bind(), stmt)), PARQUET_MIME, "parquet"
+    else:
+        body, media_type, ext = stream_csv(iter_batches(db.get_bind(), stmt)), "text/csv; charset=utf-8", "csv"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="result_lines_{stamp}.{ext}"'},
+    )
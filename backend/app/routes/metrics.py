@@ -0,0 +1,24 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.services import metrics
+
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>". Without a token the
+# endpoint is only served when APP_ENV=development; elsewhere it is a 404.
+METRICS_TOKEN: str = os.environ.get("METRICS_TOKEN", "")
+APP_ENV: str = os.environ.get("APP_ENV", "production")
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics(authorization: str | None = Header(None)) -> PlainTextResponse:
+    if not METRICS_TOKEN:
+        if APP_ENV != "development":
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Not Found")
+    elif not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,23 +1,44 @@
 import json
+import os
 from datetime import date, datetime
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import ColumnElement, Select, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload, undefer
 
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db, get_read_db
 from app.deps.auth import get_current_user
+from app.deps.pagination import list_query, paginate_response_async
 from app.deps.rbac import require_role
 from app.models.quote import Quote, QuoteItem
+from app.models.quote_calc_run import QuoteCalcRun
 from app.models.quote_result_line import QuoteResultLine
+from app.models.quote_stats import QuoteStatsDaily, SkuVolume
 from app.models.sku import SKU
-from app.models.technique import Technique
 from app.models.user import User
+from app.repo.pagination import ListField, ListQuery, coalesced
+from app.services.availability import (
+    LineAvailability,
+    load_lines,
+    prefill_availability,
+    remember_sku_availability,
+    set_line_availability,
+)
+from app.services import export_cache
+from app.services.bulk_export import MAX_BULK_QUOTES, build_multi_sheet_workbook, export_refs, stream_zip
 from app.services.calc_engine import calculate_quote
+from app.services.principal_cache import Principal
+from app.services.quote_search import refresh_search_text, search_filter
+from app.services.quote_stats import lock_quote, record_result_change, record_status_change
 from app.services.quote_status import CALCULABLE, EDITABLE, QuoteStatus, can_transition
-from app.services.xlsx_export import xlsx_export
+from app.services.technique_popularity import bump_usage, usage_delta
+from app.services.xlsx_export import build_workbook, manager_name, stream_workbook
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 router = APIRouter(
     prefix="/quotes",
@@ -125,7 +146,7 @@ class QuoteListItem(BaseModel):
 def create_quote(
     body: QuoteCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> QuoteOut:
     quote = Quote(
         created_by=current_user.id,
@@ -144,59 +165,233 @@ def create_quote(
             params_json=it.params_json,
         ))
     db.add(quote)
+    bump_usage(db, usage_delta(added=[it.technique_id for it in body.items]))
+    db.flush()
+    refresh_search_text(db, [quote.id])
+    record_result_change(db, quote, old_status=None, new_status=quote.status)
     db.commit()
     db.refresh(quote)
     return _to_out(quote)
 
 
-@router.get("", response_model=list[QuoteListItem])
-def list_quotes(
-    status_filter: str | None = Query(None, alias="status"),
-    search: str | None = Query(None),
-    date_from: date | None = Query(None),
-    date_to: date | None = Query(None),
-    db: Session = Depends(get_db),
-) -> list[QuoteListItem]:
-    stmt = select(Quote).options(selectinload(Quote.items)).order_by(Quote.updated_at.desc())
-
+_LIST_FIELDS = {
+    "id": ListField(Quote.id, filter="int"),
+    "updated_at": ListField(Quote.updated_at, filter="daterange"),
+    "created_at": ListField(Quote.created_at, filter="daterange"),
+    "status": ListField(Quote.status, filter="exact"),
+    "customer_name": ListField(coalesced(Quote.customer_name), filter="text"),
+    "created_by": ListField(Quote.created_by, filter="int"),
+}
+
+
+def _filter_quotes(
+    db: Session | AsyncSession,
+    stmt: Select,
+    *,
+    status_filter: str | None = None,
+    search: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> tuple[Select, ColumnElement | None]:
+    """Apply the quote list filters; also returns the search rank column, if any."""
+    rank = None
     if status_filter:
         stmt = stmt.where(Quote.status == status_filter)
     if search:
-        pattern = f"%{search}%"
-        technique_match = (
-            select(QuoteItem.quote_id)
-            .join(Technique, QuoteItem.technique_id == Technique.id)
-            .where(
-                Technique.manufacturer.ilike(pattern)
-                | Technique.model.ilike(pattern)
-                | Technique.series.ilike(pattern)
-            )
-        )
-        stmt = stmt.where(
-            Quote.customer_name.ilike(pattern)
-            | Quote.id.in_(technique_match)
-        )
+        match, rank = search_filter(db, search)
+        stmt = stmt.where(match)
     if date_from:
         stmt = stmt.where(Quote.created_at >= datetime(date_from.year, date_from.month, date_from.day))
     if date_to:
         stmt = stmt.where(Quote.created_at < datetime(date_to.year, date_to.month, date_to.day, 23, 59, 59))
+    return stmt, rank
+
+
+@router.get("", response_model=list[QuoteListItem])
+async def list_quotes(
+    response: Response,
+    status_filter: str | None = Query(None, alias="status"),
+    search: str | None = Query(None),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    query: ListQuery = Depends(list_query),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> list[QuoteListItem]:
+    """Newest first by default; keyset-paginated on (updated_at, id) when ``limit`` is set.
+
+    A ``search`` is a full-text prefix match over customer, comment and
+    technique names; on PostgreSQL results are then ordered by relevance.
+    """
+    stmt, rank = _filter_quotes(
+        db, select(Quote).options(undefer(Quote.items_count)),
+        status_filter=status_filter, search=search, date_from=date_from, date_to=date_to,
+    )
+    fields, default_sort = _LIST_FIELDS, "-updated_at"
+    if rank is not None:
+        fields, default_sort = {**_LIST_FIELDS, "rank": ListField(rank)}, "-rank"
 
-    rows = db.execute(stmt).scalars().all()
+    rows = await paginate_response_async(
+        db, stmt, response,
+        fields=fields, id_column=Quote.id, query=query, default_sort=default_sort,
+    )
     return [
         QuoteListItem(
             id=q.id, created_by=q.created_by, status=q.status,
-            customer_name=q.customer_name, items_count=len(q.items),
+            customer_name=q.customer_name, items_count=q.items_count,
             created_at=q.created_at.isoformat(), updated_at=q.updated_at.isoformat(),
         )
         for q in rows
     ]
 
 
+class ManagerStat(BaseModel):
+    user_id: int
+    login: str
+    count: int
+
+
+class DayStat(BaseModel):
+    day: date
+    count: int
+
+
+class SkuVolumeStat(BaseModel):
+    sku_id: int
+    sku_code: str
+    sku_name: str
+    sku_unit: str
+    total_qty: int
+
+
+class QuoteStatsOut(BaseModel):
+    total: int
+    by_status: dict[str, int]
+    by_manager: list[ManagerStat]
+    by_day: list[DayStat]
+    sku_volume: list[SkuVolumeStat]
+
+
+@router.get("/stats", response_model=QuoteStatsOut)
+def quote_stats(
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    sku_limit: int = Query(20, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+) -> QuoteStatsOut:
+    """Dashboard aggregates read from the rollup tables, never from ``quotes``.
+
+    ``date_from`` / ``date_to`` bound the quote creation day; SKU volume is
+    the all-time total over current result lines, largest first.
+    """
+    n = func.sum(QuoteStatsDaily.quotes_count)
+    scope = []
+    if date_from:
+        scope.append(QuoteStatsDaily.day >= date_from)
+    if date_to:
+        scope.append(QuoteStatsDaily.day <= date_to)
+
+    by_status = {
+        st: int(cnt) for st, cnt in db.execute(
+            select(QuoteStatsDaily.status, n).where(*scope).group_by(QuoteStatsDaily.status)
+        ).all()
+        if cnt
+    }
+    by_manager = [
+        ManagerStat(user_id=uid, login=login, count=int(cnt))
+        for uid, login, cnt in db.execute(
+            select(QuoteStatsDaily.created_by, User.login, n)
+            .join(User, User.id == QuoteStatsDaily.created_by)
+            .where(*scope)
+            .group_by(QuoteStatsDaily.created_by, User.login)
+            .having(n > 0)
+            .order_by(n.desc(), QuoteStatsDaily.created_by)
+        ).all()
+    ]
+    by_day = [
+        DayStat(day=day, count=int(cnt))
+        for day, cnt in db.execute(
+            select(QuoteStatsDaily.day, n)
+            .where(*scope)
+            .group_by(QuoteStatsDaily.day)
+            .having(n > 0)
+            .order_by(QuoteStatsDaily.day)
+        ).all()
+    ]
+    sku_volume = [
+        SkuVolumeStat(sku_id=s.id, sku_code=s.code, sku_name=s.name, sku_unit=s.unit, total_qty=qty)
+        for s, qty in db.execute(
+            select(SKU, SkuVolume.total_qty)
+            .join(SkuVolume, SkuVolume.sku_id == SKU.id)
+            .where(SkuVolume.total_qty > 0)
+            .order_by(SkuVolume.total_qty.desc(), SKU.id)
+            .limit(sku_limit)
+        ).all()
+    ]
+    return QuoteStatsOut(
+        total=sum(by_status.values()),
+        by_status=by_status,
+        by_manager=by_manager,
+        by_day=by_day,
+        sku_volume=sku_volume,
+    )
+
+
+class BulkExportBody(BaseModel):
+    """Either explicit ``quote_ids`` or the same filters as the quote list."""
+
+    quote_ids: list[int] | None = Field(None, min_length=1, max_length=MAX_BULK_QUOTES)
+    status: str | None = None
+    search: str | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    format: Literal["zip", "xlsx"] = "zip"
+
+
+@router.post("/export")
+def export_bulk(body: BulkExportBody, db: Session = Depends(get_db)) -> Response:
+    """Several quotes in one download: a ZIP of per-quote XLSX or one workbook with a sheet each.
+
+    Quotes without result lines are skipped. ZIP entries are rendered in a
+    process pool and streamed as they complete.
+    """
+    if body.quote_ids is not None:
+        ids = body.quote_ids
+    else:
+        stmt, _ = _filter_quotes(
+            db, select(Quote.id),
+            status_filter=body.status, search=body.search,
+            date_from=body.date_from, date_to=body.date_to,
+        )
+        ids = list(db.execute(stmt.limit(MAX_BULK_QUOTES + 1)).scalars())
+        if len(ids) > MAX_BULK_QUOTES:
+            raise HTTPException(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                f"Filter matches more than {MAX_BULK_QUOTES} quotes — narrow it down",
+            )
+
+    refs = export_refs(db, ids)
+    if not refs:
+        raise HTTPException(status.HTTP_409_CONFLICT, "No calculated quotes to export")
+
+    stamp = date.today().strftime("%Y%m%d")
+    if body.format == "xlsx":
+        return StreamingResponse(
+            stream_workbook(build_multi_sheet_workbook(db, refs)),
+            media_type=XLSX_MIME,
+            headers={"Content-Disposition": f'attachment; filename="quotes_{stamp}.xlsx"'},
+        )
+    return StreamingResponse(
+        stream_zip(db.get_bind(), refs),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="quotes_{stamp}.zip"'},
+    )
+
+
 @router.get("/{quote_id}", response_model=QuoteOut)
-def get_quote(quote_id: int, db: Session = Depends(get_db)) -> QuoteOut:
-    q = db.execute(
+async def get_quote(quote_id: int, db: AsyncSession = Depends(get_async_read_db)) -> QuoteOut:
+    q = (await db.execute(
         select(Quote).where(Quote.id == quote_id).options(selectinload(Quote.items))
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
     return _to_out(q)
@@ -207,11 +402,9 @@ def update_quote(
     quote_id: int,
     body: QuoteUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> QuoteOut:
-    q = db.execute(
-        select(Quote).where(Quote.id == quote_id).options(selectinload(Quote.items))
-    ).scalar_one_or_none()
+    q = lock_quote(db, quote_id, selectinload(Quote.items))
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
 
@@ -234,6 +427,10 @@ def update_quote(
         q.zones_json = json.dumps(body.zones, ensure_ascii=False)
 
     if body.items is not None:
+        bump_usage(db, usage_delta(
+            added=[it.technique_id for it in body.items],
+            removed=[it.technique_id for it in q.items],
+        ))
         q.items.clear()
         for it in body.items:
             q.items.append(QuoteItem(
@@ -245,6 +442,8 @@ def update_quote(
                 params_json=it.params_json,
             ))
 
+    db.flush()
+    refresh_search_text(db, [q.id])
     db.commit()
     db.refresh(q)
     return _to_out(q)
@@ -258,6 +457,9 @@ class ResultLineOut(BaseModel):
     sku_unit: str | None = None
     qty: int
     note: str | None
+    availability_status: str | None = None
+    availability_comment: str | None = None
+    availability_as_of: datetime | None = None
 
 
 class CalcResultOut(BaseModel):
@@ -268,7 +470,7 @@ class CalcResultOut(BaseModel):
 
 @router.post("/{quote_id}/calculate", response_model=CalcResultOut)
 def calculate(quote_id: int, db: Session = Depends(get_db)) -> CalcResultOut:
-    q = db.execute(select(Quote).where(Quote.id == quote_id)).scalar_one_or_none()
+    q = lock_quote(db, quote_id)
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
 
@@ -300,12 +502,15 @@ def _enrich_lines(lines: list[QuoteResultLine], db: Session) -> list[ResultLineO
             sku_name=s.name if s else None,
             sku_unit=s.unit if s else None,
             qty=ln.qty, note=ln.note,
+            availability_status=ln.availability_status,
+            availability_comment=ln.availability_comment,
+            availability_as_of=ln.availability_as_of,
         ))
     return result
 
 
 @router.get("/{quote_id}/result", response_model=list[ResultLineOut])
-def get_result_lines(quote_id: int, db: Session = Depends(get_db)) -> list[ResultLineOut]:
+def get_result_lines(quote_id: int, db: Session = Depends(get_read_db)) -> list[ResultLineOut]:
     q = db.execute(select(Quote).where(Quote.id == quote_id)).scalar_one_or_none()
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
@@ -334,9 +539,9 @@ def patch_result_line(
     line_id: int,
     body: ResultLinePatch,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ResultLineOut:
-    q = db.execute(select(Quote).where(Quote.id == quote_id)).scalar_one_or_none()
+    q = lock_quote(db, quote_id)
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
     if q.status in RESULT_FROZEN:
@@ -353,11 +558,16 @@ def patch_result_line(
             raise HTTPException(status.HTTP_403_FORBIDDEN, "Only admin can change qty")
         if body.qty < 1:
             raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "qty must be >= 1")
+        record_result_change(
+            db, q, old_status=q.status, new_status=q.status,
+            removed=[(line.sku_id, line.qty)], added=[(line.sku_id, body.qty)],
+        )
         line.qty = body.qty
 
     if body.note is not _RL_SENTINEL:
         line.note = body.note
 
+    q.result_revision = Quote.result_revision + 1
     db.commit()
     db.refresh(line)
     return _enrich_lines([line], db)[0]
@@ -378,9 +588,9 @@ def change_status(
     quote_id: int,
     body: StatusChange,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["manager", "admin"])),
+    current_user: Principal = Depends(require_role(["manager", "admin"])),
 ) -> StatusOut:
-    q = db.execute(select(Quote).where(Quote.id == quote_id)).scalar_one_or_none()
+    q = lock_quote(db, quote_id)
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
 
@@ -390,25 +600,25 @@ def change_status(
             f"Transition '{q.status}' → '{body.status}' is not allowed for role '{current_user.role}'",
         )
 
+    old_status = q.status
     q.status = body.status
     if body.comment is not None:
         q.comment = body.comment
+        db.flush()
+        refresh_search_text(db, [q.id])
 
     # ТЗ: «На_проверке_склада — автоматически после Согласовано_с_заказчиком»
     if q.status == QuoteStatus.APPROVED:
         q.status = QuoteStatus.WAREHOUSE_CHECK
+    if q.status == QuoteStatus.WAREHOUSE_CHECK:
+        prefill_availability(db, q.id)
 
+    record_status_change(db, q, old_status, q.status)
     db.commit()
     db.refresh(q)
     return StatusOut(id=q.id, status=q.status)
 
 
-class LineAvailability(BaseModel):
-    line_id: int
-    availability_status: Literal["in_stock", "to_order", "absent"]
-    availability_comment: str | None = None
-
-
 class WarehouseConfirmBody(BaseModel):
     decision: str = Field(pattern=r"^(confirmed|rework)$")
     comment: str | None = None
@@ -420,9 +630,9 @@ def warehouse_confirm(
     quote_id: int,
     body: WarehouseConfirmBody,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["warehouse"])),
+    current_user: Principal = Depends(require_role(["warehouse"])),
 ) -> StatusOut:
-    q = db.execute(select(Quote).where(Quote.id == quote_id)).scalar_one_or_none()
+    q = lock_quote(db, quote_id)
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
 
@@ -434,50 +644,74 @@ def warehouse_confirm(
             f"Transition '{q.status}' → '{target}' is not allowed for role '{current_user.role}'",
         )
 
+    lines = load_lines(db, (la.line_id for la in body.lines))
     for la in body.lines:
-        line = db.execute(
-            select(QuoteResultLine).where(
-                QuoteResultLine.id == la.line_id,
-                QuoteResultLine.quote_id == quote_id,
-            )
-        ).scalar_one_or_none()
-        if line is None:
+        ref = lines.get(la.line_id)
+        if ref is None or ref.quote_id != quote_id:
             raise HTTPException(status.HTTP_404_NOT_FOUND, f"Result line {la.line_id} not found")
-        line.availability_status = la.availability_status
-        line.availability_comment = la.availability_comment
+    rows = [(la.line_id, la.availability_status, la.availability_comment) for la in body.lines]
+    set_line_availability(db, rows)
+    remember_sku_availability(db, rows, lines)
 
+    record_status_change(db, q, q.status, target)
     q.status = target
     if body.comment is not None:
         q.comment = body.comment
+        db.flush()
+        refresh_search_text(db, [q.id])
 
     db.commit()
-    db.refresh(q)
-    return StatusOut(id=q.id, status=q.status)
-
+    return StatusOut(id=quote_id, status=target)
 
-XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
-
-@router.post("/{quote_id}/export/xlsx")
+@router.api_route("/{quote_id}/export/xlsx", methods=["GET", "POST"])
 def export_xlsx(
     quote_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ) -> Response:
+    """XLSX of the quote's result lines, cached on disk per calculation run, revision and header.
+
+    GET honours ``If-None-Match`` with 304; POST is kept for older clients.
+    """
     q = db.execute(select(Quote).where(Quote.id == quote_id)).scalar_one_or_none()
     if q is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Quote not found")
 
-    count = db.execute(
-        select(func.count()).select_from(QuoteResultLine).where(QuoteResultLine.quote_id == quote_id)
+    has_lines = db.execute(
+        select(exists().where(QuoteResultLine.quote_id == quote_id))
     ).scalar_one()
-    if count == 0:
+    if not has_lines:
         raise HTTPException(status.HTTP_409_CONFLICT, "Quote has no result lines — calculate first")
 
-    data = xlsx_export(db, quote_id)
+    calc_run_id = db.execute(
+        select(func.max(QuoteCalcRun.id)).where(QuoteCalcRun.quote_id == quote_id)
+    ).scalar_one()
+    key = export_cache.cache_key(quote_id, calc_run_id, q.result_revision, manager_name(db, q), date.today())
+    etag = export_cache.etag_for(key)
+    filename = f"quote_{quote_id}.xlsx"
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.method == "GET" and export_cache.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    disposition = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    cached = export_cache.open_entry(key)
+    if cached is not None:
+        return StreamingResponse(
+            export_cache.iter_file(cached),
+            media_type=XLSX_MIME,
+            headers={**headers, **disposition, "Content-Length": str(os.fstat(cached.fileno()).st_size)},
+        )
+
+    # Rows are read (server-side cursor) and spooled here, while the request's
+    # session is still open; only the archive write happens while streaming.
+    wb = build_workbook(db, quote_id)
 
-    return Response(
-        content=data,
+    return StreamingResponse(
+        export_cache.write_through(key, stream_workbook(wb)),
         media_type=XLSX_MIME,
-        headers={"Content-Disposition": f'attachment; filename="quote_{quote_id}.xlsx"'},
+        headers={**headers, **disposition},
     )
@@ -5,7 +5,7 @@ from pydantic import BaseModel, Field, field_validator
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.deps.rbac import require_role
 from app.models.rule import Rule
 from app.models.technique import Technique
@@ -60,7 +60,7 @@ def _to_out(r: Rule) -> RuleOut:
 @router.get("", response_model=list[RuleOut])
 def list_rules(
     technique_id: int = Query(..., description="Filter by technique"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> list[RuleOut]:
     rows = db.execute(
         select(Rule)
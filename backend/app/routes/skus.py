@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db
 from app.deps.auth import get_current_user
+from app.deps.pagination import list_query, paginate_response_async
 from app.deps.rbac import require_role
 from app.models.sku import SKU
+from app.repo.pagination import ListField, ListQuery, coalesced
 
 router = APIRouter(prefix="/skus", tags=["skus"])
 
@@ -46,11 +49,26 @@ def _to_out(s: SKU) -> SKUOut:
     )
 
 
+_LIST_FIELDS = {
+    "id": ListField(SKU.id, filter="int"),
+    "code": ListField(SKU.code, filter="text"),
+    "name": ListField(SKU.name, filter="text"),
+    "unit": ListField(SKU.unit, filter="text"),
+    "active": ListField(SKU.active, filter="bool"),
+    "version_tag": ListField(coalesced(SKU.version_tag), filter="text"),
+}
+
+
 @router.get("", response_model=list[SKUOut], dependencies=[Depends(get_current_user)])
-def list_skus(db: Session = Depends(get_db)) -> list[SKUOut]:
-    rows = db.execute(
-        select(SKU).where(SKU.active.is_(True)).order_by(SKU.code)
-    ).scalars().all()
+async def list_skus(
+    response: Response,
+    query: ListQuery = Depends(list_query),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> list[SKUOut]:
+    rows = await paginate_response_async(
+        db, select(SKU).where(SKU.active.is_(True)), response,
+        fields=_LIST_FIELDS, id_column=SKU.id, query=query, default_sort="code",
+    )
     return [_to_out(s) for s in rows]
 
 
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
+from app.deps.pagination import list_query, paginate_response
 from app.deps.rbac import require_role
 from app.models.technique import Technique
 from app.models.technique_alias import TechniqueAlias
+from app.repo.pagination import ListField, ListQuery, coalesced
 
 router = APIRouter(
     prefix="/technique-aliases",
@@ -48,11 +50,24 @@ def _get_or_404(db: Session, alias_id: int) -> TechniqueAlias:
     return alias
 
 
+_LIST_FIELDS = {
+    "id": ListField(TechniqueAlias.id, filter="int"),
+    "alias_text": ListField(TechniqueAlias.alias_text, filter="text"),
+    "technique_id": ListField(TechniqueAlias.technique_id, filter="int"),
+    "note": ListField(coalesced(TechniqueAlias.note), filter="text"),
+}
+
+
 @router.get("", response_model=list[AliasOut])
-def list_aliases(db: Session = Depends(get_db)) -> list[AliasOut]:
-    rows = db.execute(
-        select(TechniqueAlias).order_by(TechniqueAlias.id)
-    ).scalars().all()
+def list_aliases(
+    response: Response,
+    query: ListQuery = Depends(list_query),
+    db: Session = Depends(get_db),
+) -> list[AliasOut]:
+    rows = paginate_response(
+        db, select(TechniqueAlias), response,
+        fields=_LIST_FIELDS, id_column=TechniqueAlias.id, query=query, default_sort="id",
+    )
     return [_to_out(a) for a in rows]
 
 
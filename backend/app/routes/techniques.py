@@ -1,19 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db, get_read_db
 from app.deps.auth import get_current_user
+from app.deps.pagination import list_query, paginate_response_async
 from app.deps.rbac import require_role
 from app.models.engine_option import EngineOption
 from app.models.technique import Technique
+from app.repo.pagination import ListField, ListQuery, coalesced
 from app.repo.technique_repo import (
     create_technique,
     get_technique_by_id,
     patch_technique,
     search_techniques,
+    suggest_techniques,
 )
+from app.services.quote_search import refresh_technique_quotes
 
 router = APIRouter(
     prefix="/techniques",
@@ -87,19 +92,52 @@ def _engine_to_out(e: EngineOption) -> EngineOptionOut:
     )
 
 
+_LIST_FIELDS = {
+    "id": ListField(Technique.id, filter="int"),
+    "manufacturer": ListField(Technique.manufacturer, filter="text"),
+    "model": ListField(Technique.model, filter="text"),
+    "series": ListField(coalesced(Technique.series), filter="text"),
+    "active": ListField(Technique.active, filter="bool"),
+}
+
+
 @router.get("", response_model=list[TechniqueOut])
-def list_techniques(
+async def list_techniques(
+    response: Response,
     search: str | None = Query(None, min_length=1, description="Поиск по модели/марке/alias"),
     manufacturer: str | None = Query(None),
-    db: Session = Depends(get_db),
+    query: ListQuery = Depends(list_query),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> list[TechniqueOut]:
+    """Without ``search`` — keyset-paginated catalog; with it — top-``limit`` ranked matches."""
+    if search:
+        rows = await db.run_sync(
+            lambda sync_db: search_techniques(sync_db, search=search, manufacturer=manufacturer, limit=query.limit)
+        )
+    else:
+        stmt = select(Technique).where(Technique.active.is_(True))
+        if manufacturer:
+            stmt = stmt.where(Technique.manufacturer.ilike(manufacturer))
+        rows = await paginate_response_async(
+            db, stmt, response,
+            fields=_LIST_FIELDS, id_column=Technique.id, query=query, default_sort="manufacturer",
+        )
+    return [_to_out(t) for t in rows]
+
+
+@router.get("/suggest", response_model=list[TechniqueOut])
+async def suggest(
+    q: str = Query(..., min_length=1, description="Начало марки / модели / alias"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_read_db),
 ) -> list[TechniqueOut]:
-    rows = search_techniques(db, search=search, manufacturer=manufacturer)
+    rows = await db.run_sync(lambda sync_db: suggest_techniques(sync_db, q, limit=limit))
     return [_to_out(t) for t in rows]
 
 
 @router.get("/{technique_id}", response_model=TechniqueOut)
-def get_technique(technique_id: int, db: Session = Depends(get_db)) -> TechniqueOut:
-    t = get_technique_by_id(db, technique_id)
+async def get_technique(technique_id: int, db: AsyncSession = Depends(get_async_read_db)) -> TechniqueOut:
+    t = await db.run_sync(get_technique_by_id, technique_id)
     if t is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Technique not found")
     return _to_out(t)
@@ -132,6 +170,8 @@ def patch_technique_endpoint(
         series=body.series if body.series is not _SENTINEL else ...,
         meta=body.meta if body.meta is not _SENTINEL else ...,
         active=body.active,
+        # technique names are part of quotes.search_text
+        on_rename=refresh_technique_quotes,
     )
     if t is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Technique not found")
@@ -139,7 +179,7 @@ def patch_technique_endpoint(
 
 
 @router.get("/{technique_id}/engines", response_model=list[EngineOptionOut])
-def list_engines(technique_id: int, db: Session = Depends(get_db)) -> list[EngineOptionOut]:
+def list_engines(technique_id: int, db: Session = Depends(get_read_db)) -> list[EngineOptionOut]:
     _ensure_technique(db, technique_id)
     rows = db.execute(
         select(EngineOption)
@@ -0,0 +1,120 @@
+from collections import defaultdict
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db, get_read_db
+from app.deps.rbac import require_role
+from app.models.quote import Quote
+from app.models.quote_stats import SkuDemand
+from app.models.sku import SKU
+from app.services.availability import LineAvailability, load_lines, remember_sku_availability, set_line_availability
+from app.services.quote_status import QuoteStatus
+
+router = APIRouter(
+    prefix="/warehouse",
+    tags=["warehouse"],
+    dependencies=[Depends(require_role(["warehouse", "admin"]))],
+)
+
+DEMAND_STATUSES = [QuoteStatus.WAREHOUSE_CHECK.value, QuoteStatus.CONFIRMED.value]
+
+
+class SkuDemandOut(BaseModel):
+    sku_id: int
+    sku_code: str | None
+    sku_name: str | None
+    sku_unit: str | None
+    total_qty: int
+    by_status: dict[str, int]
+
+
+@router.get("/demand", response_model=list[SkuDemandOut])
+def sku_demand(
+    status_filter: list[str] = Query(DEMAND_STATUSES, alias="status"),
+    period_from: date | None = Query(None),
+    period_to: date | None = Query(None),
+    db: Session = Depends(get_read_db),
+) -> list[SkuDemandOut]:
+    """Total result line qty per SKU across quotes in the given statuses.
+
+    Reads the sku_demand rollup only. Periods are quote creation months;
+    ``period_from`` / ``period_to`` may be any day inside the month.
+    """
+    qty = func.sum(SkuDemand.total_qty)
+    stmt = (
+        select(SkuDemand.sku_id, SkuDemand.status, qty)
+        .where(SkuDemand.status.in_(status_filter))
+        .group_by(SkuDemand.sku_id, SkuDemand.status)
+        .having(qty > 0)
+    )
+    if period_from:
+        stmt = stmt.where(SkuDemand.period >= period_from.replace(day=1))
+    if period_to:
+        stmt = stmt.where(SkuDemand.period <= period_to.replace(day=1))
+
+    by_sku: dict[int, dict[str, int]] = defaultdict(dict)
+    for sku_id, st, n in db.execute(stmt).all():
+        by_sku[sku_id][st] = int(n)
+    if not by_sku:
+        return []
+
+    skus = {s.id: s for s in db.execute(select(SKU).where(SKU.id.in_(by_sku))).scalars().all()}
+    result = []
+    for sku_id, per_status in by_sku.items():
+        s = skus.get(sku_id)
+        result.append(SkuDemandOut(
+            sku_id=sku_id,
+            sku_code=s.code if s else None,
+            sku_name=s.name if s else None,
+            sku_unit=s.unit if s else None,
+            total_qty=sum(per_status.values()),
+            by_status=per_status,
+        ))
+    result.sort(key=lambda r: (-r.total_qty, r.sku_id))
+    return result
+
+
+class BulkAvailabilityBody(BaseModel):
+    lines: list[LineAvailability] = Field(min_length=1, max_length=5000)
+
+
+class BulkAvailabilityOut(BaseModel):
+    updated: int
+    quote_ids: list[int]
+
+
+@router.post("/availability", response_model=BulkAvailabilityOut)
+def bulk_availability(body: BulkAvailabilityBody, db: Session = Depends(get_db)) -> BulkAvailabilityOut:
+    """Set availability on result lines of any number of quotes under warehouse check.
+
+    All lines are validated with two ``IN`` queries and written with one
+    UPDATE; nothing is written if any line is unknown or belongs to a quote
+    outside ``warehouse_check``. Quote statuses are left unchanged.
+    """
+    lines = load_lines(db, (la.line_id for la in body.lines))
+    missing = sorted({la.line_id for la in body.lines} - lines.keys())
+    if missing:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Result lines not found: {missing}")
+
+    quote_ids = sorted({ref.quote_id for ref in lines.values()})
+    # Row locks in id order (no deadlock between overlapping batches) keep a
+    # concurrent warehouse confirmation from moving a quote on mid-write.
+    statuses = db.execute(
+        select(Quote.id, Quote.status).where(Quote.id.in_(quote_ids)).order_by(Quote.id).with_for_update()
+    ).all()
+    locked = [qid for qid, st in statuses if st != QuoteStatus.WAREHOUSE_CHECK]
+    if locked:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            f"Quotes not in '{QuoteStatus.WAREHOUSE_CHECK}': {sorted(locked)}",
+        )
+
+    rows = [(la.line_id, la.availability_status, la.availability_comment) for la in body.lines]
+    updated = set_line_availability(db, rows)
+    remember_sku_availability(db, rows, lines)
+    db.commit()
+    return BulkAvailabilityOut(updated=updated, quote_ids=quote_ids)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db
 from app.deps.auth import get_current_user
 from app.deps.rbac import require_role
 from app.models.zone import Zone
@@ -33,10 +34,10 @@ def _to_out(z: Zone) -> ZoneOut:
 
 
 @router.get("", response_model=list[ZoneOut], dependencies=[Depends(get_current_user)])
-def list_zones(db: Session = Depends(get_db)) -> list[ZoneOut]:
-    rows = db.execute(
+async def list_zones(db: AsyncSession = Depends(get_async_read_db)) -> list[ZoneOut]:
+    rows = (await db.execute(
         select(Zone).where(Zone.active.is_(True)).order_by(Zone.code)
-    ).scalars().all()
+    )).scalars().all()
     return [_to_out(z) for z in rows]
 
 
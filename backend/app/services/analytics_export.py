@@ -0,0 +1,172 @@
+"""
+Flat result-line export for analytics (CSV or Parquet).
+
+Rows are read in ``yield_per`` partitions (a server-side cursor on
+PostgreSQL) and each partition is encoded and handed out before the next is
+fetched: a CSV chunk, or one Parquet row group.
+"""
+
+import csv
+import io
+from collections.abc import Iterator, Sequence
+from datetime import date, datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote, QuoteItem
+from app.models.quote_result_line import QuoteResultLine
+from app.models.sku import SKU
+from app.models.technique import Technique
+from app.models.user import User
+
+BATCH_ROWS = 10_000
+
+COLUMNS = [
+    "quote_id", "quote_status", "quote_created_at", "quote_updated_at",
+    "manager_id", "manager_login", "customer_name",
+    "line_id", "sku_id", "sku_code", "sku_name", "sku_unit", "qty", "note",
+    "availability_status", "availability_as_of", "techniques",
+]
+
+
+def result_lines_stmt(
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    statuses: Sequence[str] = (),
+) -> Select:
+    """All result lines with quote, manager and SKU columns, in ``COLUMNS`` order minus ``techniques``."""
+    stmt = (
+        select(
+            Quote.id, Quote.status, Quote.created_at, Quote.updated_at,
+            Quote.created_by, User.login, Quote.customer_name,
+            QuoteResultLine.id, QuoteResultLine.sku_id, SKU.code, SKU.name, SKU.unit,
+            QuoteResultLine.qty, QuoteResultLine.note,
+            QuoteResultLine.availability_status, QuoteResultLine.availability_as_of,
+        )
+        .join(Quote, Quote.id == QuoteResultLine.quote_id)
+        .outerjoin(User, User.id == Quote.created_by)
+        .outerjoin(SKU, SKU.id == QuoteResultLine.sku_id)
+        .order_by(QuoteResultLine.quote_id, QuoteResultLine.id)
+    )
+    if date_from:
+        stmt = stmt.where(Quote.created_at >= datetime(date_from.year, date_from.month, date_from.day))
+    if date_to:
+        stmt = stmt.where(Quote.created_at < datetime(date_to.year, date_to.month, date_to.day) + timedelta(days=1))
+    if statuses:
+        stmt = stmt.where(Quote.status.in_(list(statuses)))
+    return stmt
+
+
+def _technique_names(db: Session, quote_ids: set[int]) -> dict[int, str]:
+    """Distinct "manufacturer model" of each quote's items, one query per batch."""
+    label = Technique.manufacturer + " " + Technique.model
+    rows = db.execute(
+        select(QuoteItem.quote_id, label)
+        .join(Technique, Technique.id == QuoteItem.technique_id)
+        .where(QuoteItem.quote_id.in_(quote_ids))
+        .group_by(QuoteItem.quote_id, label)
+        .order_by(QuoteItem.quote_id, label)
+    ).all()
+    names: dict[int, list[str]] = {}
+    for quote_id, name in rows:
+        names.setdefault(quote_id, []).append(name)
+    return {qid: "; ".join(v) for qid, v in names.items()}
+
+
+def iter_batches(bind: Engine, stmt: Select) -> Iterator[list[tuple]]:
+    """Rows in ``COLUMNS`` order, ``BATCH_ROWS`` at a time.
+
+    Runs on a session of its own, closed when the stream ends: the response
+    body is consumed after the request's session is gone.
+    """
+    with Session(bind) as db:
+        result = db.execute(stmt.execution_options(yield_per=BATCH_ROWS))
+        for part in result.partitions():
+            techniques = _technique_names(db, {row[0] for row in part})
+            yield [(*row, techniques.get(row[0], "")) for row in part]
+
+
+def _csv_value(v: object) -> object:
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return "" if v is None else v
+
+
+def stream_csv(batches: Iterator[list[tuple]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    yield buf.getvalue().encode("utf-8")
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in batch)
+        yield buf.getvalue().encode("utf-8")
+
+
+class _DrainSink:
+    """Write-only file object for ParquetWriter; bytes are drained after each row group."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._buf += data
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def stream_parquet(batches: Iterator[list[tuple]]) -> Iterator[bytes]:
+    schema = pa.schema([
+        ("quote_id", pa.int64()),
+        ("quote_status", pa.string()),
+        ("quote_created_at", pa.timestamp("us", tz="UTC")),
+        ("quote_updated_at", pa.timestamp("us", tz="UTC")),
+        ("manager_id", pa.int64()),
+        ("manager_login", pa.string()),
+        ("customer_name", pa.string()),
+        ("line_id", pa.int64()),
+        ("sku_id", pa.int64()),
+        ("sku_code", pa.string()),
+        ("sku_name", pa.string()),
+        ("sku_unit", pa.string()),
+        ("qty", pa.int64()),
+        ("note", pa.string()),
+        ("availability_status", pa.string()),
+        ("availability_as_of", pa.timestamp("us", tz="UTC")),
+        ("techniques", pa.string()),
+    ])
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            columns = list(zip(*batch)) if batch else [[] for _ in COLUMNS]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
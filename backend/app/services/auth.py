@@ -1,22 +1,26 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+
+from app.services.metrics import Counter
+from app.services.password_hashing import hash_password, verify_password  # noqa: F401  (re-exported)
 
 JWT_SECRET: str = os.environ.get("JWT_SECRET", "change_me_to_random_secret")
 JWT_ALGORITHM: str = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
-
-_pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
+ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+# Verified tokens kept per process (0 disables the cache).
+JWT_CACHE_SIZE: int = int(os.environ.get("JWT_CACHE_SIZE", "4096"))
 
-def hash_password(plain: str) -> str:
-    return _pwd_ctx.hash(plain)
+JWT_CACHE = Counter("jwt_decode_cache_total", "Access-token decodes by cache outcome.", ["result"])
 
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return _pwd_ctx.verify(plain, hashed)
+# sha256(token) -> (claims, exp as epoch seconds)
+_verified: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+_verified_lock = threading.Lock()
 
 
 def create_access_token(
@@ -32,7 +36,45 @@ def create_access_token(
 
 
 def decode_access_token(token: str) -> dict | None:
+    """Verified claims of ``token``, or ``None`` if it is invalid or expired.
+
+    Successfully verified tokens are remembered (LRU, keyed by their SHA-256)
+    until their ``exp``, so the same token is not re-verified on every request.
+    """
+    if JWT_CACHE_SIZE <= 0:
+        return _verify(token)
+
+    key = hashlib.sha256(token.encode()).digest()
+    with _verified_lock:
+        entry = _verified.get(key)
+        if entry is not None:
+            claims, exp = entry
+            if exp > time.time():
+                _verified.move_to_end(key)
+                JWT_CACHE.inc(result="hit")
+                return dict(claims)
+            del _verified[key]
+            JWT_CACHE.inc(result="expired")
+            return None
+
+    JWT_CACHE.inc(result="miss")
+    claims = _verify(token)
+    if claims is None or not isinstance(claims.get("exp"), (int, float)):
+        return claims
+    with _verified_lock:
+        _verified[key] = (claims, float(claims["exp"]))
+        while len(_verified) > JWT_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return dict(claims)
+
+
+def _verify(token: str) -> dict | None:
     try:
         return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except JWTError:
         return None
+
+
+def clear_token_cache() -> None:
+    with _verified_lock:
+        _verified.clear()
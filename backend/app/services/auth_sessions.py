@@ -0,0 +1,137 @@
+"""
+Login sessions and rotating refresh tokens.
+
+A refresh token is ``<session id>.<secret>``; only the SHA-256 of the
+current secret is stored. Each refresh replaces the secret, so a token can
+be used once. Presenting an already rotated token means it was copied, and
+the whole session is revoked, except for the token rotated just before,
+which stays usable for ``REFRESH_REUSE_GRACE_SECONDS`` so that two tabs
+refreshing at the same moment do not sign the user out. Access tokens carry the session id as ``sid``,
+which lets logout and revocation cut them off via ``app.services.revocation``.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.auth_session import AuthSession
+from app.services import revocation
+
+REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+REFRESH_REUSE_GRACE_SECONDS: int = int(os.environ.get("REFRESH_REUSE_GRACE_SECONDS", "30"))
+
+
+class RefreshRejected(Exception):
+    pass
+
+
+def _hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def open_session(db: Session, user_id: int) -> tuple[AuthSession, str]:
+    """New session for ``user_id``; returns it with its first raw refresh token. Does not commit."""
+    secret = secrets.token_urlsafe(32)
+    session = AuthSession(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        refresh_hash=_hash_secret(secret),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(session)
+    db.flush()
+    return session, f"{session.id}.{secret}"
+
+
+def parse_session_id(raw_token: str) -> str | None:
+    sid, sep, _ = raw_token.partition(".")
+    return sid if sep and sid else None
+
+
+def _in_grace(session: AuthSession, secret_hash: str) -> bool:
+    """``secret_hash`` is the token rotated away less than the grace window ago."""
+    return (
+        session.prev_refresh_hash is not None
+        and session.rotated_at is not None
+        and hmac.compare_digest(session.prev_refresh_hash, secret_hash)
+        and datetime.now(timezone.utc) - _aware(session.rotated_at) <= timedelta(seconds=REFRESH_REUSE_GRACE_SECONDS)
+    )
+
+
+def rotate(db: Session, raw_token: str) -> tuple[AuthSession, str | None]:
+    """Swap a refresh token for a new one of the same session. Does not commit.
+
+    The session row is locked for the rest of the transaction, so concurrent
+    refreshes are serialised. The token rotated just before is accepted
+    within the grace window without rotating again; it returns ``None`` as
+    the new token and the client keeps the one the other request got.
+
+    Raises ``RefreshRejected`` for unknown, expired or revoked sessions. Any
+    older token revokes its session (flushed, so the caller should still
+    commit before responding).
+    """
+    sid, _, secret = raw_token.partition(".")
+    session = db.get(AuthSession, sid, with_for_update=True) if sid and secret else None
+    if session is None or session.revoked_at is not None:
+        raise RefreshRejected("Invalid refresh token")
+    if _aware(session.expires_at) <= datetime.now(timezone.utc):
+        raise RefreshRejected("Refresh token expired")
+    presented = _hash_secret(secret)
+    if not hmac.compare_digest(session.refresh_hash, presented):
+        if _in_grace(session, presented):
+            return session, None
+        revoke(db, sid)
+        raise RefreshRejected("Refresh token reuse detected")
+
+    new_secret = secrets.token_urlsafe(32)
+    session.prev_refresh_hash = session.refresh_hash
+    session.refresh_hash = _hash_secret(new_secret)
+    session.rotated_at = datetime.now(timezone.utc)
+    db.flush()
+    return session, f"{session.id}.{new_secret}"
+
+
+def session_for_token(db: Session, raw_token: str) -> AuthSession | None:
+    """The live session whose current refresh secret (or grace-window predecessor) is in ``raw_token``."""
+    sid, _, secret = raw_token.partition(".")
+    session = db.get(AuthSession, sid) if sid and secret else None
+    if session is None or session.revoked_at is not None:
+        return None
+    presented = _hash_secret(secret)
+    if hmac.compare_digest(session.refresh_hash, presented) or _in_grace(session, presented):
+        return session
+    return None
+
+
+def revoke(db: Session, sid: str) -> None:
+    """Revoke one session. Does not commit."""
+    db.execute(
+        update(AuthSession)
+        .where(AuthSession.id == sid, AuthSession.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    revocation.mark_revoked(sid)
+
+
+def revoke_user_sessions(db: Session, user_id: int, *, keep: str | None = None) -> None:
+    """Revoke every live session of ``user_id`` except ``keep``. Does not commit."""
+    stmt = (
+        update(AuthSession)
+        .where(AuthSession.user_id == user_id, AuthSession.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+        .returning(AuthSession.id)
+    )
+    if keep is not None:
+        stmt = stmt.where(AuthSession.id != keep)
+    for sid in db.execute(stmt).scalars().all():
+        revocation.mark_revoked(sid)
@@ -0,0 +1,142 @@
+"""
+Set-based writes of warehouse availability on quote result lines.
+
+Both the per-quote warehouse confirmation and the multi-quote bulk endpoint
+validate lines with one ``IN`` query and write them with one UPDATE,
+whatever the number of lines. What the warehouse reports is also kept per
+SKU in sku_availability, and lines of quotes entering warehouse_check are
+prefilled from it so the check becomes a confirmation pass.
+"""
+
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timezone
+from typing import Literal, NamedTuple
+
+from pydantic import BaseModel
+from sqlalchemy import Integer, String, Text, column, func, select, update, values
+from sqlalchemy.orm import Session
+
+from app.db.dialect import is_postgres, upsert_insert
+from app.models.quote_result_line import QuoteResultLine
+from app.models.sku_availability import SkuAvailability
+
+# (line_id, availability_status, availability_comment)
+AvailabilityRow = tuple[int, str, str | None]
+
+
+class LineAvailability(BaseModel):
+    """One line of a warehouse answer, as both warehouse endpoints accept it."""
+
+    line_id: int
+    availability_status: Literal["in_stock", "to_order", "absent"]
+    availability_comment: str | None = None
+
+
+class LineRef(NamedTuple):
+    quote_id: int
+    sku_id: int
+
+
+def load_lines(db: Session, line_ids: Iterable[int]) -> dict[int, LineRef]:
+    """Map each existing result line id to its quote and SKU; unknown ids are absent."""
+    ids = set(line_ids)
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(QuoteResultLine.id, QuoteResultLine.quote_id, QuoteResultLine.sku_id)
+        .where(QuoteResultLine.id.in_(ids))
+    ).all()
+    return {line_id: LineRef(quote_id, sku_id) for line_id, quote_id, sku_id in rows}
+
+
+def set_line_availability(db: Session, rows: Sequence[AvailabilityRow]) -> int:
+    """Write availability for many lines in one statement. Does not commit.
+
+    On PostgreSQL this is ``UPDATE ... FROM (VALUES ...)``; other dialects
+    get an ORM bulk UPDATE by primary key (a single executemany). Later
+    rows win for duplicate line ids. Returns the number of lines written.
+    """
+    latest = {line_id: (status, comment) for line_id, status, comment in rows}
+    if not latest:
+        return 0
+    now = datetime.now(timezone.utc)
+
+    if is_postgres(db):
+        v = values(
+            column("id", Integer), column("status", String), column("comment", Text),
+            name="v",
+        ).data([(line_id, st, cm) for line_id, (st, cm) in sorted(latest.items())])
+        db.execute(
+            update(QuoteResultLine)
+            .where(QuoteResultLine.id == v.c.id)
+            .values(
+                availability_status=v.c.status,
+                availability_comment=v.c.comment,
+                availability_as_of=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.execute(
+            update(QuoteResultLine),
+            [
+                {"id": line_id, "availability_status": st, "availability_comment": cm, "availability_as_of": now}
+                for line_id, (st, cm) in sorted(latest.items())
+            ],
+        )
+    return len(latest)
+
+
+def remember_sku_availability(
+    db: Session,
+    rows: Sequence[AvailabilityRow],
+    lines: dict[int, LineRef],
+) -> None:
+    """Record the reported availability as the latest known state of each SKU. Does not commit.
+
+    ``lines`` is the ``load_lines`` result for the same line ids; the last
+    row per SKU wins.
+    """
+    latest = {
+        lines[line_id].sku_id: (status, comment)
+        for line_id, status, comment in rows
+        if line_id in lines
+    }
+    if not latest:
+        return
+    stmt = upsert_insert(db, SkuAvailability).values([
+        {"sku_id": sku_id, "availability_status": st, "availability_comment": cm}
+        for sku_id, (st, cm) in sorted(latest.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SkuAvailability.sku_id],
+        set_={
+            "availability_status": stmt.excluded.availability_status,
+            "availability_comment": stmt.excluded.availability_comment,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def prefill_availability(db: Session, quote_id: int) -> int:
+    """Copy the last known SKU availability onto a quote's unset lines in one UPDATE.
+
+    ``availability_as_of`` carries the SKU state's timestamp so the UI can
+    flag stale values. Does not commit; returns the number of lines filled.
+    """
+    result = db.execute(
+        update(QuoteResultLine)
+        .where(
+            QuoteResultLine.quote_id == quote_id,
+            QuoteResultLine.availability_status.is_(None),
+            QuoteResultLine.sku_id == SkuAvailability.sku_id,
+        )
+        .values(
+            availability_status=SkuAvailability.availability_status,
+            availability_comment=SkuAvailability.availability_comment,
+            availability_as_of=SkuAvailability.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,199 @@
+"""
+Multi-quote export: a ZIP of per-quote workbooks or one multi-sheet workbook.
+
+Result lines are read here in batches of quotes (one ``IN`` query each) and
+the CPU-bound openpyxl rendering of each quote runs in a process pool.
+Finished files are appended to the ZIP and handed to the client as soon as
+they complete, with at most ``2 * EXPORT_WORKERS`` quotes in flight so
+memory stays bounded however many quotes are requested. Per-quote files go
+through the same disk cache as single exports.
+"""
+
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections.abc import Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import groupby
+
+from openpyxl import Workbook
+from sqlalchemy import exists, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote
+from app.models.quote_calc_run import QuoteCalcRun
+from app.models.quote_result_line import QuoteResultLine
+from app.models.user import User
+from app.services import export_cache
+from app.services.xlsx_export import ExportRow, render_quote_xlsx, result_rows_stmt, write_quote_sheet
+
+EXPORT_WORKERS: int = int(os.environ.get("EXPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_BULK_QUOTES = 1000
+LOAD_BATCH = 50
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> Executor | None:
+    """Shared spawn-based pool, created on first use; ``None`` renders in-thread."""
+    global _pool
+    if EXPORT_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+@dataclass(frozen=True)
+class QuoteExportRef:
+    quote_id: int
+    manager: str
+    cache_key: str
+
+
+def export_refs(db: Session, quote_ids: Sequence[int]) -> list[QuoteExportRef]:
+    """Exportable quotes (those with result lines) among ``quote_ids``, by id, in one query."""
+    if not quote_ids:
+        return []
+    last_run = (
+        select(func.max(QuoteCalcRun.id))
+        .where(QuoteCalcRun.quote_id == Quote.id)
+        .correlate(Quote)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(Quote.id, Quote.created_by, User.login, Quote.result_revision, last_run)
+        .outerjoin(User, User.id == Quote.created_by)
+        .where(
+            Quote.id.in_(list(quote_ids)),
+            exists().where(QuoteResultLine.quote_id == Quote.id),
+        )
+        .order_by(Quote.id)
+    ).all()
+    today = date.today()
+    refs = []
+    for qid, created_by, login, revision, run_id in rows:
+        manager = login or str(created_by)
+        refs.append(QuoteExportRef(
+            quote_id=qid,
+            manager=manager,
+            cache_key=export_cache.cache_key(qid, run_id, revision, manager, today),
+        ))
+    return refs
+
+
+def _load_rows(db: Session, refs: Sequence[QuoteExportRef]) -> dict[int, list[ExportRow]]:
+    rows = db.execute(result_rows_stmt(r.quote_id for r in refs)).all()
+    return {qid: [tuple(r[1:]) for r in grp] for qid, grp in groupby(rows, key=lambda r: r[0])}
+
+
+class _ZipSink:
+    """Unseekable target for ZipFile whose written bytes are drained after each entry."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buf += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def stream_zip(bind: Engine, refs: Sequence[QuoteExportRef]) -> Iterator[bytes]:
+    """ZIP of ``quote_<id>.xlsx`` entries, yielded entry by entry in completion order.
+
+    The body outlives the request's session, so rows are loaded through a
+    session of its own on ``bind``, closed when the stream ends.
+    """
+    db = Session(bind)
+    pool = _executor()
+    sink = _ZipSink()
+    zf = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+    stamp = datetime.now().timetuple()[:6]
+    in_flight: dict[Future, QuoteExportRef] = {}
+    max_in_flight = 2 * max(EXPORT_WORKERS, 1)
+
+    def add(ref: QuoteExportRef, data: bytes) -> bytes:
+        zf.writestr(zipfile.ZipInfo(f"quote_{ref.quote_id}.xlsx", stamp), data)
+        return sink.drain()
+
+    def collect(block_until: int) -> Iterator[bytes]:
+        while len(in_flight) > block_until:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                ref = in_flight.pop(fut)
+                data = fut.result()
+                export_cache.store(ref.cache_key, data)
+                yield add(ref, data)
+
+    try:
+        for start in range(0, len(refs), LOAD_BATCH):
+            batch = refs[start:start + LOAD_BATCH]
+            misses = []
+            for ref in batch:
+                cached = export_cache.lookup(ref.cache_key)
+                if cached is not None:
+                    try:
+                        data = cached.read_bytes()
+                    except FileNotFoundError:
+                        pass  # evicted since the lookup: render it again
+                    else:
+                        yield add(ref, data)
+                        continue
+                misses.append(ref)
+            if not misses:
+                continue
+            rows = _load_rows(db, misses)
+            for ref in misses:
+                args = (ref.quote_id, ref.manager, rows.get(ref.quote_id, []))
+                if pool is None:
+                    data = render_quote_xlsx(*args)
+                    export_cache.store(ref.cache_key, data)
+                    yield add(ref, data)
+                    continue
+                in_flight[pool.submit(render_quote_xlsx, *args)] = ref
+                yield from collect(max_in_flight - 1)
+        yield from collect(0)
+        zf.close()
+        yield sink.drain()
+    finally:
+        for fut in in_flight:
+            fut.cancel()
+        db.close()
+        export_cache.evict()
+
+
+def build_multi_sheet_workbook(db: Session, refs: Sequence[QuoteExportRef]) -> Workbook:
+    """One write-only workbook with a sheet per quote (rendered in this thread)."""
+    wb = Workbook(write_only=True)
+    for start in range(0, len(refs), LOAD_BATCH):
+        batch = refs[start:start + LOAD_BATCH]
+        rows = _load_rows(db, batch)
+        for ref in batch:
+            ws = wb.create_sheet(f"КП {ref.quote_id}")
+            write_quote_sheet(ws, ref.quote_id, ref.manager, rows.get(ref.quote_id, []))
+    return wb
@@ -10,7 +10,7 @@ from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import Session, selectinload
 
 from app.models.engine_option import EngineOption
@@ -18,6 +18,8 @@ from app.models.quote import Quote, QuoteItem
 from app.models.quote_calc_run import QuoteCalcRun
 from app.models.quote_result_line import QuoteResultLine
 from app.models.rule import Rule
+from app.services import tracing
+from app.services.quote_stats import lock_quote, record_result_change
 from app.services.quote_status import QuoteStatus
 
 logger = logging.getLogger(__name__)
@@ -34,18 +36,23 @@ class DedupedItem:
     params: dict
 
 
+def _engine_names(db: Session, option_ids: set[int]) -> dict[int, str]:
+    if not option_ids:
+        return {}
+    return dict(db.execute(
+        select(EngineOption.id, EngineOption.engine_name).where(EngineOption.id.in_(option_ids))
+    ).all())
+
+
 def _dedup_items(items: list[QuoteItem], db: Session) -> list[DedupedItem]:
     """Group identical items by (technique_id, engine_option_id, engine_text, year, params_json), sum qty."""
     buckets: dict[tuple, DedupedItem] = {}
-    engine_cache: dict[int, str] = {}
+    engine_names = _engine_names(db, {it.engine_option_id for it in items if it.engine_option_id})
 
     for it in items:
         engine_name: str | None = None
         if it.engine_option_id:
-            if it.engine_option_id not in engine_cache:
-                eo = db.get(EngineOption, it.engine_option_id)
-                engine_cache[it.engine_option_id] = eo.engine_name if eo else ""
-            engine_name = engine_cache[it.engine_option_id]
+            engine_name = engine_names.get(it.engine_option_id, "")
 
         key = (it.technique_id, it.engine_option_id, it.engine_text, it.year, it.params_json or "")
         if key in buckets:
@@ -104,73 +111,93 @@ def _apply_actions(actions: list[dict], item_qty: int, sku_totals: dict[int, int
         sku_totals[sku_id] += int(multiplier * item_qty)
 
 
+@tracing.traced("calculate_quote")
 def calculate_quote(db: Session, quote_id: int) -> list[QuoteResultLine]:
-    quote = db.execute(
-        select(Quote).where(Quote.id == quote_id).options(selectinload(Quote.items))
-    ).scalar_one_or_none()
-    if quote is None:
-        raise ValueError(f"Quote {quote_id} not found")
-
-    selected_zones: set[str] = set(json.loads(quote.zones_json)) if quote.zones_json else set()
-    deduped = _dedup_items(quote.items, db)
-
-    today = date.today()
-    technique_ids = {d.technique_id for d in deduped}
-    rules = list(
-        db.execute(
-            select(Rule).where(
-                Rule.technique_id.in_(technique_ids),
-                Rule.active.is_(True),
-            )
-        ).scalars().all()
-    )
+    with tracing.span("calc.load_quote", **{"quote.id": quote_id}):
+        # Held until the commit: concurrent runs would both delete the old
+        # lines, insert new ones and apply the rollup delta twice.
+        quote = lock_quote(db, quote_id, selectinload(Quote.items))
+        if quote is None:
+            raise ValueError(f"Quote {quote_id} not found")
+
+        selected_zones: set[str] = set(json.loads(quote.zones_json)) if quote.zones_json else set()
+        deduped = _dedup_items(quote.items, db)
+
+    with tracing.span("calc.load_rules") as sp:
+        today = date.today()
+        technique_ids = {d.technique_id for d in deduped}
+        rules = list(
+            db.execute(
+                select(Rule).where(
+                    Rule.technique_id.in_(technique_ids),
+                    Rule.active.is_(True),
+                )
+            ).scalars().all()
+        )
 
-    active_rules = [
-        r for r in rules
-        if (r.active_from is None or r.active_from <= today)
-        and (r.active_to is None or r.active_to >= today)
-    ]
+        active_rules = [
+            r for r in rules
+            if (r.active_from is None or r.active_from <= today)
+            and (r.active_to is None or r.active_to >= today)
+        ]
+        sp.set_attribute("calc.rules", len(active_rules))
 
     sku_totals: dict[int, int] = defaultdict(int)
     matched_rule_ids: list[int] = []
     debug_lines: list[str] = []
 
-    for item in deduped:
-        item_rules = [r for r in active_rules if r.technique_id == item.technique_id]
-        for rule in item_rules:
-            cond = json.loads(rule.conditions_json)
-            if _match_conditions(cond, item, selected_zones):
-                actions = json.loads(rule.actions_json)
-                _apply_actions(actions, item.qty, sku_totals)
-                matched_rule_ids.append(rule.id)
-                debug_lines.append(
-                    f"rule={rule.id} matched technique={item.technique_id} qty={item.qty}"
-                )
+    with tracing.span("calc.match_rules", **{"calc.items": len(deduped)}):
+        for item in deduped:
+            item_rules = [r for r in active_rules if r.technique_id == item.technique_id]
+            for rule in item_rules:
+                cond = json.loads(rule.conditions_json)
+                if _match_conditions(cond, item, selected_zones):
+                    actions = json.loads(rule.actions_json)
+                    _apply_actions(actions, item.qty, sku_totals)
+                    matched_rule_ids.append(rule.id)
+                    debug_lines.append(
+                        f"rule={rule.id} matched technique={item.technique_id} qty={item.qty}"
+                    )
 
     matched_rule_ids_unique = sorted(set(matched_rule_ids))
-    logger.info("Quote %d calc: matched rules %s", quote_id, matched_rule_ids_unique)
-
-    db.execute(delete(QuoteResultLine).where(QuoteResultLine.quote_id == quote_id))
-
-    result_lines: list[QuoteResultLine] = []
-    for sku_id, total_qty in sorted(sku_totals.items()):
-        if total_qty <= 0:
-            continue
-        line = QuoteResultLine(quote_id=quote_id, sku_id=sku_id, qty=total_qty)
-        db.add(line)
-        result_lines.append(line)
-
-    calc_run = QuoteCalcRun(
-        quote_id=quote_id,
-        matched_rule_ids=json.dumps(matched_rule_ids_unique),
-        debug_note="\n".join(debug_lines) if debug_lines else None,
+    # The full list is kept on the calc run; the log only needs a sample.
+    logger.debug(
+        "Quote %d calc: matched rules %s", quote_id, matched_rule_ids_unique, extra={"sampled": True},
     )
-    db.add(calc_run)
 
-    quote.status = QuoteStatus.CALCULATED
-    db.commit()
-
-    for line in result_lines:
-        db.refresh(line)
+    with tracing.span("calc.write_results") as sp:
+        old_lines = db.execute(
+            select(QuoteResultLine.sku_id, QuoteResultLine.qty).where(QuoteResultLine.quote_id == quote_id)
+        ).all()
+        db.execute(delete(QuoteResultLine).where(QuoteResultLine.quote_id == quote_id))
+
+        new_lines = [(sku_id, qty) for sku_id, qty in sorted(sku_totals.items()) if qty > 0]
+        sp.set_attribute("calc.lines", len(new_lines))
+        if new_lines:
+            # executemany without RETURNING: one round trip on every dialect.
+            db.execute(
+                insert(QuoteResultLine),
+                [{"quote_id": quote_id, "sku_id": sku_id, "qty": qty} for sku_id, qty in new_lines],
+            )
 
-    return result_lines
+        calc_run = QuoteCalcRun(
+            quote_id=quote_id,
+            matched_rule_ids=json.dumps(matched_rule_ids_unique),
+            debug_note="\n".join(debug_lines) if debug_lines else None,
+        )
+        db.add(calc_run)
+
+        record_result_change(
+            db, quote, old_status=quote.status, new_status=QuoteStatus.CALCULATED,
+            removed=[(sku_id, qty) for sku_id, qty in old_lines],
+            added=new_lines,
+        )
+        quote.status = QuoteStatus.CALCULATED
+        quote.result_revision = Quote.result_revision + 1
+
+    with tracing.span("calc.commit"):
+        db.commit()
+
+    return list(db.execute(
+        select(QuoteResultLine).where(QuoteResultLine.quote_id == quote_id).order_by(QuoteResultLine.sku_id)
+    ).scalars().all())
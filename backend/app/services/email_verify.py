@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app.models.email_verify_token import EmailVerifyToken
 from app.models.user import User
+from app.services.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +69,7 @@ def verify_token(db: Session, raw_token: str) -> User | None:
     return user
 
 
+@traced("send_verify_email")
 def send_verify_email(email: str, raw_token: str) -> None:
     """Send verification email via SMTP if configured, otherwise log the link."""
     base_url = os.environ.get("APP_BASE_URL", "http://localhost:5173")
@@ -0,0 +1,146 @@
+"""
+On-disk cache of generated quote exports.
+
+An export is fully determined by the quote's latest calculation run, its
+result-line revision counter and the header block (manager login and export
+date), so those make up the cache key (and the ETag). Entries are written
+through while the first response streams, served from a handle opened by
+``open_entry`` afterwards (so a concurrent eviction cannot pull the file
+out from under the response), and evicted least-recently-used (by mtime, refreshed on every hit) once the
+directory grows past ``EXPORT_CACHE_MAX_BYTES``.
+
+SKU catalog edits do not change the key; they show up in exports after the
+next calculation or on the next day.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from collections.abc import Iterator
+from datetime import date
+from pathlib import Path
+from typing import BinaryIO
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CACHE_DIR: Path = Path(
+    os.environ.get("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "fire_dynamics_exports"))
+)
+EXPORT_CACHE_MAX_BYTES: int = int(os.environ.get("EXPORT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_SUFFIX = ".xlsx"
+_READ_CHUNK = 64 * 1024
+
+
+def cache_key(quote_id: int, calc_run_id: int | None, result_revision: int, manager: str, day: date) -> str:
+    header = hashlib.blake2s(manager.encode(), digest_size=4).hexdigest()
+    return f"quote{quote_id}-run{calc_run_id or 0}-rev{result_revision}-h{header}-{day:%Y%m%d}"
+
+
+def etag_for(key: str) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def _path(key: str) -> Path:
+    return EXPORT_CACHE_DIR / f"{key}{_SUFFIX}"
+
+
+def lookup(key: str) -> Path | None:
+    """Cached file for ``key``, marked as recently used; ``None`` on a miss."""
+    path = _path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def open_entry(key: str) -> BinaryIO | None:
+    """Open the cached file for ``key``, marked as recently used; ``None`` on a miss.
+
+    The handle stays readable if the entry is evicted afterwards.
+    """
+    path = _path(key)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass  # evicted since the open; the handle is still good
+    return f
+
+
+def iter_file(f: BinaryIO) -> Iterator[bytes]:
+    """Read ``f`` to the end in chunks, closing it afterwards."""
+    with f:
+        while chunk := f.read(_READ_CHUNK):
+            yield chunk
+
+
+def write_through(key: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Pass ``chunks`` on unchanged while saving them as the entry for ``key``.
+
+    The entry only appears (atomic rename) once the stream has completed;
+    an interrupted stream leaves nothing behind.
+    """
+    EXPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix=".part")
+    stored = False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        os.replace(tmp, _path(key))
+        stored = True
+    finally:
+        if not stored:
+            Path(tmp).unlink(missing_ok=True)
+    evict()
+
+
+def store(key: str, data: bytes) -> None:
+    """Save an already rendered export as the entry for ``key``.
+
+    Does not evict; callers storing many entries run ``evict()`` once afterwards.
+    """
+    EXPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, _path(key))
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def evict(max_bytes: int | None = None) -> None:
+    """Delete least recently used entries until the cache fits ``max_bytes``."""
+    budget = EXPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for path in EXPORT_CACHE_DIR.glob(f"*{_SUFFIX}"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= budget:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        logger.debug("export cache: evicted %s", path.name)
@@ -0,0 +1,86 @@
+"""
+Per-route HTTP metrics as ASGI middleware.
+
+Requests are labelled by route template (``/quotes/{quote_id}``), never by raw
+path, so cardinality stays bounded; paths that match no route share
+``route="unmatched"``. The AnyIO default thread limiter is what runs sync
+``def`` routes and dependencies; its borrowed/total tokens and waiting tasks
+show threadpool saturation.
+"""
+
+import time
+
+from anyio import CapacityLimiter
+from anyio.to_thread import current_default_thread_limiter
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services import metrics
+
+HTTP_REQUESTS = metrics.Counter(
+    "http_requests_total", "HTTP requests by route template and status.", ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body.", ["method", "route"],
+)
+HTTP_RESPONSE_BYTES = metrics.Histogram(
+    "http_response_size_bytes", "Response body size.", ["method", "route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+HTTP_IN_FLIGHT = metrics.Gauge("http_requests_in_flight", "Requests currently being served.")
+THREADPOOL_BORROWED = metrics.Gauge("anyio_threadpool_borrowed", "Threadpool tokens in use by sync routes.")
+THREADPOOL_TOTAL = metrics.Gauge("anyio_threadpool_total", "Threadpool size (AnyIO default limiter).")
+THREADPOOL_WAITING = metrics.Gauge("anyio_threadpool_waiting", "Tasks queued for a threadpool token.")
+
+_limiter: CapacityLimiter | None = None
+
+
+def _route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class HttpMetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global _limiter
+        # Per event loop, so it can only be looked up from inside a request.
+        _limiter = current_default_thread_limiter()
+
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            method, route = scope["method"], _route_template(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=method, route=route)
+            HTTP_RESPONSE_BYTES.observe(size, method=method, route=route)
+
+
+@metrics.on_collect
+def _collect_threadpool() -> None:
+    if _limiter is None:
+        return
+    stats = _limiter.statistics()
+    THREADPOOL_BORROWED.set(stats.borrowed_tokens)
+    THREADPOOL_TOTAL.set(stats.total_tokens)
+    THREADPOOL_WAITING.set(stats.tasks_waiting)
@@ -0,0 +1,193 @@
+"""
+Minimal in-process metrics registry with Prometheus text rendering.
+
+Counters, gauges and histograms are module-level objects registered on
+creation; ``render()`` produces the text exposition format. Gauges that are
+cheaper to read than to track (pool occupancy and the like) are refreshed by
+``on_collect`` callbacks just before rendering. Values are per process; each
+worker reports its own.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+_registry: list["_Metric"] = []
+_collectors: list[Callable[[], None]] = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # per label set: [bucket counts..., sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return int(sum(state[:-1])) if state else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, state):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {int(cumulative)}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {int(cumulative)}"
+
+
+def on_collect(fn: Callable[[], None]) -> Callable[[], None]:
+    """Register ``fn`` to update gauges right before each ``render()``; usable as a decorator."""
+    with _registry_lock:
+        _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format (version 0.0.4)."""
+    with _registry_lock:
+        metrics = list(_registry)
+        collectors = list(_collectors)
+    for collect in collectors:
+        try:
+            collect()
+        except Exception:
+            logger.exception("metrics collector %r failed", collect)
+    return "\n".join(m.render() for m in metrics) + "\n"
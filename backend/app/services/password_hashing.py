@@ -0,0 +1,114 @@
+"""
+bcrypt hashing off the request threads.
+
+Sync routes run in AnyIO's worker threadpool (40 threads by default), and a
+bcrypt round takes hundreds of milliseconds, so a burst of logins used to
+occupy every thread and stall unrelated endpoints. Hashing now runs in a small
+process pool, and at most ``HASH_MAX_PENDING`` calls may be queued or running
+at a time; past that, callers get ``PasswordHashBusy`` straight away (a 503)
+instead of holding another thread while they wait.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+
+from app.services.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+HASH_WORKERS: int = int(os.environ.get("HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+HASH_MAX_PENDING: int = int(os.environ.get("HASH_MAX_PENDING", str(8 * max(HASH_WORKERS, 1))))
+
+_pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time spent hashing or verifying a password, queueing included.", ["op"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+HASH_PENDING = Gauge("password_hash_pending", "Password hash calls queued or running.")
+HASH_REJECTED = Counter("password_hash_rejected_total", "Password hash calls refused because the queue was full.", ["op"])
+
+
+class PasswordHashBusy(RuntimeError):
+    pass
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(HASH_MAX_PENDING, 1))
+
+
+def _executor() -> Executor | None:
+    """Shared spawn-based pool, created on first use; ``None`` hashes in-thread."""
+    global _pool
+    if HASH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(broken: Executor) -> None:
+    """Drop ``broken`` so the next ``_executor()`` call starts a fresh pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _hash(plain: str) -> str:
+    return _pwd_ctx.hash(plain)
+
+
+def _verify(plain: str, hashed: str) -> bool:
+    return _pwd_ctx.verify(plain, hashed)
+
+
+def _run(op: str, fn, *args):
+    if not _slots.acquire(blocking=False):
+        HASH_REJECTED.inc(op=op)
+        logger.warning("password %s rejected: %d calls already pending", op, HASH_MAX_PENDING)
+        raise PasswordHashBusy("Сервер перегружен, повторите попытку")
+    HASH_PENDING.inc()
+    try:
+        with HASH_SECONDS.time(op=op):
+            pool = _executor()
+            if pool is None:
+                return fn(*args)
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A worker died (OOM kill, crash); the pool refuses all further work.
+                logger.warning("password hash pool broken, restarting it")
+                _discard_pool(pool)
+                return _executor().submit(fn, *args).result()
+    finally:
+        HASH_PENDING.dec()
+        _slots.release()
+
+
+def hash_password(plain: str) -> str:
+    return _run("hash", _hash, plain)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _run("verify", _verify, plain, hashed)
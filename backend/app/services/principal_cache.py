@@ -0,0 +1,66 @@
+"""
+In-process cache of authenticated principals.
+
+``get_current_user`` used to load the full ``User`` row on every request just
+to check ``is_active`` and read the role. Active principals are now kept here
+for ``PRINCIPAL_CACHE_TTL`` seconds. Admin user changes and password changes
+call ``invalidate`` after committing, so this worker sees them at once; other
+worker processes pick them up when their entry expires.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+PRINCIPAL_CACHE_TTL: float = float(os.environ.get("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_MAX = 10_000
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str | None
+    is_active: bool
+
+
+_entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def get(user_id: int) -> Principal | None:
+    if PRINCIPAL_CACHE_TTL <= 0:
+        return None
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            return None
+        expires, principal = entry
+        if expires <= now:
+            del _entries[user_id]
+            return None
+        _entries.move_to_end(user_id)
+        return principal
+
+
+def put(principal: Principal) -> None:
+    """Remember an active principal; inactive ones are never cached."""
+    if PRINCIPAL_CACHE_TTL <= 0 or not principal.is_active:
+        return
+    with _lock:
+        _entries[principal.id] = (time.monotonic() + PRINCIPAL_CACHE_TTL, principal)
+        _entries.move_to_end(principal.id)
+        while len(_entries) > PRINCIPAL_CACHE_MAX:
+            _entries.popitem(last=False)
+
+
+def invalidate(user_id: int) -> None:
+    with _lock:
+        _entries.pop(user_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
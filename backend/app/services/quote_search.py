@@ -0,0 +1,126 @@
+"""
+Full-text search over quotes.
+
+quotes.search_text is a denormalized "customer name + comment + technique
+names" string kept current by the quote write paths (refresh_search_text).
+On PostgreSQL migration 0014 derives a generated ``search_vector tsvector``
+column from it with a GIN index, so a search is one index lookup ranked by
+ts_rank. Other dialects (tests) fall back to ILIKE on search_text.
+"""
+
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy import ColumnElement, Integer, bindparam, cast, func, literal_column, select, update
+from sqlalchemy.orm import Session
+
+from app.db.dialect import is_postgres
+from app.models.quote import Quote, QuoteItem
+from app.models.technique import Technique
+
+TS_CONFIG = "simple"
+# ts_rank is a float4; scaled to an integer it is an exact keyset sort key.
+RANK_SCALE = 1_000_000
+REFRESH_BATCH = 500
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_search_text(
+    customer_name: str | None,
+    comment: str | None,
+    technique_names: Iterable[str],
+) -> str:
+    parts = [customer_name or "", comment or "", *technique_names]
+    return " ".join(p for p in parts if p)
+
+
+def refresh_search_text(db: Session, quote_ids: Iterable[int]) -> None:
+    """Recompute search_text for the given quotes with two SELECTs and one executemany UPDATE.
+
+    Reads quote_items from the database, so pending item changes must be
+    flushed first. Does not touch updated_at and does not commit.
+    """
+    ids = sorted(set(quote_ids))
+    if not ids:
+        return
+
+    names: dict[int, list[str]] = defaultdict(list)
+    for quote_id, manufacturer, model, series in db.execute(
+        select(QuoteItem.quote_id, Technique.manufacturer, Technique.model, Technique.series)
+        .join(Technique, QuoteItem.technique_id == Technique.id)
+        .where(QuoteItem.quote_id.in_(ids))
+        .distinct()
+        .order_by(QuoteItem.quote_id, Technique.manufacturer, Technique.model)
+    ):
+        names[quote_id].append(" ".join(p for p in (manufacturer, model, series) if p))
+
+    rows = db.execute(
+        select(Quote.id, Quote.customer_name, Quote.comment).where(Quote.id.in_(ids))
+    ).all()
+    if not rows:
+        return
+
+    table = Quote.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        # assigning updated_at to itself suppresses its onupdate=now()
+        .values(search_text=bindparam("b_text"), updated_at=table.c.updated_at),
+        [
+            {"b_id": qid, "b_text": build_search_text(customer, comment, names[qid])}
+            for qid, customer, comment in rows
+        ],
+    )
+
+
+def refresh_technique_quotes(db: Session, technique_id: int) -> None:
+    """Recompute search_text of every quote that has the technique (after a rename).
+
+    Quotes are walked in id order ``REFRESH_BATCH`` at a time, so a widely
+    used technique costs a series of bounded ``IN`` lists and executemany
+    UPDATEs rather than one statement over every quote id at once.
+    """
+    last_id = 0
+    while True:
+        ids = db.execute(
+            select(QuoteItem.quote_id)
+            .where(QuoteItem.technique_id == technique_id, QuoteItem.quote_id > last_id)
+            .distinct()
+            .order_by(QuoteItem.quote_id)
+            .limit(REFRESH_BATCH)
+        ).scalars().all()
+        if not ids:
+            return
+        refresh_search_text(db, ids)
+        last_id = ids[-1]
+
+
+def _prefix_tsquery(search: str) -> str | None:
+    """``"камаз 65"`` → ``"камаз:* & 65:*"`` (words only, so user input can't break to_tsquery)."""
+    words = _WORD_RE.findall(search.lower())
+    if not words:
+        return None
+    return " & ".join(f"{w}:*" for w in words)
+
+
+def search_filter(db: Session, search: str) -> tuple[ColumnElement[bool], ColumnElement | None]:
+    """WHERE clause for a quote search and, on PostgreSQL, an integer relevance to order by.
+
+    The rank is ``ts_rank`` scaled by ``RANK_SCALE`` and cast to an integer:
+    the raw float4 does not survive the cursor round trip exactly, and a
+    lossy cursor value repeats or skips rows around page boundaries.
+    """
+    if is_postgres(db):
+        tsquery_text = _prefix_tsquery(search)
+        if tsquery_text is None:
+            return literal_column("false"), None
+        vector = literal_column("quotes.search_vector")
+        tsquery = func.to_tsquery(TS_CONFIG, tsquery_text)
+        return vector.op("@@")(tsquery), cast(func.ts_rank(vector, tsquery) * RANK_SCALE, Integer)
+
+    cond = Quote.search_text.isnot(None)
+    for word in _WORD_RE.findall(search) or [search]:
+        cond = cond & Quote.search_text.ilike(f"%{word}%")
+    return cond, None
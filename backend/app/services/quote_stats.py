@@ -0,0 +1,216 @@
+"""
+Dashboard rollups maintained by the quote write paths.
+
+quote_stats_daily mirrors
+``count(*) FROM quotes GROUP BY created_by, status, date(created_at)``,
+sku_volume mirrors ``sum(qty) FROM quote_result_lines GROUP BY sku_id`` and
+sku_demand splits that sum by the quote's status and creation month.
+Callers apply deltas in the same transaction as the change they describe
+(normally through ``record_result_change``), so /quotes/stats and
+/warehouse/demand only ever read the (small) rollup tables.
+
+Deltas are computed from the quote's current status and result lines, so
+every write path first takes the quote's row lock with ``lock_quote``;
+otherwise two concurrent transitions would both apply a delta from the same
+old state and the rollups would drift for good. Day and month buckets are
+derived by the database (``created_day`` / ``created_month``) on both the
+incremental and the rebuild path, so a rebuild reproduces the same numbers.
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.dialect import is_postgres, upsert_insert
+from app.models.quote import Quote
+from app.models.quote_result_line import QuoteResultLine
+from app.models.quote_stats import QuoteStatsDaily, SkuDemand, SkuVolume
+
+StatsKey = tuple[int, str, date]
+DemandKey = tuple[int, str, date]
+
+
+def lock_quote(db: Session, quote_id: int, *options) -> Quote | None:
+    """Load the quote under ``SELECT ... FOR UPDATE``, refreshing any copy already in the session.
+
+    Call before reading the status or result lines that a rollup delta is
+    computed from; the lock is held until the transaction ends.
+    """
+    return db.execute(
+        select(Quote).where(Quote.id == quote_id).options(*options)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+
+
+def created_day(db: Session):
+    """SQL bucket of quote_stats_daily.day: the date of quotes.created_at."""
+    return func.date(Quote.created_at, type_=Date)
+
+
+def created_month(db: Session):
+    """SQL bucket of sku_demand.period: first day of the creation month."""
+    if is_postgres(db):
+        return cast(func.date_trunc("month", Quote.created_at), Date)
+    return func.date(Quote.created_at, "start of month", type_=Date)
+
+
+def _buckets(db: Session, quote: Quote) -> tuple[date, date]:
+    day, period = db.execute(
+        select(created_day(db), created_month(db)).where(Quote.id == quote.id)
+    ).one()
+    return day, period
+
+
+def status_delta(quote: Quote, day: date, old_status: str | None, new_status: str | None) -> Counter[StatsKey]:
+    """Move one quote between status buckets; ``None`` means created / removed."""
+    delta: Counter[StatsKey] = Counter()
+    if old_status == new_status:
+        return delta
+    if old_status is not None:
+        delta[(quote.created_by, old_status, day)] -= 1
+    if new_status is not None:
+        delta[(quote.created_by, new_status, day)] += 1
+    return delta
+
+
+def bump_quote_stats(db: Session, delta: Counter[StatsKey]) -> None:
+    """Apply a quote count delta in a single upsert. Does not commit."""
+    rows = [
+        {"created_by": created_by, "status": status, "day": day, "quotes_count": n}
+        for (created_by, status, day), n in sorted(delta.items())
+        if n != 0
+    ]
+    if not rows:
+        return
+    stmt = upsert_insert(db, QuoteStatsDaily).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QuoteStatsDaily.created_by, QuoteStatsDaily.status, QuoteStatsDaily.day],
+        set_={"quotes_count": QuoteStatsDaily.quotes_count + stmt.excluded.quotes_count},
+    )
+    db.execute(stmt)
+
+
+def volume_delta(
+    added: Iterable[tuple[int, int]] = (),
+    removed: Iterable[tuple[int, int]] = (),
+) -> Counter[int]:
+    """Per-SKU change in result line qty from ``(sku_id, qty)`` pairs."""
+    delta: Counter[int] = Counter()
+    for sku_id, qty in added:
+        delta[sku_id] += qty
+    for sku_id, qty in removed:
+        delta[sku_id] -= qty
+    return delta
+
+
+def bump_sku_volume(db: Session, delta: Counter[int]) -> None:
+    """Apply a SKU volume delta in a single upsert. Does not commit."""
+    rows = [
+        {"sku_id": sku_id, "total_qty": n}
+        for sku_id, n in sorted(delta.items())
+        if n != 0
+    ]
+    if not rows:
+        return
+    stmt = upsert_insert(db, SkuVolume).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SkuVolume.sku_id],
+        set_={"total_qty": SkuVolume.total_qty + stmt.excluded.total_qty},
+    )
+    db.execute(stmt)
+
+
+def demand_delta(
+    period: date,
+    status: str,
+    added: Iterable[tuple[int, int]] = (),
+    removed: Iterable[tuple[int, int]] = (),
+) -> Counter[DemandKey]:
+    """Per-(SKU, status, period) change for result lines of one quote."""
+    return Counter({
+        (sku_id, status, period): n
+        for sku_id, n in volume_delta(added, removed).items()
+    })
+
+
+def bump_sku_demand(db: Session, delta: Counter[DemandKey]) -> None:
+    """Apply a SKU demand delta in a single upsert. Does not commit."""
+    rows = [
+        {"sku_id": sku_id, "status": status, "period": period, "total_qty": n}
+        for (sku_id, status, period), n in sorted(delta.items())
+        if n != 0
+    ]
+    if not rows:
+        return
+    stmt = upsert_insert(db, SkuDemand).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SkuDemand.sku_id, SkuDemand.status, SkuDemand.period],
+        set_={"total_qty": SkuDemand.total_qty + stmt.excluded.total_qty},
+    )
+    db.execute(stmt)
+
+
+def record_result_change(
+    db: Session,
+    quote: Quote,
+    *,
+    old_status: str | None,
+    new_status: str,
+    removed: Iterable[tuple[int, int]] = (),
+    added: Iterable[tuple[int, int]] = (),
+) -> None:
+    """Apply every rollup delta for one quote write. Does not commit.
+
+    ``removed`` are the quote's ``(sku_id, qty)`` result lines as they were
+    under ``old_status``; ``added`` are the lines it has now under
+    ``new_status``. A pure status move passes the same lines as both. The
+    caller must hold ``lock_quote`` unless the quote is new.
+    """
+    removed, added = list(removed), list(added)
+    day, period = _buckets(db, quote)
+    bump_quote_stats(db, status_delta(quote, day, old_status, new_status))
+    bump_sku_volume(db, volume_delta(added, removed))
+    demand = demand_delta(period, new_status, added=added)
+    if old_status is not None:
+        demand.update(demand_delta(period, old_status, removed=removed))
+    bump_sku_demand(db, demand)
+
+
+def record_status_change(db: Session, quote: Quote, old_status: str, new_status: str) -> None:
+    """Move the quote and its current result lines between status buckets. Does not commit."""
+    if old_status == new_status:
+        return
+    lines = db.execute(
+        select(QuoteResultLine.sku_id, QuoteResultLine.qty).where(QuoteResultLine.quote_id == quote.id)
+    ).all()
+    pairs = [(sku_id, qty) for sku_id, qty in lines]
+    record_result_change(db, quote, old_status=old_status, new_status=new_status, removed=pairs, added=pairs)
+
+
+def rebuild_quote_stats(db: Session) -> None:
+    """Recompute all rollups from scratch (seeding, repair). Does not commit."""
+    db.execute(delete(QuoteStatsDaily))
+    day = created_day(db)
+    db.execute(insert(QuoteStatsDaily).from_select(
+        ["created_by", "status", "day", "quotes_count"],
+        select(Quote.created_by, Quote.status, day, func.count())
+        .group_by(Quote.created_by, Quote.status, day),
+    ))
+    db.execute(delete(SkuVolume))
+    db.execute(insert(SkuVolume).from_select(
+        ["sku_id", "total_qty"],
+        select(QuoteResultLine.sku_id, func.sum(QuoteResultLine.qty))
+        .group_by(QuoteResultLine.sku_id),
+    ))
+    db.execute(delete(SkuDemand))
+    period = created_month(db)
+    db.execute(insert(SkuDemand).from_select(
+        ["sku_id", "status", "period", "total_qty"],
+        select(QuoteResultLine.sku_id, Quote.status, period, func.sum(QuoteResultLine.qty))
+        .join(Quote, Quote.id == QuoteResultLine.quote_id)
+        .group_by(QuoteResultLine.sku_id, Quote.status, period),
+    ))
@@ -0,0 +1,124 @@
+"""
+In-memory revocation check for access-token sessions.
+
+Revoked session ids live in ``auth_sessions.revoked_at``; each process keeps
+a Bloom filter of them so that the common case (session not revoked) is
+answered without touching the database. Only a filter hit — a revoked
+session or a rare false positive — is confirmed with a primary-key lookup.
+
+The filter is topped up incrementally from the table at most every
+``REVOCATION_SYNC_SECONDS``; revocations made by this process are added
+immediately. Other workers therefore keep accepting a revoked session's
+access tokens for up to ``REVOCATION_SYNC_SECONDS`` (refresh tokens are
+always checked against the table); lower it to shorten that window at the
+cost of more frequent sync queries. It is rebuilt from scratch once it holds more ids than it was
+sized for, which also drops sessions that have expired since.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.auth_session import AuthSession
+from app.services.metrics import Counter
+
+REVOCATION_SYNC_SECONDS: float = float(os.environ.get("REVOCATION_SYNC_SECONDS", "15"))
+REVOCATION_CAPACITY: int = int(os.environ.get("REVOCATION_CAPACITY", "100000"))
+FALSE_POSITIVE_RATE = 0.001
+SYNC_LOOKBACK = timedelta(minutes=5)
+
+REVOCATION_CHECKS = Counter(
+    "auth_revocation_checks_total", "Access-token revocation checks by outcome.", ["result"],
+)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+_lock = threading.Lock()
+_filter = BloomFilter(REVOCATION_CAPACITY)
+_synced_to: datetime | None = None  # newest revoked_at already in the filter
+_synced_at: float | None = None  # monotonic time of the last sync; None = never loaded
+
+
+def reset() -> None:
+    """Forget everything; the next check reloads from the table."""
+    global _filter, _synced_to, _synced_at
+    with _lock:
+        _filter = BloomFilter(REVOCATION_CAPACITY)
+        _synced_to = None
+        _synced_at = None
+
+
+def _sync(db: Session) -> None:
+    global _filter, _synced_to, _synced_at
+    now = time.monotonic()
+    if _synced_at is not None and now - _synced_at < REVOCATION_SYNC_SECONDS:
+        return
+    with _lock:
+        if _synced_at is not None and now - _synced_at < REVOCATION_SYNC_SECONDS:
+            return
+        stmt = select(AuthSession.id, AuthSession.revoked_at).where(
+            AuthSession.revoked_at.is_not(None),
+            AuthSession.expires_at > datetime.now(timezone.utc),
+        )
+        full = _synced_to is None or _filter.count > _filter.capacity
+        if not full:
+            # Look back a little: a revocation stamped before the watermark may commit after it.
+            stmt = stmt.where(AuthSession.revoked_at >= _synced_to - SYNC_LOOKBACK)
+        rows = db.execute(stmt).all()
+        target = BloomFilter(max(REVOCATION_CAPACITY, 2 * len(rows))) if full else _filter
+        for sid, revoked_at in rows:
+            if sid not in target:
+                target.add(sid)
+            if _synced_to is None or revoked_at > _synced_to:
+                _synced_to = revoked_at
+        _filter = target
+        _synced_at = now
+
+
+def mark_revoked(sid: str) -> None:
+    """Add a session this process has just revoked, without waiting for the next sync."""
+    with _lock:
+        if sid not in _filter:
+            _filter.add(sid)
+
+
+def is_revoked(db: Session, sid: str) -> bool:
+    _sync(db)
+    if sid not in _filter:
+        REVOCATION_CHECKS.inc(result="clear")
+        return False
+    revoked = db.execute(
+        select(AuthSession.id).where(AuthSession.id == sid, AuthSession.revoked_at.is_not(None))
+    ).first() is not None
+    REVOCATION_CHECKS.inc(result="revoked" if revoked else "false_positive")
+    return revoked
@@ -0,0 +1,41 @@
+"""
+Incremental technique usage counters for autocomplete ranking.
+
+technique_popularity mirrors ``count(*) FROM quote_items GROUP BY technique_id``
+but is updated by the quote write paths, so ranking never recounts quote_items.
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.db.dialect import upsert_insert
+from app.models.technique_popularity import TechniquePopularity
+
+
+def usage_delta(
+    added: Iterable[int] = (),
+    removed: Iterable[int] = (),
+) -> Counter[int]:
+    """Per-technique change in quote_items rows; one entry per technique_id occurrence."""
+    delta: Counter[int] = Counter(added)
+    delta.subtract(removed)
+    return delta
+
+
+def bump_usage(db: Session, delta: Counter[int]) -> None:
+    """Apply a usage delta in a single upsert. Does not commit."""
+    rows = [
+        {"technique_id": technique_id, "usage_count": n}
+        for technique_id, n in sorted(delta.items())
+        if n != 0
+    ]
+    if not rows:
+        return
+    stmt = upsert_insert(db, TechniquePopularity).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TechniquePopularity.technique_id],
+        set_={"usage_count": TechniquePopularity.usage_count + stmt.excluded.usage_count},
+    )
+    db.execute(stmt)
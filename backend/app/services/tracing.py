@@ -0,0 +1,288 @@
+"""
+In-process tracing with OpenTelemetry-shaped spans.
+
+Spans carry the OTel data model fields (trace/span/parent ids as hex,
+``kind``, start/end in Unix nanoseconds, ``attributes``, ``status``,
+``events``), so exported JSON maps one-to-one onto OTLP if a collector is
+added later. The current span lives in a context variable and follows the
+request into threadpool workers and SQLAlchemy greenlets.
+
+``TracingMiddleware`` opens a SERVER span per request, continuing an incoming
+W3C ``traceparent`` and returning the trace id in ``X-Trace-Id``. Finished
+spans go to the exporters named in ``TRACE_EXPORT``: ``memory`` (a ring buffer
+of the last ``TRACE_BUFFER_SPANS`` spans, browsable at /admin/traces) and/or
+``file`` (JSON lines in ``TRACE_FILE``, rotated at ``TRACE_FILE_MAX_BYTES``);
+``off`` disables export. Buffers are per process. File export works like
+the slow query log: ending a span only queues it, one background thread
+serialises and writes, and spans are dropped and counted on a full queue.
+
+Each SQL statement becomes a CLIENT span only in the ``TRACE_SQL_SAMPLE``
+fraction of traces (0 by default): a list page runs dozens of statements,
+and per-statement spans would crowd the buffer out. The choice is made from
+the trace id, so a sampled trace has all of its statements.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from logging.handlers import RotatingFileHandler
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services import metrics
+
+TRACE_EXPORT: set[str] = {
+    s.strip() for s in os.environ.get("TRACE_EXPORT", "memory").split(",") if s.strip() not in ("", "off")
+}
+TRACE_FILE: str = os.environ.get("TRACE_FILE", "traces.jsonl")
+TRACE_FILE_MAX_BYTES: int = int(os.environ.get("TRACE_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_FILE_BACKUPS: int = int(os.environ.get("TRACE_FILE_BACKUPS", "5"))
+TRACE_BUFFER_SPANS: int = int(os.environ.get("TRACE_BUFFER_SPANS", "5000"))
+TRACE_SQL_SAMPLE: float = float(os.environ.get("TRACE_SQL_SAMPLE", "0"))
+FILE_QUEUE_SPANS = 10000
+
+SPANS_DROPPED = metrics.Counter("trace_spans_dropped_total", "Spans dropped on a full trace file queue.")
+
+TRACE_ID_HEADER = "X-Trace-Id"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    kind: str = "INTERNAL"
+    start_time_unix_nano: int = 0
+    end_time_unix_nano: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: dict[str, str] = field(default_factory=lambda: {"code": "UNSET"})
+    events: list[dict[str, Any]] = field(default_factory=list)
+    _start_perf: int = field(default=0, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = {"code": "ERROR", "message": f"{type(exc).__name__}: {exc}"}
+        self.events.append({
+            "name": "exception",
+            "time_unix_nano": time.time_ns(),
+            "attributes": {"exception.type": type(exc).__name__, "exception.message": str(exc)},
+        })
+
+    def end(self) -> None:
+        if self.end_time_unix_nano is not None:
+            return
+        self.end_time_unix_nano = self.start_time_unix_nano + (time.perf_counter_ns() - self._start_perf)
+        _export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time_unix_nano or self.start_time_unix_nano
+        return (end - self.start_time_unix_nano) / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        del data["_start_perf"]
+        return data
+
+
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+_buffer: deque[Span] = deque(maxlen=TRACE_BUFFER_SPANS)
+
+logger = logging.getLogger(__name__)
+# Spans go to their own file only, never to the application log.
+_file_logger = logging.getLogger(f"{__name__}.file")
+_file_logger.propagate = False
+_file_logger.setLevel(logging.INFO)
+
+_file_queue: queue.Queue[Span] = queue.Queue(maxsize=FILE_QUEUE_SPANS)
+_file_worker: threading.Thread | None = None
+_file_worker_lock = threading.Lock()
+
+
+def _export(span: Span) -> None:
+    if "memory" in TRACE_EXPORT:
+        _buffer.append(span)
+    if "file" in TRACE_EXPORT:
+        _ensure_file_worker()
+        try:
+            _file_queue.put_nowait(span)
+        except queue.Full:
+            SPANS_DROPPED.inc()
+
+
+def _write_spans() -> None:
+    while True:
+        span = _file_queue.get()
+        try:
+            _file_logger.info(json.dumps(span.to_dict(), ensure_ascii=False, default=str))
+        except Exception:
+            logger.exception("trace file write failed")
+        finally:
+            _file_queue.task_done()
+
+
+def _ensure_file_worker() -> None:
+    global _file_worker
+    if _file_worker is not None:
+        return
+    with _file_worker_lock:
+        if _file_worker is None:
+            if not _file_logger.handlers:
+                handler = RotatingFileHandler(
+                    TRACE_FILE, maxBytes=TRACE_FILE_MAX_BYTES,
+                    backupCount=TRACE_FILE_BACKUPS, encoding="utf-8", delay=True,
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                _file_logger.addHandler(handler)
+            _file_worker = threading.Thread(target=_write_spans, name="trace-file-export", daemon=True)
+            _file_worker.start()
+
+
+def wait_idle() -> None:
+    """Block until every queued span has been written to the file (tests, shutdown)."""
+    _file_queue.join()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def sql_sampled(trace_id: str) -> bool:
+    """Whether the trace is in the ``TRACE_SQL_SAMPLE`` fraction that gets per-statement spans."""
+    return int(trace_id[:8], 16) < TRACE_SQL_SAMPLE * 0x100000000
+
+
+def start_span(
+    name: str,
+    kind: str = "INTERNAL",
+    attributes: dict[str, Any] | None = None,
+    *,
+    trace_id: str | None = None,
+    parent_span_id: str | None = None,
+) -> Span:
+    """A started span under the current one (or ``trace_id`` / ``parent_span_id``); call ``end()``.
+
+    Does not become the current span; use ``span()`` for that.
+    """
+    parent = _current.get()
+    if trace_id is None and parent is not None:
+        trace_id, parent_span_id = parent.trace_id, parent.span_id
+    return Span(
+        name=name,
+        trace_id=trace_id or secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent_span_id,
+        kind=kind,
+        start_time_unix_nano=time.time_ns(),
+        attributes=dict(attributes or {}),
+        _start_perf=time.perf_counter_ns(),
+    )
+
+
+@contextmanager
+def span(name: str, kind: str = "INTERNAL", **attributes: Any) -> Iterator[Span]:
+    """Run the block as the current span, recording an escaping exception."""
+    s = start_span(name, kind, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.record_exception(exc)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def traced(name: str | None = None) -> Callable:
+    """Decorator: run each call of the function inside ``span(name or qualified name)``."""
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def recent_spans() -> list[Span]:
+    """Snapshot of the in-memory ring buffer, oldest first."""
+    return list(_buffer)
+
+
+def clear() -> None:
+    _buffer.clear()
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_span_id = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                m = _TRACEPARENT.match(value.decode("latin-1").strip())
+                if m:
+                    trace_id, parent_span_id = m.groups()
+                break
+
+        server = start_span(
+            f"{scope['method']} {scope['path']}", "SERVER",
+            {"http.request.method": scope["method"], "url.path": scope["path"]},
+            trace_id=trace_id, parent_span_id=parent_span_id,
+        )
+
+        async def send_with_trace_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                server.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    server.status = {"code": "ERROR"}
+                MutableHeaders(scope=message).append(TRACE_ID_HEADER, server.trace_id)
+            await send(message)
+
+        token = _current.set(server)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as exc:
+            server.record_exception(exc)
+            raise
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                server.name = f"{scope['method']} {route}"
+                server.set_attribute("http.route", route)
+            server.end()
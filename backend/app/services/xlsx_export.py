@@ -1,18 +1,44 @@
-from io import BytesIO
+"""
+Quote XLSX export.
+
+The workbook is built in openpyxl write-only mode: result lines are read in
+``yield_per`` batches (a server-side cursor on PostgreSQL) and appended
+straight to a worksheet that openpyxl spools to a temporary file, so memory
+stays flat regardless of the number of lines. ``stream_workbook`` then runs
+the zip save on a small shared thread pool and hands the archive out in
+chunks as it is written.
+"""
+
+import os
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from io import BytesIO
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 
 from app.models.quote import Quote
 from app.models.quote_result_line import QuoteResultLine
 from app.models.sku import SKU
 from app.models.user import User
+from app.services.tracing import traced
 
 _INJECTION_CHARS = frozenset("=+-@")
 
+FETCH_BATCH = 1000
+STREAM_CHUNK = 64 * 1024
+STREAM_QUEUE_CHUNKS = 16
+STREAM_WORKERS: int = int(os.environ.get("XLSX_STREAM_WORKERS", "4"))
+STREAM_TIMEOUT_SECONDS: float = float(os.environ.get("XLSX_STREAM_TIMEOUT_SECONDS", "60"))
+
+_COLUMN_WIDTHS = {"A": 16, "B": 40, "C": 10, "D": 10, "E": 30}
+
 
 def _safe(value: str) -> str:
     if value and value[0] in _INJECTION_CHARS:
@@ -20,61 +46,218 @@ def _safe(value: str) -> str:
     return value
 
 
-def xlsx_export(db: Session, quote_id: int) -> bytes:
-    quote = db.get(Quote, quote_id)
-    if quote is None:
-        raise ValueError(f"Quote {quote_id} not found")
+# (sku_id, qty, note, sku_code, sku_name, sku_unit) — one result line as exported.
+ExportRow = tuple[int, int, str | None, str | None, str | None, str | None]
 
-    creator = db.get(User, quote.created_by)
-    manager_name = creator.login if creator else str(quote.created_by)
 
-    lines = list(
-        db.execute(
-            select(QuoteResultLine).where(QuoteResultLine.quote_id == quote_id).order_by(QuoteResultLine.id)
-        ).scalars().all()
-    )
-    sku_ids = {ln.sku_id for ln in lines}
-    skus = (
-        {s.id: s for s in db.execute(select(SKU).where(SKU.id.in_(sku_ids))).scalars().all()}
-        if sku_ids else {}
+def result_rows_stmt(quote_ids: Iterable[int]) -> Select:
+    """Result lines of the given quotes joined with SKU, as ``(quote_id, *ExportRow)``."""
+    return (
+        select(
+            QuoteResultLine.quote_id,
+            QuoteResultLine.sku_id, QuoteResultLine.qty, QuoteResultLine.note,
+            SKU.code, SKU.name, SKU.unit,
+        )
+        .outerjoin(SKU, SKU.id == QuoteResultLine.sku_id)
+        .where(QuoteResultLine.quote_id.in_(list(quote_ids)))
+        .order_by(QuoteResultLine.quote_id, QuoteResultLine.id)
     )
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "КП"
 
-    bold = Font(bold=True)
-    ws.append(["Дата", date.today().isoformat()])
-    ws.append(["КП №", quote_id])
-    ws.append(["Менеджер", _safe(manager_name)])
-    for row in ws.iter_rows(min_row=1, max_row=3, min_col=1, max_col=1):
-        for cell in row:
-            cell.font = bold
+def manager_name(db: Session, quote: Quote) -> str:
+    creator = db.get(User, quote.created_by)
+    return creator.login if creator else str(quote.created_by)
 
-    ws.append([])
 
-    headers = ["Код", "Наименование", "Ед. изм.", "Кол-во", "Примечание"]
-    ws.append(headers)
-    for cell in ws[ws.max_row]:
+def write_quote_sheet(ws, quote_id: int, manager: str, rows: Iterable[ExportRow]) -> None:
+    """Append the header block and result lines of one quote to a write-only sheet."""
+    for col, width in _COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+
+    bold = Font(bold=True)
+    center = Alignment(horizontal="center")
+
+    def label(text: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=text)
         cell.font = bold
-        cell.alignment = Alignment(horizontal="center")
+        return cell
+
+    def header(text: str) -> WriteOnlyCell:
+        cell = label(text)
+        cell.alignment = center
+        return cell
 
-    for ln in lines:
-        s = skus.get(ln.sku_id)
+    ws.append([label("Дата"), date.today().isoformat()])
+    ws.append([label("КП №"), quote_id])
+    ws.append([label("Менеджер"), _safe(manager)])
+    ws.append([])
+    ws.append([header(h) for h in ("Код", "Наименование", "Ед. изм.", "Кол-во", "Примечание")])
+
+    for sku_id, qty, note, code, name, unit in rows:
         ws.append([
-            _safe(s.code if s else str(ln.sku_id)),
-            _safe(s.name if s else ""),
-            _safe(s.unit if s else ""),
-            ln.qty,
-            _safe(ln.note or ""),
+            _safe(code if code is not None else str(sku_id)),
+            _safe(name or ""),
+            _safe(unit or ""),
+            qty,
+            _safe(note or ""),
         ])
 
-    ws.column_dimensions["A"].width = 16
-    ws.column_dimensions["B"].width = 40
-    ws.column_dimensions["C"].width = 10
-    ws.column_dimensions["D"].width = 10
-    ws.column_dimensions["E"].width = 30
 
+@traced("xlsx.build_workbook")
+def build_workbook(db: Session, quote_id: int) -> Workbook:
+    """Write-only workbook for one quote, with every result line already appended."""
+    quote = db.get(Quote, quote_id)
+    if quote is None:
+        raise ValueError(f"Quote {quote_id} not found")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("КП")
+    rows = db.execute(result_rows_stmt([quote_id]).execution_options(yield_per=FETCH_BATCH))
+    write_quote_sheet(ws, quote_id, manager_name(db, quote), (tuple(r[1:]) for r in rows))
+    return wb
+
+
+def render_quote_xlsx(quote_id: int, manager: str, rows: list[ExportRow]) -> bytes:
+    """Whole single-quote workbook from preloaded rows; needs no database (worker processes)."""
+    wb = Workbook(write_only=True)
+    write_quote_sheet(wb.create_sheet("КП"), quote_id, manager, rows)
     buf = BytesIO()
     wb.save(buf)
     return buf.getvalue()
+
+
+class _StreamClosed(Exception):
+    pass
+
+
+class ExportStreamTimeout(TimeoutError):
+    pass
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Shared pool for workbook saves, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(STREAM_WORKERS, 1), thread_name_prefix="xlsx-stream")
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+class _QueueWriter:
+    """Unseekable file object feeding fixed-size chunks into a queue.
+
+    zipfile falls back to data descriptors when the target cannot seek, so
+    the archive is produced front to back without being held in memory.
+    ``close()`` ends the stream and ``fail(exc)`` ends it with an error for
+    the consumer to re-raise; both raise ``_StreamClosed`` once the consumer
+    has gone away.
+    """
+
+    def __init__(self, out: queue.Queue, cancelled: threading.Event):
+        self._out = out
+        self._cancelled = cancelled
+        self._buf = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buf += data
+        while len(self._buf) >= STREAM_CHUNK:
+            self._put(bytes(self._buf[:STREAM_CHUNK]))
+            del self._buf[:STREAM_CHUNK]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self._buf:
+            self._put(bytes(self._buf))
+            self._buf.clear()
+        self._put(_DONE)
+
+    def fail(self, exc: BaseException) -> None:
+        self._buf.clear()
+        self._put(exc)
+
+    def _put(self, item: object) -> None:
+        while True:
+            if self._cancelled.is_set():
+                raise _StreamClosed
+            try:
+                self._out.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+_DONE = object()
+
+
+def _discard_spool(wb: Workbook) -> None:
+    """Remove the temp files of write-only sheets an abandoned save never reached."""
+    for ws in wb.worksheets:
+        writer = getattr(ws, "_writer", None)
+        if writer is not None and isinstance(writer.out, str) and os.path.exists(writer.out):
+            writer.cleanup()
+
+
+def _save(wb: Workbook, writer: _QueueWriter) -> None:
+    try:
+        try:
+            wb.save(writer)
+        except _StreamClosed:
+            raise
+        except Exception as exc:  # re-raised in the consumer
+            _discard_spool(wb)
+            writer.fail(exc)
+            return
+        writer.close()
+    except _StreamClosed:
+        _discard_spool(wb)
+
+
+def stream_workbook(wb: Workbook) -> Iterator[bytes]:
+    """Yield the saved workbook in chunks while a pool thread writes it.
+
+    At most ``STREAM_WORKERS`` saves run at once; later ones queue for a
+    thread. If the consumer stops early (client disconnect, generator
+    closed) or no chunk arrives within ``STREAM_TIMEOUT_SECONDS``, the save
+    is abandoned and the workbook's spooled sheets are removed.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    future = _executor().submit(_save, wb, _QueueWriter(chunks, cancelled))
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=STREAM_TIMEOUT_SECONDS)
+            except queue.Empty:
+                raise ExportStreamTimeout(
+                    f"No workbook data for {STREAM_TIMEOUT_SECONDS:g}s"
+                ) from None
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+        if future.cancel():
+            _discard_spool(wb)
+
+
+@traced("xlsx_export")
+def xlsx_export(db: Session, quote_id: int) -> bytes:
+    """Whole workbook as bytes, for callers that need it in memory."""
+    return b"".join(stream_workbook(build_workbook(db, quote_id)))
@@ -25,6 +25,9 @@ from app.models.user import User
 from app.models.zone import Zone
 from app.services.auth import hash_password
 from app.services.calc_engine import calculate_quote
+from app.services.quote_search import refresh_search_text
+from app.services.quote_stats import rebuild_quote_stats
+from app.services.technique_popularity import bump_usage, usage_delta
 
 _ALLOWED_ENVS = {"dev", "local", ""}
 DEFAULT_PASSWORD = "dev123"
@@ -241,7 +244,7 @@ def _build_status_list(rng: random.Random, count: int) -> list[str]:
 
 def _generate_items(
     db, rng: random.Random, quote_id: int, techniques: list[Technique], count: int,
-) -> None:
+) -> list[QuoteItem]:
     num_templates = max(1, count * 7 // 10)
     templates: list[dict] = []
     for _ in range(num_templates):
@@ -266,6 +269,7 @@ def _generate_items(
         ))
     db.add_all(items)
     db.flush()
+    return items
 
 
 def _seed_quotes(
@@ -302,7 +306,10 @@ def _seed_quotes(
         db.flush()
 
         item_count = 100 if is_big else rng.randint(2, 10)
-        _generate_items(db, rng, q.id, techniques, item_count)
+        items = _generate_items(db, rng, q.id, techniques, item_count)
+        bump_usage(db, usage_delta(added=[it.technique_id for it in items]))
+        db.flush()
+        refresh_search_text(db, [q.id])
         db.commit()
 
         needs_calc = target in ("calculated", "warehouse_check", "confirmed", "rework")
@@ -339,6 +346,9 @@ def seed(args: argparse.Namespace) -> None:
         db.commit()
 
         quotes, calc_ok = _seed_quotes(db, rng, users, techniques, zones, args.quotes)
+        # Seed statuses are forced directly, so rebuild the rollups once at the end.
+        rebuild_quote_stats(db)
+        db.commit()
 
         print(f"Seed complete (--seed {args.seed}).")
         print(f"  Users:      {', '.join(u.login for u in users)}  (password: {DEFAULT_PASSWORD})")
@@ -1,21 +1,37 @@
+import os
+import re
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, StaticPool
+from sqlalchemy import NullPool, create_engine, StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_async_db, get_async_read_db, get_db, get_read_db
 from app.main import app
 from app.models.user import User
-from app.services.auth import hash_password
+from app.services import export_cache, principal_cache, revocation
+from app.services.auth import clear_token_cache, hash_password
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A file rather than ":memory:" so that async routes (aiosqlite, own
+# connections) see what the sync session has committed.
+_db_path = os.path.join(tempfile.mkdtemp(prefix="fire_dynamics_test_"), "test.db")
 
 engine_test = create_engine(
-    "sqlite://",
+    f"sqlite:///{_db_path}",
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
 TestSession = sessionmaker(bind=engine_test, autocommit=False, autoflush=False)
 
+# NullPool: TestClient runs each request on a fresh event loop.
+async_engine_test = create_async_engine(f"sqlite+aiosqlite:///{_db_path}", poolclass=NullPool)
+AsyncTestSession = async_sessionmaker(bind=async_engine_test, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(autouse=True)
 def db():
@@ -33,16 +49,95 @@ def override_get_db(db: Session):
     def _override():
         yield db
 
+    async def _override_async():
+        async with AsyncTestSession() as session:
+            yield session
+
     app.dependency_overrides[get_db] = _override
+    app.dependency_overrides[get_async_db] = _override_async
+    app.dependency_overrides[get_read_db] = _override
+    app.dependency_overrides[get_async_read_db] = _override_async
     yield
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def export_cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "exports"
+    monkeypatch.setattr(export_cache, "EXPORT_CACHE_DIR", path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def reset_auth_state():
+    # Each test recreates the schema, so user and session ids are reused across tests.
+    principal_cache.clear()
+    revocation.reset()
+    clear_token_cache()
+    yield
+    principal_cache.clear()
+    revocation.reset()
+    clear_token_cache()
+
+
 @pytest.fixture()
 def client() -> TestClient:
     return TestClient(app)
 
 
+@pytest.fixture()
+def assert_max_queries():
+    """``check(resp, limit)``: fail if the request behind ``resp`` ran more than ``limit`` queries.
+
+    Reads the count from the Server-Timing header set by QueryStatsMiddleware.
+    """
+    def check(resp, limit: int) -> int:
+        count = int(re.search(r'desc="(\d+) queries"', resp.headers["server-timing"]).group(1))
+        assert count <= limit, f"{resp.request.method} {resp.request.url.path}: {count} queries > {limit}"
+        return count
+
+    return check
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    """A PostgreSQL database migrated to head, from ``TEST_POSTGRES_URL``; skips the test if unset.
+
+    The dialect-specific paths (pg_trgm, tsvector, row locks) only run here.
+    """
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file: alembic.ini's logging section would replace the app's handlers.
+    cfg = Config()
+    cfg.set_main_option("script_location", os.path.join(_BACKEND_DIR, "alembic"))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATABASE_URL", url)
+        command.upgrade(cfg, "head")
+        engine = create_engine(url, poolclass=NullPool)
+        try:
+            yield engine
+        finally:
+            engine.dispose()
+            command.downgrade(cfg, "base")
+
+
+@pytest.fixture()
+def pg_db(pg_engine):
+    """Session on ``pg_engine`` inside a transaction that is rolled back after the test."""
+    with pg_engine.connect() as conn:
+        trans = conn.begin()
+        session = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            session.close()
+            trans.rollback()
+
+
 @pytest.fixture()
 def admin_user(db: Session) -> User:
     user = User(login="admin", password_hash=hash_password("admin123"), role="admin")
@@ -0,0 +1,111 @@
+"""Tests for the columnar result-line export."""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote, QuoteItem
+from app.models.quote_result_line import QuoteResultLine
+from app.models.sku import SKU
+from app.models.technique import Technique
+from app.models.user import User
+from app.services import analytics_export
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def _seed(db: Session, user_id: int) -> list[Quote]:
+    techs = [Technique(manufacturer="CAT", model="320"), Technique(manufacturer="Komatsu", model="PC200")]
+    skus = [SKU(code="A-1", name="Огнетушитель", unit="шт"), SKU(code="B-2", name="Датчик", unit="шт")]
+    db.add_all(techs + skus)
+    db.flush()
+    quotes = []
+    for status, tech_ids in (("calculated", [techs[0].id, techs[1].id]), ("confirmed", [techs[1].id])):
+        q = Quote(created_by=user_id, status=status, customer_name="ООО Ромашка", zones_json=json.dumps([]))
+        db.add(q)
+        db.flush()
+        db.add_all(QuoteItem(quote_id=q.id, technique_id=t, qty=1) for t in tech_ids)
+        db.add_all(QuoteResultLine(quote_id=q.id, sku_id=s.id, qty=i + 2) for i, s in enumerate(skus))
+        quotes.append(q)
+    db.commit()
+    return quotes
+
+
+def _csv_rows(resp) -> list[dict]:
+    return list(csv.DictReader(io.StringIO(resp.content.decode("utf-8"))))
+
+
+def test_csv_export_joins_quote_sku_and_technique(client: TestClient, manager_user: User, db: Session):
+    first, second = _seed(db, manager_user.id)
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    resp = client.get("/exports/result-lines", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert "result_lines_" in resp.headers["content-disposition"]
+
+    rows = _csv_rows(resp)
+    assert list(rows[0]) == analytics_export.COLUMNS
+    assert [(int(r["quote_id"]), r["sku_code"], int(r["qty"])) for r in rows] == [
+        (first.id, "A-1", 2), (first.id, "B-2", 3), (second.id, "A-1", 2), (second.id, "B-2", 3),
+    ]
+    assert rows[0]["techniques"] == "CAT 320; Komatsu PC200"
+    assert rows[2]["techniques"] == "Komatsu PC200"
+    assert rows[0]["manager_login"] == "manager"
+    assert rows[0]["customer_name"] == "ООО Ромашка"
+
+    resp = client.get("/exports/result-lines", params={"status": "confirmed"}, headers=headers)
+    assert {int(r["quote_id"]) for r in _csv_rows(resp)} == {second.id}
+
+    resp = client.get("/exports/result-lines", params={"date_to": "2000-01-01"}, headers=headers)
+    assert _csv_rows(resp) == []
+
+
+def test_date_to_includes_the_whole_day(client: TestClient, manager_user: User, db: Session):
+    first, second = _seed(db, manager_user.id)
+    first.created_at = datetime(2024, 3, 10, 23, 59, 59, 500000, tzinfo=timezone.utc)
+    second.created_at = datetime(2024, 3, 11, tzinfo=timezone.utc)
+    db.commit()
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    resp = client.get("/exports/result-lines", params={"date_to": "2024-03-10"}, headers=headers)
+    assert {int(r["quote_id"]) for r in _csv_rows(resp)} == {first.id}
+
+
+def test_csv_export_is_written_per_batch(
+    monkeypatch: pytest.MonkeyPatch, manager_user: User, db: Session,
+):
+    _seed(db, manager_user.id)
+    monkeypatch.setattr(analytics_export, "BATCH_ROWS", 3)
+
+    stmt = analytics_export.result_lines_stmt()
+    batches = list(analytics_export.iter_batches(db.get_bind(), stmt))
+    assert [len(b) for b in batches] == [3, 1]
+    # Technique names are resolved per batch, including a quote split across two.
+    assert batches[1][0][-1] == "Komatsu PC200"
+
+    chunks = list(analytics_export.stream_csv(iter(batches)))
+    assert len(chunks) == 3
+    assert b"".join(chunks).count(b"\n") == 5
+
+
+def test_export_requires_manager_or_admin(client: TestClient, warehouse_user: User):
+    headers = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+    assert client.get("/exports/result-lines", headers=headers).status_code == 403
+
+
+def test_parquet_export_round_trips(client: TestClient, manager_user: User, db: Session):
+    first, _ = _seed(db, manager_user.id)
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    resp = client.get("/exports/result-lines", params={"format": "parquet"}, headers=headers)
+    assert resp.status_code == 200
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert table.column_names == analytics_export.COLUMNS
+    assert table.num_rows == 4
+    assert table.column("quote_id").to_pylist()[0] == first.id
@@ -0,0 +1,49 @@
+"""Tests for read routes served from the async session."""
+import inspect
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote, QuoteItem
+from app.models.technique import Technique
+from app.models.user import User
+from app.models.zone import Zone
+from app.routes import quotes, techniques, zones
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def test_read_routes_are_coroutines():
+    for fn in (quotes.list_quotes, quotes.get_quote, techniques.list_techniques, zones.list_zones):
+        assert inspect.iscoroutinefunction(fn), fn.__name__
+
+
+def test_get_quote_loads_items_eagerly(client: TestClient, manager_user: User, db: Session):
+    tech = Technique(manufacturer="CAT", model="320")
+    db.add(tech)
+    db.flush()
+    q = Quote(created_by=manager_user.id, status="draft", customer_name="ООО Ромашка", zones_json=json.dumps(["engine"]))
+    db.add(q)
+    db.flush()
+    db.add_all([QuoteItem(quote_id=q.id, technique_id=tech.id, qty=2), QuoteItem(quote_id=q.id, technique_id=tech.id, qty=1)])
+    db.commit()
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    body = client.get(f"/quotes/{q.id}", headers=headers).json()
+    assert body["customer_name"] == "ООО Ромашка"
+    assert body["zones"] == ["engine"]
+    assert [i["qty"] for i in body["items"]] == [2, 1]
+    assert client.get("/quotes/999999", headers=headers).status_code == 404
+
+
+def test_sync_writes_are_visible_to_async_reads(client: TestClient, admin_user: User, db: Session):
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    resp = client.post("/zones", json={"code": "cabin", "title_ru": "Кабина"}, headers=headers)
+    assert resp.status_code == 201
+    db.add(Zone(code="engine", title_ru="Двигатель"))
+    db.commit()
+
+    assert [z["code"] for z in client.get("/zones", headers=headers).json()] == ["cabin", "engine"]
@@ -1,6 +1,24 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
 
+from app.models.auth_session import AuthSession
 from app.models.user import User
+from app.services import auth as auth_service
+from app.services import auth_sessions, password_hashing, principal_cache, revocation
+from app.services.principal_cache import Principal
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
 
 
 def test_login_success(client: TestClient, admin_user: User):
@@ -46,3 +64,177 @@ def test_admin_users_allowed_for_admin(client: TestClient, admin_user: User):
     resp = client.get("/admin/users", headers={"Authorization": f"Bearer {token}"})
     assert resp.status_code == 200
     assert isinstance(resp.json(), list)
+
+
+def test_principal_is_cached_until_admin_changes_user(
+    client: TestClient, admin_user: User, manager_user: User, db: Session,
+):
+    admin = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    mgr = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    assert client.get("/quotes", headers=mgr).status_code == 200
+    assert principal_cache.get(manager_user.id) == Principal(id=manager_user.id, role="manager", is_active=True)
+
+    # A change behind the API's back is not seen while the entry is live...
+    db.execute(update(User).where(User.id == manager_user.id).values(role="warehouse"))
+    db.commit()
+    assert client.get("/exports/result-lines", headers=mgr).status_code == 200
+
+    # ...but admin edits invalidate it immediately.
+    resp = client.patch(f"/admin/users/{manager_user.id}", json={"is_active": False}, headers=admin)
+    assert resp.status_code == 200
+    assert principal_cache.get(manager_user.id) is None
+    assert client.get("/quotes", headers=mgr).status_code == 401
+
+
+def test_password_change_invalidates_principal(client: TestClient, manager_user: User):
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    assert client.get("/auth/me", headers=headers).json()["login"] == "manager"
+    assert principal_cache.get(manager_user.id) is not None
+
+    resp = client.patch("/auth/me", json={"current_password": "mgr123", "new_password": "secret42"}, headers=headers)
+    assert resp.status_code == 200
+    assert principal_cache.get(manager_user.id) is None
+    assert _token(client, "manager", "secret42")
+
+
+def test_login_returns_503_when_hash_queue_is_full(
+    client: TestClient, admin_user: User, monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(password_hashing, "_slots", threading.BoundedSemaphore(1))
+    assert password_hashing._slots.acquire(blocking=False)  # the one slot is taken
+    rejected = password_hashing.HASH_REJECTED.value(op="verify")
+
+    resp = client.post("/auth/login", json={"login": "admin", "password": "admin123"})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+    assert password_hashing.HASH_REJECTED.value(op="verify") == rejected + 1
+
+    password_hashing._slots.release()
+    verified = password_hashing.HASH_SECONDS.count(op="verify")
+    assert client.post("/auth/login", json={"login": "admin", "password": "admin123"}).status_code == 200
+    assert password_hashing.HASH_SECONDS.count(op="verify") == verified + 1
+    assert password_hashing.HASH_PENDING.value() == 0
+
+
+def test_broken_hash_pool_is_replaced(monkeypatch: pytest.MonkeyPatch):
+    class BrokenPool:
+        def submit(self, fn, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    broken = BrokenPool()
+    monkeypatch.setattr(password_hashing, "HASH_WORKERS", 1)
+    monkeypatch.setattr(password_hashing, "ProcessPoolExecutor", lambda **kwargs: ThreadPoolExecutor(1))
+    monkeypatch.setattr(password_hashing, "_pool", broken)
+
+    hashed = password_hashing.hash_password("secret42")
+    assert password_hashing.verify_password("secret42", hashed)
+    assert password_hashing._pool is not broken
+    password_hashing.shutdown_pool()
+
+
+def _login(client: TestClient, login: str, password: str) -> dict:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()
+
+
+def test_refresh_rotates_and_detects_reuse(client: TestClient, manager_user: User, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(auth_sessions, "REFRESH_REUSE_GRACE_SECONDS", 0)
+    first = _login(client, "manager", "mgr123")
+    assert first["expires_in"] > 0
+
+    resp = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert resp.status_code == 200
+    second = resp.json()
+    assert second["refresh_token"] != first["refresh_token"]
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {second['access_token']}"}).status_code == 200
+
+    # Replaying the rotated token revokes the whole session, new tokens included.
+    assert client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 401
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {second['access_token']}"}).status_code == 401
+
+
+def test_concurrent_refresh_with_same_token_keeps_session(client: TestClient, manager_user: User):
+    first = _login(client, "manager", "mgr123")
+    second = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]}).json()
+
+    # Another tab presents the same token a moment later: access only, no new refresh token.
+    resp = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert resp.status_code == 200
+    assert resp.json()["refresh_token"] is None
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {resp.json()['access_token']}"}).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 200
+
+
+def test_logout_needs_the_refresh_secret(client: TestClient, manager_user: User):
+    tokens = _login(client, "manager", "mgr123")
+    sid = auth_sessions.parse_session_id(tokens["refresh_token"])
+
+    assert client.post("/auth/logout", json={"refresh_token": f"{sid}.forged"}).status_code == 200
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+
+
+def test_logout_revokes_access_and_refresh_tokens(client: TestClient, manager_user: User):
+    kept = _login(client, "manager", "mgr123")
+    tokens = _login(client, "manager", "mgr123")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    before = revocation.REVOCATION_CHECKS.value(result="clear")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert revocation.REVOCATION_CHECKS.value(result="clear") == before + 1
+
+    assert client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers).status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    # Other sessions of the same user are untouched.
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {kept['access_token']}"}).status_code == 200
+
+
+def test_revocations_from_other_workers_are_picked_up_on_sync(
+    client: TestClient, manager_user: User, db: Session, monkeypatch: pytest.MonkeyPatch,
+):
+    tokens = _login(client, "manager", "mgr123")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    # Revoked directly in the table, as another process would.
+    sid = auth_sessions.parse_session_id(tokens["refresh_token"])
+    db.execute(update(AuthSession).where(AuthSession.id == sid).values(revoked_at=datetime.now(timezone.utc)))
+    db.commit()
+    monkeypatch.setattr(revocation, "REVOCATION_SYNC_SECONDS", 0)
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_password_change_signs_out_other_sessions(client: TestClient, manager_user: User):
+    current = _login(client, "manager", "mgr123")
+    other = _login(client, "manager", "mgr123")
+    headers = {"Authorization": f"Bearer {current['access_token']}"}
+
+    resp = client.patch("/auth/me", json={"current_password": "mgr123", "new_password": "secret42"}, headers=headers)
+    assert resp.status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {other['access_token']}"}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": other["refresh_token"]}).status_code == 401
+
+
+def test_access_token_without_session_is_rejected(client: TestClient, manager_user: User):
+    token = auth_service.create_access_token({"sub": str(manager_user.id), "role": "manager"})
+    resp = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 401
+
+
+def test_verified_tokens_are_cached_until_exp(monkeypatch: pytest.MonkeyPatch):
+    token = auth_service.create_access_token({"sub": "7"}, expires_delta=timedelta(minutes=5))
+    hits = auth_service.JWT_CACHE.value(result="hit")
+
+    assert auth_service.decode_access_token(token)["sub"] == "7"
+    assert auth_service.decode_access_token(token)["sub"] == "7"
+    assert auth_service.JWT_CACHE.value(result="hit") == hits + 1
+    assert auth_service.decode_access_token(token + "x") is None
+
+    later = time.time() + 600
+    monkeypatch.setattr(auth_service, "time", SimpleNamespace(time=lambda: later))
+    assert auth_service.decode_access_token(token) is None
@@ -0,0 +1,165 @@
+"""Tests for warehouse availability writes on result lines."""
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote, QuoteItem
+from app.models.quote_result_line import QuoteResultLine
+from app.models.sku import SKU
+from app.models.technique import Technique
+from app.models.user import User
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def _quote_with_lines(db: Session, user_id: int, status: str, skus: list[SKU]) -> tuple[Quote, list[QuoteResultLine]]:
+    tech = db.execute(select(Technique)).scalars().first()
+    if tech is None:
+        tech = Technique(manufacturer="X", model="Y")
+        db.add(tech)
+        db.flush()
+    q = Quote(created_by=user_id, status=status, zones_json=json.dumps([]))
+    db.add(q)
+    db.flush()
+    db.add(QuoteItem(quote_id=q.id, technique_id=tech.id, qty=1))
+    lines = [QuoteResultLine(quote_id=q.id, sku_id=s.id, qty=i + 1) for i, s in enumerate(skus)]
+    db.add_all(lines)
+    db.commit()
+    return q, lines
+
+
+def _skus(db: Session, n: int) -> list[SKU]:
+    skus = [SKU(code=f"SKU-{i}", name=f"Позиция {i}", unit="шт") for i in range(n)]
+    db.add_all(skus)
+    db.commit()
+    return skus
+
+
+def _availability(db: Session, line_ids: list[int]) -> list[tuple]:
+    db.expire_all()
+    return [
+        (ln.availability_status, ln.availability_comment)
+        for ln in db.execute(
+            select(QuoteResultLine).where(QuoteResultLine.id.in_(line_ids)).order_by(QuoteResultLine.id)
+        ).scalars()
+    ]
+
+
+def test_warehouse_confirm_writes_all_lines(
+    client: TestClient, manager_user: User, warehouse_user: User, db: Session,
+):
+    q, lines = _quote_with_lines(db, manager_user.id, "warehouse_check", _skus(db, 3))
+    token = _token(client, "warehouse", "wh123")
+
+    resp = client.post(
+        f"/quotes/{q.id}/warehouse/confirm",
+        json={"decision": "confirmed", "lines": [
+            {"line_id": lines[0].id, "availability_status": "in_stock"},
+            {"line_id": lines[1].id, "availability_status": "to_order", "availability_comment": "2 недели"},
+            {"line_id": lines[2].id, "availability_status": "absent"},
+        ]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200
+    assert _availability(db, [ln.id for ln in lines]) == [
+        ("in_stock", None), ("to_order", "2 недели"), ("absent", None),
+    ]
+
+
+def test_warehouse_confirm_rejects_foreign_line(
+    client: TestClient, manager_user: User, warehouse_user: User, db: Session,
+):
+    skus = _skus(db, 1)
+    q, lines = _quote_with_lines(db, manager_user.id, "warehouse_check", skus)
+    _, other = _quote_with_lines(db, manager_user.id, "warehouse_check", skus)
+    token = _token(client, "warehouse", "wh123")
+
+    resp = client.post(
+        f"/quotes/{q.id}/warehouse/confirm",
+        json={"decision": "confirmed", "lines": [
+            {"line_id": lines[0].id, "availability_status": "in_stock"},
+            {"line_id": other[0].id, "availability_status": "in_stock"},
+        ]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 404
+    db.expire_all()
+    assert db.get(Quote, q.id).status == "warehouse_check"
+    assert _availability(db, [lines[0].id, other[0].id]) == [(None, None), (None, None)]
+
+
+def test_bulk_availability_spans_quotes(
+    client: TestClient, manager_user: User, warehouse_user: User, db: Session,
+):
+    skus = _skus(db, 2)
+    q1, lines1 = _quote_with_lines(db, manager_user.id, "warehouse_check", skus)
+    q2, lines2 = _quote_with_lines(db, manager_user.id, "warehouse_check", skus)
+    headers = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+
+    payload = [
+        {"line_id": ln.id, "availability_status": "to_order", "availability_comment": "поставка"}
+        for ln in lines1 + lines2
+    ]
+    resp = client.post("/warehouse/availability", json={"lines": payload}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json() == {"updated": 4, "quote_ids": [q1.id, q2.id]}
+    assert _availability(db, [ln.id for ln in lines1 + lines2]) == [("to_order", "поставка")] * 4
+    db.expire_all()
+    assert db.get(Quote, q1.id).status == "warehouse_check"
+
+
+def test_bulk_availability_rejects_closed_quote_and_unknown_lines(
+    client: TestClient, manager_user: User, warehouse_user: User, db: Session,
+):
+    skus = _skus(db, 1)
+    _, open_lines = _quote_with_lines(db, manager_user.id, "warehouse_check", skus)
+    closed, closed_lines = _quote_with_lines(db, manager_user.id, "confirmed", skus)
+    headers = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+
+    resp = client.post("/warehouse/availability", json={"lines": [
+        {"line_id": open_lines[0].id, "availability_status": "in_stock"},
+        {"line_id": closed_lines[0].id, "availability_status": "in_stock"},
+    ]}, headers=headers)
+    assert resp.status_code == 409
+    assert str(closed.id) in resp.json()["detail"]
+
+    resp = client.post("/warehouse/availability", json={"lines": [
+        {"line_id": 999_999, "availability_status": "in_stock"},
+    ]}, headers=headers)
+    assert resp.status_code == 404
+    assert _availability(db, [open_lines[0].id]) == [(None, None)]
+
+
+def test_confirmed_availability_prefills_next_check(
+    client: TestClient, manager_user: User, warehouse_user: User, db: Session,
+):
+    skus = _skus(db, 3)
+    first, first_lines = _quote_with_lines(db, manager_user.id, "warehouse_check", skus[:2])
+    wh = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+    mgr = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    resp = client.post(f"/quotes/{first.id}/warehouse/confirm", json={"decision": "confirmed", "lines": [
+        {"line_id": first_lines[0].id, "availability_status": "to_order", "availability_comment": "2 недели"},
+        {"line_id": first_lines[1].id, "availability_status": "absent"},
+    ]}, headers=wh)
+    assert resp.status_code == 200
+
+    second, second_lines = _quote_with_lines(db, manager_user.id, "calculated", skus)
+    assert client.post(f"/quotes/{second.id}/status", json={"status": "approved"}, headers=mgr).json() == {
+        "id": second.id, "status": "warehouse_check",
+    }
+
+    result = client.get(f"/quotes/{second.id}/result", headers=wh).json()
+    by_sku = {ln["sku_id"]: ln for ln in result}
+    assert (by_sku[skus[0].id]["availability_status"], by_sku[skus[0].id]["availability_comment"]) == (
+        "to_order", "2 недели",
+    )
+    assert by_sku[skus[1].id]["availability_status"] == "absent"
+    assert by_sku[skus[0].id]["availability_as_of"] is not None
+    # No known state for this SKU yet: left for the warehouse to fill in.
+    assert by_sku[skus[2].id]["availability_status"] is None
+    assert by_sku[skus[2].id]["availability_as_of"] is None
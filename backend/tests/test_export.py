@@ -1,7 +1,12 @@
 """Tests for XLSX export endpoint."""
 import json
+import os
+import threading
+import time
+import zipfile
 from io import BytesIO
 
+import pytest
 from fastapi.testclient import TestClient
 from openpyxl import load_workbook
 from sqlalchemy.orm import Session
@@ -11,6 +16,8 @@ from app.models.quote_result_line import QuoteResultLine
 from app.models.sku import SKU
 from app.models.technique import Technique
 from app.models.user import User
+from app.services import bulk_export, export_cache
+from app.services import xlsx_export
 from app.services.xlsx_export import _safe
 
 XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
@@ -106,3 +113,213 @@ def test_export_no_results_returns_409(client: TestClient, manager_user: User, d
     )
 
     assert resp.status_code == 409
+
+
+def test_export_streams_large_quote(client: TestClient, manager_user: User, db: Session, monkeypatch):
+    monkeypatch.setattr(xlsx_export, "STREAM_CHUNK", 4096)
+    tech = Technique(manufacturer="X", model="Y")
+    db.add(tech)
+    db.flush()
+
+    skus = [SKU(code=f"BIG-{i:05d}", name=f"Позиция {i}", unit="шт") for i in range(3000)]
+    db.add_all(skus)
+    db.flush()
+
+    q = Quote(created_by=manager_user.id, status="calculated", zones_json=json.dumps([]))
+    db.add(q)
+    db.flush()
+    db.add(QuoteItem(quote_id=q.id, technique_id=tech.id, qty=1))
+    db.add_all([QuoteResultLine(quote_id=q.id, sku_id=s.id, qty=i + 1) for i, s in enumerate(skus)])
+    db.commit()
+
+    # The archive is handed out in several chunks rather than one buffer.
+    chunks = list(xlsx_export.stream_workbook(xlsx_export.build_workbook(db, q.id)))
+    assert len(chunks) > 1
+    assert all(len(c) == 4096 for c in chunks[:-1])
+
+    token = _token(client, "manager", "mgr123")
+    resp = client.post(f"/quotes/{q.id}/export/xlsx", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert "content-length" not in resp.headers
+    ws = load_workbook(BytesIO(resp.content)).active
+    assert ws.max_row == 5 + len(skus)
+    assert [c.value for c in ws[6]] == ["BIG-00000", "Позиция 0", "шт", 1, None]
+    assert ws.cell(row=ws.max_row, column=4).value == len(skus)
+
+
+def _spooled_workbook(rows: int):
+    wb = xlsx_export.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for i in range(rows):
+        ws.append([f"R-{i:05d}", "x" * 200, i])
+    return wb, ws._writer.out
+
+
+def test_closing_the_stream_abandons_the_save(monkeypatch):
+    monkeypatch.setattr(xlsx_export, "STREAM_CHUNK", 1024)
+    monkeypatch.setattr(xlsx_export, "STREAM_QUEUE_CHUNKS", 1)
+    wb, spool = _spooled_workbook(5000)
+
+    stream = xlsx_export.stream_workbook(wb)
+    next(stream)
+    stream.close()
+
+    # The pool thread notices the cancellation and removes the spooled sheet.
+    deadline = time.monotonic() + 5
+    while os.path.exists(spool) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not os.path.exists(spool)
+
+
+def test_stalled_save_times_out(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(xlsx_export, "STREAM_TIMEOUT_SECONDS", 0.1)
+    monkeypatch.setattr(xlsx_export, "_save", lambda wb, writer: release.wait(5))
+    try:
+        with pytest.raises(xlsx_export.ExportStreamTimeout):
+            list(xlsx_export.stream_workbook(xlsx_export.Workbook(write_only=True)))
+    finally:
+        release.set()
+
+
+def test_export_cached_by_run_and_revision(
+    client: TestClient, admin_user: User, db: Session, export_cache_dir,
+):
+    tech = Technique(manufacturer="X", model="Y")
+    sku = SKU(code="EX-001", name="Трубка", unit="шт")
+    db.add_all([tech, sku])
+    db.flush()
+    q = Quote(created_by=admin_user.id, status="calculated", zones_json=json.dumps([]))
+    db.add(q)
+    db.flush()
+    db.add(QuoteItem(quote_id=q.id, technique_id=tech.id, qty=1))
+    line = QuoteResultLine(quote_id=q.id, sku_id=sku.id, qty=5)
+    db.add(line)
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    url = f"/quotes/{q.id}/export/xlsx"
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert len(list(export_cache_dir.glob("*.xlsx"))) == 1
+
+    second = client.post(url, headers=headers)
+    assert second.status_code == 200
+    assert second.headers["etag"] == etag
+    assert second.content == first.content
+
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+    # A 304 is only meaningful for GET; POST always gets the file.
+    posted = client.post(url, headers={**headers, "If-None-Match": etag})
+    assert posted.status_code == 200
+    assert posted.content == first.content
+
+    client.patch(f"/quotes/{q.id}/result/{line.id}", json={"qty": 7, "note": "изм."}, headers=headers)
+    third = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+    assert load_workbook(BytesIO(third.content)).active.cell(row=6, column=4).value == 7
+
+    # The manager shown in the header is part of the key too.
+    admin_user.login = "chief"
+    db.commit()
+    fourth = client.get(url, headers={**headers, "If-None-Match": third.headers["etag"]})
+    assert fourth.status_code == 200
+    assert load_workbook(BytesIO(fourth.content)).active.cell(row=3, column=2).value == "chief"
+
+
+def test_open_entry_survives_eviction(export_cache_dir):
+    list(export_cache.write_through("k", iter([b"x" * 100])))
+    f = export_cache.open_entry("k")
+    export_cache.evict(max_bytes=0)
+    assert not (export_cache_dir / "k.xlsx").exists()
+    assert b"".join(export_cache.iter_file(f)) == b"x" * 100
+    assert f.closed
+    assert export_cache.open_entry("k") is None
+
+
+def test_export_cache_evicts_least_recently_used(export_cache_dir):
+    for key in ("a", "b", "c"):
+        list(export_cache.write_through(key, iter([b"x" * 100])))
+    os.utime(export_cache_dir / "a.xlsx", (1, 1))
+    os.utime(export_cache_dir / "b.xlsx", (2, 2))
+    assert export_cache.lookup("a") is not None  # hit refreshes "a"
+
+    export_cache.evict(max_bytes=250)
+    assert sorted(p.name for p in export_cache_dir.glob("*.xlsx")) == ["a.xlsx", "c.xlsx"]
+
+
+def _calculated_quotes(db: Session, user: User, n: int) -> list[Quote]:
+    tech = Technique(manufacturer="X", model="Y")
+    sku = SKU(code="BULK-1", name="Трубка", unit="шт")
+    db.add_all([tech, sku])
+    db.flush()
+    quotes = []
+    for i in range(n):
+        q = Quote(created_by=user.id, status="calculated", customer_name=f"Клиент {i}", zones_json="[]")
+        db.add(q)
+        db.flush()
+        db.add(QuoteItem(quote_id=q.id, technique_id=tech.id, qty=1))
+        db.add(QuoteResultLine(quote_id=q.id, sku_id=sku.id, qty=i + 1))
+        quotes.append(q)
+    db.commit()
+    return quotes
+
+
+def test_bulk_export_zip_renders_in_worker_pool(client: TestClient, manager_user: User, db: Session):
+    quotes = _calculated_quotes(db, manager_user, 3)
+    draft = Quote(created_by=manager_user.id, status="draft", zones_json="[]")
+    db.add(draft)
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    try:
+        resp = client.post(
+            "/quotes/export", json={"quote_ids": [q.id for q in quotes] + [draft.id]}, headers=headers,
+        )
+    finally:
+        bulk_export.shutdown_pool()
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/zip"
+
+    with zipfile.ZipFile(BytesIO(resp.content)) as zf:
+        assert sorted(zf.namelist()) == sorted(f"quote_{q.id}.xlsx" for q in quotes)
+        for i, q in enumerate(quotes):
+            ws = load_workbook(BytesIO(zf.read(f"quote_{q.id}.xlsx"))).active
+            assert ws["B2"].value == q.id
+            assert ws.cell(row=6, column=4).value == i + 1
+
+
+def test_bulk_export_rerenders_an_entry_evicted_after_lookup(
+    client: TestClient, manager_user: User, db: Session, export_cache_dir, monkeypatch,
+):
+    quotes = _calculated_quotes(db, manager_user, 2)
+    monkeypatch.setattr(bulk_export, "EXPORT_WORKERS", 0)
+    # Every lookup "hits" a file that is already gone by the time it is read.
+    monkeypatch.setattr(export_cache, "lookup", lambda key: export_cache_dir / "evicted.xlsx")
+
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    resp = client.post("/quotes/export", json={"quote_ids": [q.id for q in quotes]}, headers=headers)
+    assert resp.status_code == 200
+    with zipfile.ZipFile(BytesIO(resp.content)) as zf:
+        for i, q in enumerate(quotes):
+            ws = load_workbook(BytesIO(zf.read(f"quote_{q.id}.xlsx"))).active
+            assert ws.cell(row=6, column=4).value == i + 1
+
+
+def test_bulk_export_by_filter_as_one_workbook(
+    client: TestClient, manager_user: User, db: Session, monkeypatch,
+):
+    monkeypatch.setattr(bulk_export, "EXPORT_WORKERS", 0)
+    quotes = _calculated_quotes(db, manager_user, 2)
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    resp = client.post("/quotes/export", json={"status": "calculated", "format": "xlsx"}, headers=headers)
+    assert resp.status_code == 200
+    wb = load_workbook(BytesIO(resp.content))
+    assert wb.sheetnames == [f"КП {q.id}" for q in quotes]
+
+    resp = client.post("/quotes/export", json={"status": "confirmed"}, headers=headers)
+    assert resp.status_code == 409
@@ -0,0 +1,70 @@
+"""Tests for JSON logging, request ids and debug sampling."""
+import json
+import logging
+import queue
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import logging_config
+from app.logging_config import ContextFilter, JsonFormatter, request_id_var
+
+
+def _record(msg: str = "hello %s", args=("world",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_context_and_extra():
+    token = request_id_var.set("req-1")
+    try:
+        record = _record(quote_id=7)
+        assert ContextFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "hello world"
+    assert data["level"] == "INFO" and data["logger"] == "app.test"
+    assert data["request_id"] == "req-1" and data["quote_id"] == 7
+    assert "trace_id" not in data  # None values are omitted
+
+
+def test_sampled_records(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(logging_config, "LOG_SAMPLE_RATE", 0.0)
+    assert not ContextFilter().filter(_record(sampled=True))
+    assert ContextFilter().filter(_record())
+    monkeypatch.setattr(logging_config, "LOG_SAMPLE_RATE", 1.0)
+    assert ContextFilter().filter(_record(sampled=True))
+
+
+def test_tracebacks_reach_the_exc_field():
+    handler = logging_config._DroppingQueueHandler(queue.Queue())
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        record = logging.LogRecord("app.test", logging.ERROR, __file__, 1, "boom %s", ("now",), sys.exc_info())
+    handler.handle(record)
+
+    data = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+    assert data["message"] == "boom now"
+    assert "ZeroDivisionError" in data["exc"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = logging_config._DroppingQueueHandler(queue.Queue(maxsize=1))
+    before = logging_config.LOG_RECORDS_DROPPED.value()
+    handler.handle(_record())
+    handler.handle(_record())
+    assert logging_config.LOG_RECORDS_DROPPED.value() == before + 1
+
+
+def test_request_id_header(client: TestClient):
+    resp = client.get("/zones", headers={"X-Request-ID": "abc-123"})
+    assert resp.headers["x-request-id"] == "abc-123"
+
+    generated = client.get("/zones", headers={"X-Request-ID": "bad id\n"}).headers["x-request-id"]
+    assert generated != "bad id\n" and len(generated) == 32
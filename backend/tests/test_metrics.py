@@ -0,0 +1,89 @@
+"""Tests for the metrics registry, pool instrumentation and /metrics."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from app.db import pool as db_pool
+from app.routes import metrics as metrics_route
+from app.services import http_metrics, metrics
+
+
+def test_render_prometheus_text():
+    hist = metrics.Histogram("test_render_seconds", "Test histogram.", ["op"], buckets=(0.1, 1.0))
+    hist.observe(0.05, op="a")
+    hist.observe(0.5, op="a")
+    counter = metrics.Counter("test_render_total", "Test counter.", ["op"])
+    counter.inc(op='x"y')
+
+    out = metrics.render()
+    assert "# TYPE test_render_seconds histogram" in out
+    assert 'test_render_seconds_bucket{op="a",le="0.1"} 1' in out
+    assert 'test_render_seconds_bucket{op="a",le="+Inf"} 2' in out
+    assert 'test_render_seconds_count{op="a"} 2' in out
+    assert 'test_render_total{op="x\\"y"} 1' in out
+
+
+def test_pool_checkout_and_timeouts_are_recorded(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=db_pool.TimedQueuePool, pool_logging_name="test_pool",
+        pool_size=1, max_overflow=0, pool_timeout=0.01,
+    )
+    db_pool.instrument(engine, "test_pool")
+    before = db_pool.POOL_CHECKOUT_SECONDS.count(pool="test_pool")
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        assert db_pool.POOL_TIMEOUTS.value(pool="test_pool") == 1
+        assert 'db_pool_checked_out{pool="test_pool"} 1' in metrics.render()
+
+    assert db_pool.POOL_CHECKOUT_SECONDS.count(pool="test_pool") == before + 2
+    assert 'db_pool_checked_out{pool="test_pool"} 0' in metrics.render()
+    db_pool._engines.pop("test_pool")
+    engine.dispose()
+
+
+def test_engine_options_from_environment(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(db_pool, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(db_pool, "DB_PGBOUNCER", True)
+    options = db_pool.engine_options("postgresql+psycopg://u:p@h/db", "primary")
+    assert options["pool_size"] == 20
+    assert options["connect_args"] == {"prepare_threshold": None}
+    assert db_pool.engine_options("postgresql+psycopg://u:p@h/db", "a", is_async=True)["poolclass"] is db_pool.TimedAsyncQueuePool
+    assert db_pool.engine_options("sqlite://", "primary") == {}
+
+
+def test_metrics_endpoint(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    # No token outside development: not served at all.
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(metrics_route, "APP_ENV", "development")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'db_pool_size{pool="primary"}' in resp.text
+
+    monkeypatch.setattr(metrics_route, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_http_metrics_by_route_template(client: TestClient, admin_user, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(metrics_route, "METRICS_TOKEN", "s3cret")
+    token = client.post("/auth/login", json={"login": "admin", "password": "admin123"}).json()["access_token"]
+    labels = {"method": "GET", "route": "/quotes/{quote_id}"}
+    before = http_metrics.HTTP_REQUESTS.value(status="404", **labels)
+
+    client.get("/quotes/424242", headers={"Authorization": f"Bearer {token}"})
+    client.get("/no/such/path")
+
+    assert http_metrics.HTTP_REQUESTS.value(status="404", **labels) == before + 1
+    assert http_metrics.HTTP_REQUEST_SECONDS.count(**labels) >= 1
+    assert http_metrics.HTTP_REQUESTS.value(method="GET", route="unmatched", status="404") >= 1
+    assert http_metrics.HTTP_IN_FLIGHT.value() == 0
+
+    text = client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).text
+    assert 'http_response_size_bytes_count{method="GET",route="/quotes/{quote_id}"}' in text
+    assert "anyio_threadpool_total 40" in text
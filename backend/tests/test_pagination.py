@@ -0,0 +1,151 @@
+"""Tests for keyset-paginated listings."""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote, QuoteItem
+from app.models.sku import SKU
+from app.models.technique import Technique
+from app.models.user import User
+from app.repo.pagination import DEFAULT_PAGE_SIZE, encode_cursor
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def _seed_skus(db: Session, n: int) -> None:
+    for i in range(n):
+        db.add(SKU(code=f"S-{i:02d}", name="Трубка" if i % 2 else "Баллон", unit="шт"))
+    db.commit()
+
+
+def test_cursor_walks_all_pages(client: TestClient, manager_user: User, db: Session):
+    _seed_skus(db, 7)
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    codes: list[str] = []
+    params: dict = {"limit": 3, "include_total": "true"}
+    while True:
+        resp = client.get("/skus", params=params, headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers["X-Total-Count"] == "7"
+        codes += [s["code"] for s in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+
+    assert codes == [f"S-{i:02d}" for i in range(7)]
+
+
+def test_descending_sort_with_filter(client: TestClient, manager_user: User, db: Session):
+    _seed_skus(db, 6)
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    first = client.get(
+        "/skus",
+        params={"limit": 2, "sort": "-code", "filter[name]": "рубка"},
+        headers=headers,
+    )
+    assert [s["code"] for s in first.json()] == ["S-05", "S-03"]
+
+    second = client.get(
+        "/skus",
+        params={
+            "limit": 2, "sort": "-code", "filter[name]": "рубка",
+            "cursor": first.headers["X-Next-Cursor"],
+        },
+        headers=headers,
+    )
+    assert [s["code"] for s in second.json()] == ["S-01"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_without_limit_returns_default_page(client: TestClient, manager_user: User, db: Session):
+    _seed_skus(db, DEFAULT_PAGE_SIZE + 1)
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    resp = client.get("/skus", headers=headers)
+    assert len(resp.json()) == DEFAULT_PAGE_SIZE
+    rest = client.get("/skus", params={"cursor": resp.headers["X-Next-Cursor"]}, headers=headers)
+    assert [s["code"] for s in rest.json()] == [f"S-{DEFAULT_PAGE_SIZE:02d}"]
+
+
+def test_text_filter_treats_wildcards_literally(client: TestClient, manager_user: User, db: Session):
+    db.add_all([SKU(code="A_1", name="x", unit="шт"), SKU(code="AB1", name="y", unit="шт")])
+    db.commit()
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    assert [s["code"] for s in client.get("/skus", params={"filter[code]": "A_"}, headers=headers).json()] == ["A_1"]
+    assert client.get("/skus", params={"filter[code]": "%"}, headers=headers).json() == []
+
+
+def test_bad_sort_and_cursor_rejected(client: TestClient, admin_user: User, db: Session):
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+
+    assert client.get("/admin/users", params={"sort": "password_hash"}, headers=headers).status_code == 400
+    assert client.get("/admin/users", params={"filter[password_hash]": "x"}, headers=headers).status_code == 400
+    assert client.get("/admin/users", params={"cursor": "garbage"}, headers=headers).status_code == 400
+
+    page = client.get("/admin/users", params={"limit": 1, "sort": "login"}, headers=headers)
+    assert page.status_code == 200
+
+
+def test_malformed_cursor_values_rejected(client: TestClient, admin_user: User):
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    for values in ([1], [1, 2, 3], [[1], 2], ["a", "b"], ["a", {"$d": "2026-01-01"}], ["a", True], {"a": 1}, "x"):
+        raw = json.dumps({"s": "login", "v": values}).encode()
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        resp = client.get("/admin/users", params={"limit": 1, "sort": "login", "cursor": cursor}, headers=headers)
+        assert resp.status_code == 400, values
+
+
+def test_cursor_value_must_match_the_sort_column_type(client: TestClient, admin_user: User):
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    for sort, value in (("id", "1"), ("id", 1.5), ("login", 5), ("is_active", 1), ("login", None)):
+        cursor = encode_cursor(sort, [value, 1])
+        resp = client.get("/admin/users", params={"limit": 1, "sort": sort, "cursor": cursor}, headers=headers)
+        assert resp.status_code == 400, (sort, value)
+    cursor = encode_cursor("-updated_at", [datetime(2026, 1, 1).date(), 1])
+    resp = client.get("/quotes", params={"limit": 1, "cursor": cursor}, headers=headers)
+    assert resp.status_code == 400
+    cursor = encode_cursor("-updated_at", [datetime(2026, 1, 1), 1])
+    assert client.get("/quotes", params={"limit": 1, "cursor": cursor}, headers=headers).status_code == 200
+
+
+def test_quotes_paginate_by_updated_at_with_items_count(
+    client: TestClient, manager_user: User, db: Session,
+):
+    tech = Technique(manufacturer="X", model="Y")
+    db.add(tech)
+    db.flush()
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    # q1 and q2 share updated_at: the id tiebreak must keep them apart across pages
+    stamps = [base, base + timedelta(hours=1), base + timedelta(hours=1), base + timedelta(hours=2)]
+    quotes = []
+    for i, ts in enumerate(stamps):
+        q = Quote(created_by=manager_user.id, status="draft", created_at=ts, updated_at=ts)
+        db.add(q)
+        db.flush()
+        for _ in range(i + 1):
+            db.add(QuoteItem(quote_id=q.id, technique_id=tech.id, qty=1))
+        quotes.append(q)
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    seen: list[tuple[int, int]] = []
+    params: dict = {"limit": 2}
+    while True:
+        resp = client.get("/quotes", params=params, headers=headers)
+        assert resp.status_code == 200
+        seen += [(r["id"], r["items_count"]) for r in resp.json()]
+        if "X-Next-Cursor" not in resp.headers:
+            break
+        params["cursor"] = resp.headers["X-Next-Cursor"]
+
+    q0, q1, q2, q3 = (q.id for q in quotes)
+    assert seen == [(q3, 4), (q2, 3), (q1, 2), (q0, 1)]
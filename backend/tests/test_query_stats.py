@@ -0,0 +1,103 @@
+"""Tests for per-request query counting and query budgets of write paths."""
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.db import query_stats
+from app.models.engine_option import EngineOption
+from app.models.quote import Quote, QuoteItem
+from app.models.quote_result_line import QuoteResultLine
+from app.models.rule import Rule
+from app.models.sku import SKU
+from app.models.technique import Technique
+from app.models.user import User
+from app.services.calc_engine import _dedup_items, calculate_quote
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def _quote(db: Session, user_id: int, status: str, n_options: int, n_skus: int, prefix: str = "") -> Quote:
+    """A quote whose items use ``n_options`` engine options and whose rules yield ``n_skus`` lines."""
+    tech = Technique(manufacturer="KAMAZ", model="6520")
+    db.add(tech)
+    db.flush()
+    options = [EngineOption(technique_id=tech.id, engine_name=f"ENG-{i}") for i in range(n_options)]
+    skus = [SKU(code=f"{prefix}SKU-{i}", name=f"Позиция {i}", unit="шт") for i in range(n_skus)]
+    db.add_all(options + skus)
+    db.flush()
+    db.add_all(
+        Rule(technique_id=tech.id, conditions_json=json.dumps({}), actions_json=json.dumps([{"sku_id": s.id}]))
+        for s in skus
+    )
+    q = Quote(created_by=user_id, status=status, zones_json=json.dumps([]))
+    db.add(q)
+    db.flush()
+    db.add_all(QuoteItem(quote_id=q.id, technique_id=tech.id, engine_option_id=o.id, qty=1) for o in options)
+    db.commit()
+    return q
+
+
+def test_server_timing_header(client: TestClient, admin_user: User):
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    resp = client.get("/zones", headers=headers)
+    assert resp.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="' in resp.headers["server-timing"]
+
+
+def test_slow_request_is_logged(
+    client: TestClient, admin_user: User, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture,
+):
+    monkeypatch.setattr(query_stats, "DB_QUERY_WARN_COUNT", 0)
+    with caplog.at_level(logging.WARNING, logger="app.db.query_stats"):
+        client.post("/auth/login", json={"login": "admin", "password": "admin123"})
+    assert any("POST /auth/login" in r.getMessage() for r in caplog.records)
+
+
+def test_dedup_items_loads_engine_names_in_one_query(db: Session, manager_user: User):
+    q = _quote(db, manager_user.id, "draft", n_options=5, n_skus=0)
+    items = list(db.query(QuoteItem).filter_by(quote_id=q.id))
+
+    with query_stats.track() as stats:
+        deduped = _dedup_items(items, db)
+    assert stats.count == 1
+    assert sorted(d.engine_name for d in deduped) == [f"ENG-{i}" for i in range(5)]
+
+
+def test_calculate_query_count_does_not_grow_with_lines(db: Session, manager_user: User):
+    counts = []
+    for n in (2, 20):
+        q = _quote(db, manager_user.id, "draft", n_options=n, n_skus=n, prefix=f"{n}-")
+        with query_stats.track() as stats:
+            lines = calculate_quote(db, q.id)
+        assert len(lines) == n and all(ln.id for ln in lines)
+        counts.append(stats.count)
+    assert counts[0] == counts[1]
+
+
+def test_warehouse_confirm_query_budget(
+    client: TestClient, manager_user: User, warehouse_user: User, db: Session, assert_max_queries,
+):
+    q = _quote(db, manager_user.id, "warehouse_check", n_options=0, n_skus=0)
+    skus = [SKU(code=f"W-{i}", name=f"Позиция {i}", unit="шт") for i in range(25)]
+    db.add_all(skus)
+    db.flush()
+    lines = [QuoteResultLine(quote_id=q.id, sku_id=s.id, qty=1) for s in skus]
+    db.add_all(lines)
+    db.commit()
+    headers = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+
+    resp = client.post(
+        f"/quotes/{q.id}/warehouse/confirm",
+        json={"decision": "confirmed", "comment": "ок", "lines": [
+            {"line_id": ln.id, "availability_status": "in_stock"} for ln in lines
+        ]},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"id": q.id, "status": "confirmed"}
+    assert_max_queries(resp, 15)
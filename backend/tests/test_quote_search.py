@@ -0,0 +1,138 @@
+"""Tests for quote full-text search."""
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote, QuoteItem
+from app.models.technique import Technique
+from app.models.user import User
+from app.repo.pagination import ListField, ListQuery, paginate
+from app.services import quote_search
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def _create(client: TestClient, headers: dict, tech_id: int, customer: str, comment: str | None = None) -> int:
+    resp = client.post(
+        "/quotes",
+        json={"customer_name": customer, "comment": comment, "items": [{"technique_id": tech_id, "qty": 1}]},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def _search(client: TestClient, headers: dict, q: str) -> list[int]:
+    resp = client.get("/quotes", params={"search": q}, headers=headers)
+    assert resp.status_code == 200
+    return sorted(r["id"] for r in resp.json())
+
+
+def test_search_covers_customer_comment_and_technique(
+    client: TestClient, manager_user: User, db: Session,
+):
+    kamaz = Technique(manufacturer="KAMAZ", model="6520")
+    volvo = Technique(manufacturer="Volvo", model="EC480")
+    db.add_all([kamaz, volvo])
+    db.commit()
+    headers = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    a = _create(client, headers, kamaz.id, "Nornickel", "urgent delivery")
+    b = _create(client, headers, volvo.id, "Polymetal")
+
+    assert _search(client, headers, "nornick") == [a]
+    assert _search(client, headers, "urgent") == [a]
+    assert _search(client, headers, "ec480") == [b]
+    assert _search(client, headers, "kamaz nornickel") == [a]
+    assert _search(client, headers, "kamaz polymetal") == []
+
+
+def test_search_text_follows_quote_and_technique_edits(
+    client: TestClient, admin_user: User, db: Session,
+):
+    tech = Technique(manufacturer="Liebherr", model="R9800")
+    db.add(tech)
+    db.commit()
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+
+    qid = _create(client, headers, tech.id, "Alrosa")
+    resp = client.put(
+        f"/quotes/{qid}",
+        json={"customer_name": "Evraz", "comment": None},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert _search(client, headers, "alrosa") == []
+    assert _search(client, headers, "evraz") == [qid]
+
+    client.patch(f"/techniques/{tech.id}", json={"model": "R9400"}, headers=headers)
+    assert _search(client, headers, "r9800") == []
+    assert _search(client, headers, "r9400") == [qid]
+
+
+def test_postgres_rank_is_an_exact_sort_key(monkeypatch):
+    monkeypatch.setattr(quote_search, "is_postgres", lambda db: True)
+    _, rank = quote_search.search_filter(None, "ромашка")
+    sql = str(rank.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("CAST(ts_rank(") and sql.endswith("AS INTEGER)")
+
+
+def test_technique_rename_refreshes_quotes_in_batches(
+    client: TestClient, admin_user: User, db: Session, monkeypatch,
+):
+    monkeypatch.setattr(quote_search, "REFRESH_BATCH", 2)
+    tech = Technique(manufacturer="Komatsu", model="PC2000")
+    db.add(tech)
+    db.commit()
+    headers = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    ids = [_create(client, headers, tech.id, f"Client {i}") for i in range(5)]
+
+    calls: list[list[int]] = []
+    refresh = quote_search.refresh_search_text
+
+    def recording_refresh(db: Session, quote_ids) -> None:
+        calls.append(list(quote_ids))
+        refresh(db, quote_ids)
+
+    monkeypatch.setattr(quote_search, "refresh_search_text", recording_refresh)
+    client.patch(f"/techniques/{tech.id}", json={"model": "PC4000"}, headers=headers)
+
+    assert calls == [ids[0:2], ids[2:4], ids[4:5]]
+    assert _search(client, headers, "pc4000") == ids
+    assert _search(client, headers, "pc2000") == []
+
+
+def test_postgres_search_pages_follow_relevance(pg_db: Session):
+    user = User(login="pg-search", password_hash="x", role="manager")
+    pg_db.add(user)
+    pg_db.flush()
+    texts = ["kamaz kamaz kamaz", "kamaz 6520", "kamaz 6520", "kamaz 6520", "volvo kamaz ec480", "volvo ec480"]
+    quotes = [Quote(created_by=user.id, status="draft", search_text=t) for t in texts]
+    pg_db.add_all(quotes)
+    pg_db.flush()
+
+    match, rank = quote_search.search_filter(pg_db, "kamaz")
+    expected = [
+        qid for qid, _ in sorted(
+            pg_db.execute(select(Quote.id, rank).where(match)).all(), key=lambda r: (-r[1], -r[0]),
+        )
+    ]
+    seen: list[int] = []
+    query = ListQuery(limit=2)
+    while True:
+        page = paginate(
+            pg_db, select(Quote).where(match),
+            fields={"rank": ListField(rank)}, id_column=Quote.id, query=query, default_sort="-rank",
+        )
+        seen += [q.id for q in page.items]
+        if page.next_cursor is None:
+            break
+        query.cursor = page.next_cursor
+
+    # Every match exactly once, most relevant first, ties broken by id across pages.
+    assert seen == expected
+    assert sorted(seen) == sorted(q.id for q in quotes[:5])
+    assert seen[0] == quotes[0].id
@@ -0,0 +1,218 @@
+"""Tests for the /quotes/stats and /warehouse/demand rollups."""
+import json
+from datetime import date, datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote
+from app.models.quote_stats import QuoteStatsDaily, SkuDemand, SkuVolume
+from app.models.rule import Rule
+from app.models.sku import SKU
+from app.models.technique import Technique
+from app.models.user import User
+from app.services.quote_stats import lock_quote, rebuild_quote_stats, record_result_change, record_status_change
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def _snapshot(db: Session) -> tuple[set, set, set]:
+    db.expire_all()
+    stats = {
+        (r.created_by, r.status, r.day, r.quotes_count)
+        for r in db.execute(select(QuoteStatsDaily)).scalars()
+        if r.quotes_count
+    }
+    volume = {(r.sku_id, r.total_qty) for r in db.execute(select(SkuVolume)).scalars() if r.total_qty}
+    demand = {
+        (r.sku_id, r.status, r.period, r.total_qty)
+        for r in db.execute(select(SkuDemand)).scalars()
+        if r.total_qty
+    }
+    return stats, volume, demand
+
+
+def test_stats_follow_quote_lifecycle(
+    client: TestClient, manager_user: User, warehouse_user: User, db: Session,
+):
+    tech = Technique(manufacturer="KAMAZ", model="6520")
+    sku = SKU(code="SKU-A", name="Трубка", unit="шт")
+    db.add_all([tech, sku])
+    db.flush()
+    db.add(Rule(
+        technique_id=tech.id,
+        conditions_json=json.dumps({}),
+        actions_json=json.dumps([{"sku_id": sku.id, "multiplier": 2}]),
+    ))
+    db.commit()
+
+    mgr = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    wh = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+    item = {"technique_id": tech.id, "qty": 3}
+
+    ids = [
+        client.post("/quotes", json={"items": [item]}, headers=mgr).json()["id"]
+        for _ in range(3)
+    ]
+    assert client.post(f"/quotes/{ids[0]}/calculate", headers=mgr).status_code == 200
+    assert client.post(f"/quotes/{ids[1]}/calculate", headers=mgr).status_code == 200
+    assert client.post(f"/quotes/{ids[0]}/status", json={"status": "approved"}, headers=mgr).status_code == 200
+    resp = client.post(
+        f"/quotes/{ids[0]}/warehouse/confirm", json={"decision": "confirmed", "lines": []}, headers=wh,
+    )
+    assert resp.status_code == 200
+
+    resp = client.get("/quotes/stats", headers=mgr)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 3
+    assert body["by_status"] == {"draft": 1, "calculated": 1, "confirmed": 1}
+    assert body["by_manager"] == [{"user_id": manager_user.id, "login": "manager", "count": 3}]
+    assert sum(d["count"] for d in body["by_day"]) == 3
+    assert body["sku_volume"] == [{
+        "sku_id": sku.id, "sku_code": "SKU-A", "sku_name": "Трубка", "sku_unit": "шт", "total_qty": 12,
+    }]
+
+    # Incremental state must match a full recount.
+    incremental = _snapshot(db)
+    rebuild_quote_stats(db)
+    db.commit()
+    assert _snapshot(db) == incremental
+
+
+def test_stats_date_filter_excludes_other_days(client: TestClient, manager_user: User, db: Session):
+    tech = Technique(manufacturer="KAMAZ", model="6520")
+    db.add(tech)
+    db.commit()
+
+    mgr = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+    client.post("/quotes", json={"items": [{"technique_id": tech.id, "qty": 1}]}, headers=mgr)
+
+    body = client.get("/quotes/stats?date_from=2000-01-01&date_to=2000-01-31", headers=mgr).json()
+    assert body["total"] == 0
+    assert body["by_status"] == {}
+    assert body["by_day"] == []
+
+
+def test_warehouse_demand_tracks_status_and_qty(
+    client: TestClient, admin_user: User, manager_user: User, warehouse_user: User, db: Session,
+):
+    tech = Technique(manufacturer="KAMAZ", model="6520")
+    sku = SKU(code="SKU-A", name="Трубка", unit="шт")
+    db.add_all([tech, sku])
+    db.flush()
+    db.add(Rule(
+        technique_id=tech.id,
+        conditions_json=json.dumps({}),
+        actions_json=json.dumps([{"sku_id": sku.id, "multiplier": 1}]),
+    ))
+    db.commit()
+
+    admin = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    wh = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+    mgr = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    ids = []
+    for qty in (2, 5):
+        body = {"items": [{"technique_id": tech.id, "qty": qty}]}
+        qid = client.post("/quotes", json=body, headers=admin).json()["id"]
+        client.post(f"/quotes/{qid}/calculate", headers=admin)
+        client.post(f"/quotes/{qid}/status", json={"status": "approved"}, headers=admin)
+        ids.append(qid)
+
+    assert client.get("/warehouse/demand", headers=mgr).status_code == 403
+
+    body = client.get("/warehouse/demand", headers=wh).json()
+    assert [(r["sku_code"], r["total_qty"], r["by_status"]) for r in body] == [
+        ("SKU-A", 7, {"warehouse_check": 7}),
+    ]
+
+    client.post(f"/quotes/{ids[0]}/warehouse/confirm", json={"decision": "confirmed", "lines": []}, headers=wh)
+    line_id = client.get(f"/quotes/{ids[1]}/result", headers=admin).json()[0]["id"]
+    client.patch(f"/quotes/{ids[1]}/result/{line_id}", json={"qty": 8, "note": None}, headers=admin)
+
+    body = client.get("/warehouse/demand", headers=wh).json()
+    assert body[0]["total_qty"] == 10
+    assert body[0]["by_status"] == {"confirmed": 2, "warehouse_check": 8}
+
+    body = client.get("/warehouse/demand?status=calculated", headers=wh).json()
+    assert body == []
+
+    incremental = _snapshot(db)
+    rebuild_quote_stats(db)
+    db.commit()
+    assert _snapshot(db) == incremental
+
+
+def test_incremental_buckets_match_rebuild_at_day_end(manager_user: User, db: Session):
+    q = Quote(
+        created_by=manager_user.id, status="draft", zones_json="[]",
+        created_at=datetime(2024, 5, 31, 23, 59, 59, 900000, tzinfo=timezone.utc),
+    )
+    db.add(q)
+    db.flush()
+    record_result_change(db, q, old_status=None, new_status="draft")
+    db.commit()
+
+    incremental = _snapshot(db)
+    assert {day for _, _, day, _ in incremental[0]} == {date(2024, 5, 31)}
+    rebuild_quote_stats(db)
+    db.commit()
+    assert _snapshot(db) == incremental
+
+
+def test_lock_quote_reloads_a_stale_copy(manager_user: User, db: Session):
+    q = Quote(created_by=manager_user.id, status="draft", zones_json="[]")
+    db.add(q)
+    db.commit()
+    assert q.status == "draft"
+    db.execute(
+        update(Quote).where(Quote.id == q.id).values(status="calculated"),
+        execution_options={"synchronize_session": False},
+    )
+
+    assert lock_quote(db, q.id) is q
+    assert q.status == "calculated"
+
+
+def test_demand_delta_uses_the_locked_status(
+    client: TestClient, admin_user: User, warehouse_user: User, db: Session,
+):
+    tech = Technique(manufacturer="KAMAZ", model="6520")
+    sku = SKU(code="SKU-A", name="Трубка", unit="шт")
+    db.add_all([tech, sku])
+    db.flush()
+    db.add(Rule(
+        technique_id=tech.id,
+        conditions_json=json.dumps({}),
+        actions_json=json.dumps([{"sku_id": sku.id, "multiplier": 1}]),
+    ))
+    db.commit()
+
+    admin = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    wh = {"Authorization": f"Bearer {_token(client, 'warehouse', 'wh123')}"}
+    qid = client.post("/quotes", json={"items": [{"technique_id": tech.id, "qty": 4}]}, headers=admin).json()["id"]
+    client.post(f"/quotes/{qid}/calculate", headers=admin)
+
+    # Another transaction moved the quote on; this session still holds the old status.
+    q = db.get(Quote, qid)
+    assert q.status == "calculated"
+    db.execute(
+        update(Quote).where(Quote.id == qid).values(status="warehouse_check"),
+        execution_options={"synchronize_session": False},
+    )
+    record_status_change(db, q, "calculated", "warehouse_check")
+    db.commit()
+    q.status = "calculated"  # the stale copy a concurrent request would have read
+
+    resp = client.post(f"/quotes/{qid}/warehouse/confirm", json={"decision": "confirmed", "lines": []}, headers=wh)
+    assert resp.status_code == 200
+
+    incremental = _snapshot(db)
+    assert {(status, qty) for _, status, _, qty in incremental[2]} == {("confirmed", 4)}
+    rebuild_quote_stats(db)
+    db.commit()
+    assert _snapshot(db) == incremental
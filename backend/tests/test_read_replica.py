@@ -0,0 +1,101 @@
+"""Tests for replica routing of read-only routes and read-your-writes."""
+import asyncio
+import time
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.db import read_your_writes, session
+from app.db.read_your_writes import COOKIE_NAME, ReadYourWritesMiddleware
+
+
+def _request(cookie: str | None = None) -> Request:
+    headers = [(b"cookie", f"{COOKIE_NAME}={cookie}".encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+class _FakeSession:
+    def __init__(self, name: str):
+        self.name = name
+
+    def close(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+
+def _read_db(request: Request) -> str:
+    gen = session.get_read_db(request)
+    name = next(gen).name
+    gen.close()
+    return name
+
+
+async def _async_read_db(request: Request) -> str:
+    gen = session.get_async_read_db(request)
+    name = (await gen.__anext__()).name
+    await gen.aclose()
+    return name
+
+
+def test_read_db_falls_back_to_primary_without_replica(monkeypatch):
+    monkeypatch.setattr(session, "SessionLocal", lambda: _FakeSession("primary"))
+    monkeypatch.setattr(session, "ReadSessionLocal", None)
+    assert _read_db(_request()) == "primary"
+
+
+def test_read_db_routes_to_replica_unless_client_just_wrote(monkeypatch):
+    monkeypatch.setattr(session, "SessionLocal", lambda: _FakeSession("primary"))
+    monkeypatch.setattr(session, "ReadSessionLocal", lambda: _FakeSession("replica"))
+    monkeypatch.setattr(session, "AsyncSessionLocal", lambda: _FakeSession("primary"))
+    monkeypatch.setattr(session, "AsyncReadSessionLocal", lambda: _FakeSession("replica"))
+
+    fresh = str(int(time.time()) + 60)
+    expired = str(int(time.time()) - 1)
+    assert _read_db(_request()) == "replica"
+    assert _read_db(_request(fresh)) == "primary"
+    assert _read_db(_request(expired)) == "replica"
+    assert _read_db(_request("garbage")) == "replica"
+    assert asyncio.run(_async_read_db(_request())) == "replica"
+    assert asyncio.run(_async_read_db(_request(fresh))) == "primary"
+
+
+def _app(enabled: bool) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, enabled=enabled)
+
+    @app.get("/item")
+    def read() -> dict:
+        return {}
+
+    @app.post("/item")
+    def write(fail: bool = False) -> dict:
+        if fail:
+            raise HTTPException(409, "conflict")
+        return {}
+
+    return app
+
+
+def test_successful_write_sets_primary_cookie(monkeypatch):
+    monkeypatch.setattr(read_your_writes, "READ_YOUR_WRITES_SECONDS", 5)
+    client = TestClient(_app(enabled=True))
+
+    assert COOKIE_NAME not in client.get("/item").cookies
+    assert COOKIE_NAME not in client.post("/item", params={"fail": True}).cookies
+
+    resp = client.post("/item")
+    until = int(resp.cookies[COOKIE_NAME])
+    assert time.time() < until <= time.time() + 5
+    assert "HttpOnly" in resp.headers["set-cookie"]
+
+
+def test_no_cookie_without_replica(monkeypatch):
+    monkeypatch.setattr(read_your_writes, "READ_YOUR_WRITES_SECONDS", 5)
+    client = TestClient(_app(enabled=False))
+    assert COOKIE_NAME not in client.post("/item").cookies
@@ -0,0 +1,60 @@
+"""Tests for the slow query log."""
+import json
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db import slow_queries
+
+
+@pytest.fixture()
+def slow_log(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "slow.log"
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    monkeypatch.setattr(slow_queries._file_logger, "handlers", [handler])
+    yield path
+    handler.close()
+
+
+def _entries(path) -> list[dict]:
+    slow_queries.wait_idle()
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_slow_statement_is_logged_with_parameters(slow_log, monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 0.000001)
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    with engine.connect() as conn:
+        conn.execute(text("select :v, :long"), {"v": 42, "long": "x" * 500})
+
+    entry = next(e for e in _entries(slow_log) if "select ?" in e["statement"])
+    assert entry["db"] == "sqlite" and entry["duration_ms"] >= 0
+    assert entry["parameters"][0] == 42
+    assert len(entry["parameters"][1]) == slow_queries.PARAM_VALUE_CHARS + 1
+    assert "plan" not in entry  # EXPLAIN ANALYZE is PostgreSQL-only
+    engine.dispose()
+
+
+def test_fast_statements_are_not_logged(slow_log, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 60_000)
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+    slow_queries.wait_idle()
+    assert not slow_log.exists() or slow_log.read_text() == ""
+
+
+def test_only_postgres_selects_are_explained():
+    class Dialect:
+        name, driver = "postgresql", "psycopg"
+
+    class Conn:
+        dialect = Dialect()
+
+    assert slow_queries._explainable(Conn(), "\n  SELECT quotes.id FROM quotes")
+    assert slow_queries._explainable(Conn(), "WITH x AS (SELECT 1) SELECT * FROM x")
+    assert not slow_queries._explainable(Conn(), "UPDATE quotes SET status = %(status)s")
+    Dialect.name = "sqlite"
+    assert not slow_queries._explainable(Conn(), "SELECT 1")
@@ -0,0 +1,150 @@
+"""Tests for technique search."""
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.technique import Technique
+from app.models.technique_alias import TechniqueAlias
+from app.models.technique_popularity import TechniquePopularity
+from app.models.user import User
+from app.repo.technique_repo import _suggest_stmt, search_techniques, suggest_techniques
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+def test_search_matches_fields_and_alias(db: Session):
+    kamaz = Technique(manufacturer="KAMAZ", model="6520")
+    volvo = Technique(manufacturer="Volvo", model="EC480")
+    db.add_all([kamaz, volvo])
+    db.flush()
+    db.add(TechniqueAlias(alias_text="Камаз самосвал", technique_id=kamaz.id))
+    db.commit()
+
+    assert [t.id for t in search_techniques(db, search="ec48")] == [volvo.id]
+    assert [t.id for t in search_techniques(db, search="самосвал")] == [kamaz.id]
+
+
+def test_search_excludes_inactive_and_respects_limit(db: Session):
+    for i in range(5):
+        db.add(Technique(manufacturer="CAT", model=f"D{i}"))
+    db.add(Technique(manufacturer="CAT", model="D9", active=False))
+    db.commit()
+
+    rows = search_techniques(db, search="CAT", limit=3)
+    assert len(rows) == 3
+    assert all(t.active for t in rows)
+
+
+def test_list_techniques_limit_param(client: TestClient, manager_user: User, db: Session):
+    for i in range(4):
+        db.add(Technique(manufacturer="Komatsu", model=f"PC{i}"))
+    db.commit()
+
+    token = _token(client, "manager", "mgr123")
+    resp = client.get(
+        "/techniques",
+        params={"search": "komatsu", "limit": 2},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200
+    assert len(resp.json()) == 2
+
+
+def test_suggest_ranks_by_usage(client: TestClient, manager_user: User, db: Session):
+    rare = Technique(manufacturer="Hitachi", model="ZX200")
+    popular = Technique(manufacturer="Hitachi", model="ZX350")
+    other = Technique(manufacturer="Volvo", model="EC480")
+    db.add_all([rare, popular, other])
+    db.commit()
+
+    token = _token(client, "manager", "mgr123")
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(2):
+        resp = client.post(
+            "/quotes",
+            json={"items": [{"technique_id": popular.id, "qty": 1}]},
+            headers=headers,
+        )
+        assert resp.status_code == 201
+
+    resp = client.get("/techniques/suggest", params={"q": "hit", "limit": 5}, headers=headers)
+    assert resp.status_code == 200
+    assert [t["id"] for t in resp.json()] == [popular.id, rare.id]
+
+
+def test_suggest_blends_popularity_across_tiers(db: Session):
+    prefix_matches = [Technique(manufacturer="Hitachi", model=f"ZX{i}") for i in range(6)]
+    series_match = Technique(manufacturer="Komatsu", model="PC200", series="Hitline")
+    db.add_all([*prefix_matches, series_match])
+    db.flush()
+    db.add(TechniquePopularity(technique_id=series_match.id, usage_count=1000))
+    db.commit()
+
+    # 1 + 0.25 * ln(1001) beats the prefix tier's 2, however many unused prefix matches precede it.
+    assert [t.id for t in suggest_techniques(db, "hit", limit=1)] == [series_match.id]
+
+
+def test_suggest_treats_like_wildcards_literally(db: Session):
+    plain = Technique(manufacturer="Liebherr", model="R920")
+    underscored = Technique(manufacturer="Liebherr", model="R_920")
+    db.add_all([plain, underscored])
+    db.commit()
+
+    assert suggest_techniques(db, "%") == []
+    assert [t.id for t in suggest_techniques(db, "r_9")] == [underscored.id]
+
+
+def test_update_quote_moves_usage(client: TestClient, manager_user: User, db: Session):
+    a = Technique(manufacturer="Doosan", model="DX225")
+    b = Technique(manufacturer="Doosan", model="DX300")
+    db.add_all([a, b])
+    db.commit()
+
+    token = _token(client, "manager", "mgr123")
+    headers = {"Authorization": f"Bearer {token}"}
+    quote_id = client.post(
+        "/quotes", json={"items": [{"technique_id": a.id, "qty": 1}]}, headers=headers,
+    ).json()["id"]
+    resp = client.put(
+        f"/quotes/{quote_id}",
+        json={
+            "customer_name": None, "comment": None,
+            "items": [{"technique_id": b.id, "qty": 1}, {"technique_id": b.id, "qty": 2}],
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+
+    db.expire_all()
+    counts = {p.technique_id: p.usage_count for p in db.query(TechniquePopularity).all()}
+    assert counts == {a.id: 0, b.id: 2}
+
+
+def test_suggest_query_is_index_backed_on_postgres(pg_db: Session):
+    pg_db.execute(text("SET LOCAL enable_seqscan = off"))
+    stmt = _suggest_stmt("kam", 10).compile(dialect=pg_db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = "\n".join(pg_db.execute(text(f"EXPLAIN {stmt}")).scalars())
+    assert "Seq Scan on technique " not in plan and "Seq Scan on technique_alias" not in plan
+    assert "ix_technique_full_name_trgm" in plan
+
+
+def test_search_uses_trigram_similarity_on_postgres(pg_db: Session):
+    cat = Technique(manufacturer="Caterpillar", model="320D")
+    pc200 = Technique(manufacturer="Komatsu", model="PC200")
+    pc2000 = Technique(manufacturer="Komatsu", model="PC2000")
+    hitachi = Technique(manufacturer="Hitachi", model="ZX200")
+    pg_db.add_all([cat, pc200, pc2000, hitachi])
+    pg_db.flush()
+    pg_db.add(TechniqueAlias(alias_text="Zaxis", technique_id=hitachi.id))
+    pg_db.flush()
+
+    # Misspellings no ILIKE would find are matched through the % operator.
+    assert [t.id for t in search_techniques(pg_db, search="Catterpilar")] == [cat.id]
+    assert [t.id for t in search_techniques(pg_db, search="Zaxiss")] == [hitachi.id]
+    # Both contain "PC200"; the closer model ranks first.
+    assert [t.id for t in search_techniques(pg_db, search="PC200")][:2] == [pc200.id, pc2000.id]
+    # Below pg_trgm.similarity_threshold nothing matches.
+    pg_db.execute(text("SET LOCAL pg_trgm.similarity_threshold = 0.9"))
+    assert search_techniques(pg_db, search="Catterpilar") == []
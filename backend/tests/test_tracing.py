@@ -0,0 +1,118 @@
+"""Tests for in-process tracing spans and the admin trace browser."""
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.quote import Quote, QuoteItem
+from app.models.rule import Rule
+from app.models.sku import SKU
+from app.models.technique import Technique
+from app.models.user import User
+from app.services import tracing
+
+
+def _token(client: TestClient, login: str, password: str) -> str:
+    return client.post("/auth/login", json={"login": login, "password": password}).json()["access_token"]
+
+
+@pytest.fixture(autouse=True)
+def memory_export(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(tracing, "TRACE_EXPORT", {"memory"})
+    tracing.clear()
+    yield
+    tracing.clear()
+
+
+def test_spans_nest_and_record_errors():
+    with pytest.raises(RuntimeError):
+        with tracing.span("outer", **{"k": 1}) as outer:
+            with tracing.span("inner") as inner:
+                raise RuntimeError("boom")
+
+    assert inner.trace_id == outer.trace_id and inner.parent_span_id == outer.span_id
+    assert outer.parent_span_id is None and outer.attributes == {"k": 1}
+    assert inner.status == {"code": "ERROR", "message": "RuntimeError: boom"}
+    assert [s.name for s in tracing.recent_spans()] == ["inner", "outer"]
+    assert tracing.current_span() is None
+
+
+def test_calculate_request_is_traced(
+    client: TestClient, manager_user: User, admin_user: User, db: Session, monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(tracing, "TRACE_SQL_SAMPLE", 1.0)
+    tech = Technique(manufacturer="KAMAZ", model="6520")
+    sku = SKU(code="SKU-A", name="Трубка", unit="шт")
+    db.add_all([tech, sku])
+    db.flush()
+    db.add(Rule(technique_id=tech.id, conditions_json="{}", actions_json=json.dumps([{"sku_id": sku.id}])))
+    q = Quote(created_by=manager_user.id, status="draft", zones_json="[]")
+    db.add(q)
+    db.flush()
+    db.add(QuoteItem(quote_id=q.id, technique_id=tech.id, qty=2))
+    db.commit()
+    mgr = {"Authorization": f"Bearer {_token(client, 'manager', 'mgr123')}"}
+
+    resp = client.post(f"/quotes/{q.id}/calculate", headers=mgr)
+    assert resp.status_code == 200
+    trace_id = resp.headers["x-trace-id"]
+
+    admin = {"Authorization": f"Bearer {_token(client, 'admin', 'admin123')}"}
+    spans = client.get(f"/admin/traces/{trace_id}", headers=admin).json()
+    by_name = {s["name"]: s for s in spans}
+    server = by_name["POST /quotes/{quote_id}/calculate"]
+    assert server["kind"] == "SERVER" and server["attributes"]["http.response.status_code"] == 200
+    assert by_name["calculate_quote"]["parent_span_id"] == server["span_id"]
+    for phase in ("calc.load_quote", "calc.load_rules", "calc.match_rules", "calc.write_results", "calc.commit"):
+        assert by_name[phase]["parent_span_id"] == by_name["calculate_quote"]["span_id"]
+    queries = [s for s in spans if s["name"] == "db.query"]
+    assert queries and all(s["kind"] == "CLIENT" and s["attributes"]["db.statement"] for s in queries)
+
+    summaries = client.get("/admin/traces", headers=admin).json()
+    assert any(t["trace_id"] == trace_id and t["span_count"] == len(spans) for t in summaries)
+    assert client.get("/admin/traces", headers=mgr).status_code == 403
+    assert client.get("/admin/traces/" + "0" * 32, headers=admin).status_code == 404
+
+
+def test_incoming_traceparent_is_continued(client: TestClient):
+    parent = "00-" + "ab" * 16 + "-" + "cd" * 8 + "-01"
+    resp = client.get("/zones", headers={"traceparent": parent})
+    assert resp.headers["x-trace-id"] == "ab" * 16
+    server = [s for s in tracing.recent_spans() if s.kind == "SERVER"][-1]
+    assert server.parent_span_id == "cd" * 8
+
+
+def test_file_export(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "traces.jsonl"
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    monkeypatch.setattr(tracing._file_logger, "handlers", [handler])
+    monkeypatch.setattr(tracing, "TRACE_EXPORT", {"file"})
+
+    with tracing.span("exported", **{"quote.id": 7}):
+        pass
+    tracing.wait_idle()
+    handler.close()
+
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["name"] == "exported" and record["attributes"] == {"quote.id": 7}
+    assert record["end_time_unix_nano"] >= record["start_time_unix_nano"]
+    assert tracing.recent_spans() == []
+
+
+def test_sql_spans_follow_the_trace_sample(client: TestClient, admin_user: User, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(tracing, "TRACE_SQL_SAMPLE", 0.5)
+    assert tracing.sql_sampled("7fffffff" + "0" * 24)
+    assert not tracing.sql_sampled("80000000" + "0" * 24)
+
+    login = {"login": "admin", "password": "admin123"}
+    headers = {"traceparent": "00-" + "00" * 16 + "-" + "cd" * 8 + "-01"}
+    monkeypatch.setattr(tracing, "TRACE_SQL_SAMPLE", 0.0)
+    assert client.post("/auth/login", json=login, headers=headers).status_code == 200
+    assert [s for s in tracing.recent_spans() if s.name == "db.query"] == []
+
+    monkeypatch.setattr(tracing, "TRACE_SQL_SAMPLE", 0.01)
+    assert client.post("/auth/login", json=login, headers=headers).status_code == 200
+    assert [s for s in tracing.recent_spans() if s.name == "db.query"]
@@ -2,6 +2,66 @@ import { toast } from "../ui/Toast";
 
 const BASE = "/api";
 const AUTH_LOGOUT_EVENT = "auth:logout";
+const ACCESS_KEY = "access_token";
+const REFRESH_KEY = "refresh_token";
+
+export interface TokenPair {
+  access_token: string;
+  /** null when another tab rotated the token a moment ago; keep the stored one. */
+  refresh_token: string | null;
+}
+
+export function storeTokens(tokens: TokenPair): void {
+  localStorage.setItem(ACCESS_KEY, tokens.access_token);
+  if (tokens.refresh_token) localStorage.setItem(REFRESH_KEY, tokens.refresh_token);
+}
+
+export function clearTokens(): void {
+  localStorage.removeItem(ACCESS_KEY);
+  localStorage.removeItem(REFRESH_KEY);
+}
+
+let refreshing: Promise<boolean> | null = null;
+
+/** Swap the refresh token for a new pair; concurrent callers share one request. */
+function refreshTokens(): Promise<boolean> {
+  if (!refreshing) {
+    refreshing = (async () => {
+      const refreshToken = localStorage.getItem(REFRESH_KEY);
+      if (!refreshToken) return false;
+      try {
+        const res = await fetch(`${BASE}/auth/refresh`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ refresh_token: refreshToken }),
+        });
+        // Another tab may have rotated the token in the meantime.
+        if (!res.ok) return localStorage.getItem(REFRESH_KEY) !== refreshToken;
+        storeTokens(await res.json());
+        return true;
+      } catch {
+        return false;
+      }
+    })().finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+}
+
+/** fetch() against the API with the bearer token, refreshing it once on 401. */
+export async function authFetch(path: string, init: RequestInit = {}): Promise<Response> {
+  const send = () =>
+    fetch(`${BASE}${path}`, {
+      ...init,
+      headers: { ...authHeaders(), ...(init.headers as Record<string, string> | undefined) },
+    });
+  const res = await send();
+  if (res.status === 401 && localStorage.getItem(REFRESH_KEY) && (await refreshTokens())) {
+    return send();
+  }
+  return res;
+}
 
 async function handleResponse<T>(res: Response): Promise<T> {
   if (res.ok) return res.json();
@@ -25,48 +85,77 @@ async function handleResponse<T>(res: Response): Promise<T> {
 }
 
 function authHeaders(): Record<string, string> {
-  const token = localStorage.getItem("access_token");
+  const token = localStorage.getItem(ACCESS_KEY);
   const h: Record<string, string> = {};
   if (token) h["Authorization"] = `Bearer ${token}`;
   return h;
 }
 
 export async function apiGet<T>(path: string): Promise<T> {
-  const res = await fetch(`${BASE}${path}`, { headers: authHeaders() });
+  const res = await authFetch(path);
   return handleResponse<T>(res);
 }
 
+export interface PageResult<T> {
+  items: T[];
+  nextCursor: string | null;
+  total: number | null;
+}
+
+/** GET a keyset-paginated list: rows in the body, cursor/total in headers. */
+export async function apiGetPage<T>(path: string): Promise<PageResult<T>> {
+  const res = await authFetch(path);
+  const items = await handleResponse<T[]>(res);
+  const total = res.headers.get("X-Total-Count");
+  return {
+    items,
+    nextCursor: res.headers.get("X-Next-Cursor"),
+    total: total === null ? null : Number(total),
+  };
+}
+
+/** GET every page of a keyset-paginated list, following X-Next-Cursor. */
+export async function apiGetAll<T>(path: string, pageSize = 500): Promise<T[]> {
+  const sep = path.includes("?") ? "&" : "?";
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const qs = `limit=${pageSize}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "");
+    const page: PageResult<T> = await apiGetPage<T>(`${path}${sep}${qs}`);
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return items;
+}
+
 export async function apiPost<T>(path: string, body: unknown): Promise<T> {
-  const res = await fetch(`${BASE}${path}`, {
+  const res = await authFetch(path, {
     method: "POST",
-    headers: { ...authHeaders(), "Content-Type": "application/json" },
+    headers: { "Content-Type": "application/json" },
     body: JSON.stringify(body),
   });
   return handleResponse<T>(res);
 }
 
 export async function apiPatch<T>(path: string, body: unknown): Promise<T> {
-  const res = await fetch(`${BASE}${path}`, {
+  const res = await authFetch(path, {
     method: "PATCH",
-    headers: { ...authHeaders(), "Content-Type": "application/json" },
+    headers: { "Content-Type": "application/json" },
     body: JSON.stringify(body),
   });
   return handleResponse<T>(res);
 }
 
 export async function apiDelete<T = void>(path: string): Promise<T> {
-  const res = await fetch(`${BASE}${path}`, {
-    method: "DELETE",
-    headers: authHeaders(),
-  });
+  const res = await authFetch(path, { method: "DELETE" });
   if (res.status === 204) return undefined as T;
   return handleResponse<T>(res);
 }
 
 export async function apiPut<T>(path: string, body: unknown): Promise<T> {
-  const res = await fetch(`${BASE}${path}`, {
+  const res = await authFetch(path, {
     method: "PUT",
-    headers: { ...authHeaders(), "Content-Type": "application/json" },
+    headers: { "Content-Type": "application/json" },
     body: JSON.stringify(body),
   });
   return handleResponse<T>(res);
@@ -1,11 +1,7 @@
 import { useCallback, useEffect, useState } from "react";
-import { apiGet, apiPost } from "../api/client";
+import { apiGet, apiPost, clearTokens, storeTokens, type TokenPair } from "../api/client";
 import type { UserMe } from "./types";
 
-interface LoginResponse {
-  access_token: string;
-}
-
 export function useAuth() {
   const [user, setUser] = useState<UserMe | null>(null);
   const [loading, setLoading] = useState(true);
@@ -15,7 +11,7 @@ export function useAuth() {
       const me = await apiGet<UserMe>("/auth/me");
       setUser(me);
     } catch {
-      localStorage.removeItem("access_token");
+      clearTokens();
       setUser(null);
     } finally {
       setLoading(false);
@@ -32,18 +28,27 @@ export function useAuth() {
 
   const login = useCallback(
     async (loginStr: string, password: string) => {
-      const data = await apiPost<LoginResponse>("/auth/login", {
+      const data = await apiPost<TokenPair>("/auth/login", {
         login: loginStr,
         password,
       });
-      localStorage.setItem("access_token", data.access_token);
+      storeTokens(data);
       await fetchMe();
     },
     [fetchMe],
   );
 
   const logout = useCallback(() => {
-    localStorage.removeItem("access_token");
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (refreshToken) {
+      // Revoke the session server-side; the UI does not wait for it.
+      fetch("/api/auth/logout", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      }).catch(() => {});
+    }
+    clearTokens();
     setUser(null);
   }, []);
 
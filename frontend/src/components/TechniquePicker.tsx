@@ -1,5 +1,5 @@
 import { useCallback, useEffect, useMemo, useRef, useState } from "react";
-import { apiGet } from "../api/client";
+import { apiGet, apiGetAll } from "../api/client";
 
 export interface TechniqueItem {
   id: number;
@@ -16,6 +16,8 @@ interface Props {
 
 type Mode = "search" | "tree";
 
+const SUGGEST_LIMIT = 20;
+
 export default function TechniquePicker({ value, onChange }: Props) {
   const [mode, setMode] = useState<Mode>("search");
 
@@ -65,7 +67,7 @@ function SearchMode({ value, onChange }: Props) {
     setLoading(true);
     try {
       const data = await apiGet<TechniqueItem[]>(
-        `/techniques?search=${encodeURIComponent(q)}`,
+        `/techniques/suggest?q=${encodeURIComponent(q)}&limit=${SUGGEST_LIMIT}`,
       );
       setResults(data);
     } catch {
@@ -153,7 +155,7 @@ function TreeMode({ value, onChange }: Props) {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    apiGet<TechniqueItem[]>("/techniques")
+    apiGetAll<TechniqueItem>("/techniques")
       .then(setAll)
       .catch(() => setAll([]))
       .finally(() => setLoading(false));
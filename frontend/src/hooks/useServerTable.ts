@@ -0,0 +1,114 @@
+import { useCallback, useEffect, useState } from "react";
+import { apiGetPage } from "../api/client";
+import type { ColumnDef, SortState } from "./useTableData";
+
+interface Options {
+  defaultPageSize?: number;
+  defaultSort?: SortState;
+  /** Extra endpoint-specific query params (e.g. status, search). */
+  params?: Record<string, string>;
+}
+
+/**
+ * Server-side counterpart of useTableData: sorting, filtering and paging are
+ * done by the API (keyset cursors), only the current page is downloaded.
+ * Returns the same shape as useTableData plus `reload` and `loading`.
+ */
+export function useServerTable<T>(
+  path: string,
+  columns: ColumnDef<T>[],
+  options?: Options,
+) {
+  const [sort, setSort] = useState<SortState | null>(
+    options?.defaultSort ?? null,
+  );
+  const [filters, setFilters] = useState<Record<string, string>>({});
+  const [page, setPage] = useState(1);
+  const [pageSize, _setPageSize] = useState(options?.defaultPageSize ?? 25);
+  // cursors[i] is the cursor that fetches page i + 1; page 1 has none.
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
+  const [view, setView] = useState<T[]>([]);
+  const [total, setTotal] = useState(0);
+  const [loading, setLoading] = useState(false);
+  const [tick, setTick] = useState(0);
+
+  const paramsKey = JSON.stringify(options?.params ?? {});
+  const [appliedParams, setAppliedParams] = useState(paramsKey);
+  if (paramsKey !== appliedParams) {
+    setAppliedParams(paramsKey);
+    setCursors([null]);
+    setPage(1);
+  }
+
+  useEffect(() => {
+    const qs = new URLSearchParams(JSON.parse(appliedParams));
+    qs.set("limit", String(pageSize));
+    qs.set("include_total", "true");
+    if (sort) qs.set("sort", (sort.dir === "desc" ? "-" : "") + sort.key);
+    for (const col of columns) {
+      const val = filters[col.key];
+      if (col.filterable && val) qs.set(`filter[${col.key}]`, val);
+    }
+    const cursor = cursors[page - 1];
+    if (cursor) qs.set("cursor", cursor);
+
+    setLoading(true);
+    apiGetPage<T>(`${path}?${qs.toString()}`)
+      .then((res) => {
+        setView(res.items);
+        setTotal(res.total ?? res.items.length);
+        setCursors((prev) => {
+          const next = prev.slice(0, page);
+          next[page] = res.nextCursor;
+          return next;
+        });
+      })
+      .catch(() => setView([]))
+      .finally(() => setLoading(false));
+  }, [path, appliedParams, sort, filters, page, pageSize, tick]);
+
+  function resetPaging() {
+    setCursors([null]);
+    setPage(1);
+  }
+
+  function toggleSort(key: string) {
+    setSort((prev) =>
+      prev?.key === key && prev.dir === "asc"
+        ? { key, dir: "desc" }
+        : { key, dir: "asc" },
+    );
+    resetPaging();
+  }
+
+  function setFilter(key: string, value: string) {
+    setFilters((prev) => ({ ...prev, [key]: value }));
+    resetPaging();
+  }
+
+  function setPageSize(size: number) {
+    _setPageSize(size);
+    resetPaging();
+  }
+
+  const reload = useCallback(() => setTick((t) => t + 1), []);
+
+  const totalPages = Math.max(1, Math.ceil(total / pageSize));
+
+  return {
+    view,
+    sort,
+    toggleSort,
+    filters,
+    setFilter,
+    page,
+    setPage,
+    pageSize,
+    setPageSize,
+    totalPages,
+    totalFiltered: total,
+    totalRows: total,
+    loading,
+    reload,
+  };
+}
@@ -1,7 +1,8 @@
 import { useEffect, useRef, useState } from "react";
-import { apiGet } from "../api/client";
+import { apiGet, authFetch } from "../api/client";
+import { toast } from "../ui/Toast";
 import type { ColumnDef } from "../hooks/useTableData";
-import { useTableData } from "../hooks/useTableData";
+import { useServerTable } from "../hooks/useServerTable";
 import Badge from "../ui/Badge";
 import Button from "../ui/Button";
 import Card from "../ui/Card";
@@ -25,7 +26,7 @@ const COLUMNS: ColumnDef<QuoteListItem>[] = [
   { key: "id", sortable: true },
   { key: "customer_name", sortable: true, filterable: true },
   { key: "status", sortable: true },
-  { key: "items_count", sortable: true },
+  { key: "items_count" },
   { key: "updated_at", sortable: true, filterable: true, filterType: "daterange" },
 ];
 
@@ -39,55 +40,88 @@ const STATUS_TABS = [
   { key: "confirmed",       label: "Подтверждено" },
 ];
 
+interface QuoteStats {
+  total: number;
+  by_status: Record<string, number>;
+}
+
 interface Props {
   onOpenQuote: (id: number) => void;
   onNav?: (page: string) => void;
 }
 
 export default function Dashboard({ onOpenQuote, onNav }: Props) {
-  const [rows, setRows] = useState<QuoteListItem[]>([]);
   const [statusFilter, setStatusFilter] = useState("");
   const [search, setSearch] = useState("");
-  const [loading, setLoading] = useState(false);
+  const [appliedSearch, setAppliedSearch] = useState("");
   const timerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const [stats, setStats] = useState<QuoteStats | null>(null);
+  const [exporting, setExporting] = useState(false);
+
+  useEffect(() => {
+    apiGet<QuoteStats>("/quotes/stats").then(setStats).catch(() => setStats(null));
+  }, []);
+
+  const tabs = STATUS_TABS.map((t) => {
+    if (!stats) return t;
+    const n = t.key ? stats.by_status[t.key] ?? 0 : stats.total;
+    return { ...t, label: `${t.label} (${n})` };
+  });
+
+  const params: Record<string, string> = {};
+  if (statusFilter) params.status = statusFilter;
+  if (appliedSearch) params.search = appliedSearch;
 
   const {
     view, sort, toggleSort, filters, setFilter,
     page, setPage, pageSize, setPageSize,
-    totalPages, totalFiltered, totalRows,
-  } = useTableData(rows, COLUMNS);
-
-  function load(s?: string, st?: string) {
-    const qs = new URLSearchParams();
-    const sf = st ?? statusFilter;
-    const sq = s ?? search;
-    if (sf) qs.set("status", sf);
-    if (sq) qs.set("search", sq);
-    setLoading(true);
-    apiGet<QuoteListItem[]>(`/quotes?${qs.toString()}`)
-      .then(setRows)
-      .catch(() => setRows([]))
-      .finally(() => setLoading(false));
-  }
+    totalPages, totalFiltered, totalRows, loading,
+  } = useServerTable<QuoteListItem>("/quotes", COLUMNS, {
+    defaultSort: { key: "updated_at", dir: "desc" },
+    params,
+  });
 
-  useEffect(() => { load(); }, []);
+  const hasRows = totalRows > 0 || Object.values(filters).some(Boolean);
 
   function handleTab(key: string) {
     setStatusFilter(key);
-    load(search, key);
   }
 
   function handleSearch(val: string) {
     setSearch(val);
     if (timerRef.current) clearTimeout(timerRef.current);
-    timerRef.current = setTimeout(() => load(val, statusFilter), 400);
+    timerRef.current = setTimeout(() => setAppliedSearch(val), 400);
   }
 
   const fmtDate = (iso: string) => new Date(iso).toLocaleDateString("ru");
 
+  async function handleBulkExport() {
+    setExporting(true);
+    try {
+      const body = { status: statusFilter || null, search: appliedSearch || null, format: "zip" };
+      const res = await authFetch("/quotes/export", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(body),
+      });
+      if (!res.ok) throw new Error(`${res.status} ${res.statusText}`);
+      const blob = await res.blob();
+      const url = URL.createObjectURL(blob);
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = `quotes_${new Date().toISOString().slice(0, 10)}.zip`;
+      a.click();
+      URL.revokeObjectURL(url);
+    } catch (err: unknown) {
+      toast(String(err), "error");
+    } finally {
+      setExporting(false);
+    }
+  }
+
   return (
     <div>
-      <Tabs tabs={STATUS_TABS} active={statusFilter} onChange={handleTab} />
+      <Tabs tabs={tabs} active={statusFilter} onChange={handleTab} />
 
       <div className="mb-4 flex flex-col gap-3 sm:flex-row sm:items-end">
         <div className="flex-1 sm:max-w-sm">
@@ -97,7 +131,10 @@ export default function Dashboard({ onOpenQuote, onNav }: Props) {
             onChange={(e) => handleSearch(e.target.value)}
           />
         </div>
-        <Button variant="primary" size="md" onClick={() => onNav?.("calc")} className="sm:ml-auto">
+        <Button variant="secondary" size="md" onClick={handleBulkExport} disabled={exporting} className="sm:ml-auto">
+          {exporting ? "Выгрузка…" : "Выгрузить ZIP"}
+        </Button>
+        <Button variant="primary" size="md" onClick={() => onNav?.("calc")}>
           + Новый расчёт
         </Button>
       </div>
@@ -106,7 +143,7 @@ export default function Dashboard({ onOpenQuote, onNav }: Props) {
         <p className="py-4 text-center text-sm text-[var(--color-text-secondary)]">Загрузка…</p>
       )}
 
-      {!loading && rows.length === 0 && (
+      {!loading && !hasRows && (
         <Card className="py-12 text-center">
           <p className="text-[var(--color-text-secondary)]">Нет коммерческих предложений</p>
           <p className="mt-1 text-sm text-[var(--color-text-secondary)]">
@@ -117,7 +154,7 @@ export default function Dashboard({ onOpenQuote, onNav }: Props) {
         </Card>
       )}
 
-      {!loading && rows.length > 0 && (
+      {hasRows && (
         <div className="overflow-x-auto">
           <Table>
             <thead>
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { apiGet, apiPatch, apiPost } from "../api/client";
+import { apiGet, apiPatch, apiPost, authFetch } from "../api/client";
 import Badge from "../ui/Badge";
 import Button from "../ui/Button";
 import Card from "../ui/Card";
@@ -97,10 +97,8 @@ export default function QuoteDetail({ quoteId, role, onBack, onEdit }: Props) {
   async function handleExportXlsx() {
     setError("");
     try {
-      const token = localStorage.getItem("access_token");
-      const headers: Record<string, string> = {};
-      if (token) headers["Authorization"] = `Bearer ${token}`;
-      const res = await fetch(`/api/quotes/${quoteId}/export/xlsx`, { method: "POST", headers });
+      // GET lets the browser revalidate with the ETag instead of downloading again.
+      const res = await authFetch(`/quotes/${quoteId}/export/xlsx`);
       if (!res.ok) throw new Error(`${res.status} ${res.statusText}`);
       const blob = await res.blob();
       const url = URL.createObjectURL(blob);
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { apiGet, apiPost } from "../api/client";
+import { apiGet, apiGetAll, apiPost } from "../api/client";
 import Badge from "../ui/Badge";
 import Button from "../ui/Button";
 import Card from "../ui/Card";
@@ -21,6 +21,18 @@ interface ResultLine {
   sku_unit: string | null;
   qty: number;
   note: string | null;
+  availability_status: string | null;
+  availability_comment: string | null;
+  availability_as_of: string | null;
+}
+
+interface SkuDemand {
+  sku_id: number;
+  sku_code: string | null;
+  sku_name: string | null;
+  sku_unit: string | null;
+  total_qty: number;
+  by_status: Record<string, number>;
 }
 
 interface LineRow extends ResultLine {
@@ -41,11 +53,19 @@ export default function Warehouse() {
   const [comment, setComment] = useState("");
   const [busy, setBusy] = useState(false);
   const [message, setMessage] = useState("");
+  const [demand, setDemand] = useState<SkuDemand[]>([]);
+
+  function loadDemand() {
+    apiGet<SkuDemand[]>("/warehouse/demand")
+      .then(setDemand)
+      .catch(() => setDemand([]));
+  }
 
   useEffect(() => {
-    apiGet<QuoteListItem[]>("/quotes?status=warehouse_check")
+    apiGetAll<QuoteListItem>("/quotes?status=warehouse_check")
       .then(setQuotes)
       .catch(() => setQuotes([]));
+    loadDemand();
   }, []);
 
   async function openQuote(id: number) {
@@ -54,7 +74,11 @@ export default function Warehouse() {
     setMessage("");
     try {
       const result = await apiGet<ResultLine[]>(`/quotes/${id}/result`);
-      setLines(result.map((ln) => ({ ...ln, availability_status: "in_stock", availability_comment: "" })));
+      setLines(result.map((ln) => ({
+        ...ln,
+        availability_status: ln.availability_status ?? "in_stock",
+        availability_comment: ln.availability_comment ?? "",
+      })));
     } catch {
       setLines([]);
     }
@@ -77,6 +101,7 @@ export default function Warehouse() {
       setMessage(decision === "confirmed" ? "Подтверждено" : "Отправлено на доработку");
       setQuotes((prev) => prev.filter((q) => q.id !== selectedId));
       setSelectedId(null);
+      loadDemand();
     } catch (err: unknown) {
       setMessage(String(err));
     } finally {
@@ -171,8 +196,9 @@ export default function Warehouse() {
                 <Td>
                   <AvailSegment
                     value={ln.availability_status}
-                    onChange={(v) => updateLine(idx, { availability_status: v })}
+                    onChange={(v) => updateLine(idx, { availability_status: v, availability_as_of: null })}
                   />
+                  <AsOfHint asOf={ln.availability_as_of} />
                 </Td>
                 <Td>
                   <input
@@ -201,10 +227,13 @@ export default function Warehouse() {
                 {ln.note && <p className="mt-0.5 text-xs text-[var(--color-text-secondary)]">{ln.note}</p>}
               </div>
             </div>
-            <AvailSegment
-              value={ln.availability_status}
-              onChange={(v) => updateLine(idx, { availability_status: v })}
-            />
+            <div>
+              <AvailSegment
+                value={ln.availability_status}
+                onChange={(v) => updateLine(idx, { availability_status: v, availability_as_of: null })}
+              />
+              <AsOfHint asOf={ln.availability_as_of} />
+            </div>
             <textarea
               value={ln.availability_comment}
               onChange={(e) => updateLine(idx, { availability_comment: e.target.value })}
@@ -238,6 +267,39 @@ export default function Warehouse() {
     </div>
   );
 
+  /* ── SKU demand across warehouse_check + confirmed quotes ── */
+  const demandPanel = (
+    <Card flat>
+      <h3 className="mb-3 text-base font-semibold">Спрос по SKU</h3>
+      {demand.length === 0 ? (
+        <p className="text-sm text-[var(--color-text-secondary)]">Нет данных</p>
+      ) : (
+        <Table>
+          <thead>
+            <tr>
+              <Th>Код</Th>
+              <Th>Название</Th>
+              <Th>На проверке</Th>
+              <Th>Подтверждено</Th>
+              <Th>Всего</Th>
+            </tr>
+          </thead>
+          <tbody>
+            {demand.map((d) => (
+              <Tr key={d.sku_id}>
+                <Td className="whitespace-nowrap font-medium">{d.sku_code ?? d.sku_id}</Td>
+                <Td>{d.sku_name ?? "—"}</Td>
+                <Td>{d.by_status.warehouse_check ?? 0}</Td>
+                <Td>{d.by_status.confirmed ?? 0}</Td>
+                <Td className="font-medium">{d.total_qty} {d.sku_unit}</Td>
+              </Tr>
+            ))}
+          </tbody>
+        </Table>
+      )}
+    </Card>
+  );
+
   /* ── Layout ── */
   return (
     <div>
@@ -246,9 +308,12 @@ export default function Warehouse() {
         <div className="max-h-[calc(100vh-8rem)] overflow-y-auto">{listPanel}</div>
         <div>
           {selectedId === null ? (
-            <Card className="py-16 text-center">
-              <p className="text-[var(--color-text-secondary)]">Выберите КП из списка слева</p>
-            </Card>
+            <div className="flex flex-col gap-4">
+              <Card className="py-16 text-center">
+                <p className="text-[var(--color-text-secondary)]">Выберите КП из списка слева</p>
+              </Card>
+              {demandPanel}
+            </div>
           ) : (
             detailPanel
           )}
@@ -288,3 +353,13 @@ function AvailSegment({ value, onChange }: { value: string; onChange: (v: string
     </div>
   );
 }
+
+/* ── Hint for availability prefilled from the last known SKU state ── */
+function AsOfHint({ asOf }: { asOf: string | null }) {
+  if (!asOf) return null;
+  return (
+    <div className="mt-1 text-xs text-[var(--color-text-secondary)]">
+      данные от {new Date(asOf).toLocaleDateString("ru")}
+    </div>
+  );
+}
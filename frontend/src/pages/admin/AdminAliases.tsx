@@ -1,7 +1,7 @@
-import { type FormEvent, useEffect, useState } from "react";
-import { apiGet, apiPost } from "../../api/client";
+import { type FormEvent, useState } from "react";
+import { apiPost } from "../../api/client";
 import type { ColumnDef } from "../../hooks/useTableData";
-import { useTableData } from "../../hooks/useTableData";
+import { useServerTable } from "../../hooks/useServerTable";
 import { Table, Td, Tr } from "../../ui/Table";
 import { SortableTh, FilterRow, PaginationBar } from "../../ui/TableControls";
 
@@ -20,7 +20,6 @@ const COLUMNS: ColumnDef<AliasItem>[] = [
 ];
 
 export default function AdminAliases() {
-  const [items, setItems] = useState<AliasItem[]>([]);
   const [aliasText, setAliasText] = useState("");
   const [techId, setTechId] = useState("");
   const [note, setNote] = useState("");
@@ -29,11 +28,8 @@ export default function AdminAliases() {
   const {
     view, sort, toggleSort, filters, setFilter,
     page, setPage, pageSize, setPageSize,
-    totalPages, totalFiltered, totalRows,
-  } = useTableData(items, COLUMNS);
-
-  const load = () => apiGet<AliasItem[]>("/technique-aliases").then(setItems).catch(() => {});
-  useEffect(() => { load(); }, []);
+    totalPages, totalFiltered, totalRows, reload,
+  } = useServerTable<AliasItem>("/technique-aliases", COLUMNS);
 
   async function handleAdd(e: FormEvent) {
     e.preventDefault();
@@ -46,7 +42,7 @@ export default function AdminAliases() {
       });
       setMsg(`Псевдоним «${aliasText}» создан`);
       setAliasText(""); setTechId(""); setNote("");
-      load();
+      reload();
     } catch (err: unknown) {
       setMsg(String(err));
     }
@@ -62,7 +58,7 @@ export default function AdminAliases() {
       </form>
       {msg && <p style={{ fontSize: 13, marginBottom: 8 }}>{msg}</p>}
 
-      {items.length > 0 && (
+      {(totalRows > 0 || Object.values(filters).some(Boolean)) && (
         <>
           <Table>
             <thead>
@@ -1,7 +1,7 @@
-import { type FormEvent, useEffect, useState } from "react";
-import { apiGet, apiPatch, apiPost } from "../../api/client";
+import { type FormEvent, useState } from "react";
+import { apiPatch, apiPost } from "../../api/client";
 import type { ColumnDef } from "../../hooks/useTableData";
-import { useTableData } from "../../hooks/useTableData";
+import { useServerTable } from "../../hooks/useServerTable";
 import { Table, Td, Tr } from "../../ui/Table";
 import { SortableTh, FilterRow, PaginationBar } from "../../ui/TableControls";
 
@@ -32,7 +32,6 @@ const COLUMNS: ColumnDef<SKU>[] = [
 ];
 
 export default function AdminSKUs() {
-  const [items, setItems] = useState<SKU[]>([]);
   const [code, setCode] = useState("");
   const [name, setName] = useState("");
   const [unit, setUnit] = useState("шт");
@@ -40,22 +39,19 @@ export default function AdminSKUs() {
   const {
     view, sort, toggleSort, filters, setFilter,
     page, setPage, pageSize, setPageSize,
-    totalPages, totalFiltered, totalRows,
-  } = useTableData(items, COLUMNS);
-
-  const load = () => apiGet<SKU[]>("/skus").then(setItems).catch(() => {});
-  useEffect(() => { load(); }, []);
+    totalPages, totalFiltered, totalRows, reload,
+  } = useServerTable<SKU>("/skus", COLUMNS);
 
   async function handleAdd(e: FormEvent) {
     e.preventDefault();
     await apiPost("/skus", { code, name, unit });
     setCode(""); setName(""); setUnit("шт");
-    load();
+    reload();
   }
 
   async function toggleActive(s: SKU) {
     await apiPatch(`/skus/${s.id}`, { active: !s.active });
-    load();
+    reload();
   }
 
   return (
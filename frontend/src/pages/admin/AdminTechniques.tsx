@@ -1,7 +1,7 @@
-import { type FormEvent, useEffect, useState } from "react";
-import { apiGet, apiPatch, apiPost } from "../../api/client";
+import { type FormEvent, useState } from "react";
+import { apiPatch, apiPost } from "../../api/client";
 import type { ColumnDef } from "../../hooks/useTableData";
-import { useTableData } from "../../hooks/useTableData";
+import { useServerTable } from "../../hooks/useServerTable";
 import { Table, Td, Tr } from "../../ui/Table";
 import { SortableTh, FilterRow, PaginationBar } from "../../ui/TableControls";
 
@@ -31,7 +31,6 @@ const COLUMNS: ColumnDef<Technique>[] = [
 ];
 
 export default function AdminTechniques() {
-  const [items, setItems] = useState<Technique[]>([]);
   const [mfr, setMfr] = useState("");
   const [model, setModel] = useState("");
   const [series, setSeries] = useState("");
@@ -39,22 +38,19 @@ export default function AdminTechniques() {
   const {
     view, sort, toggleSort, filters, setFilter,
     page, setPage, pageSize, setPageSize,
-    totalPages, totalFiltered, totalRows,
-  } = useTableData(items, COLUMNS);
-
-  const load = () => apiGet<Technique[]>("/techniques").then(setItems).catch(() => {});
-  useEffect(() => { load(); }, []);
+    totalPages, totalFiltered, totalRows, reload,
+  } = useServerTable<Technique>("/techniques", COLUMNS);
 
   async function handleAdd(e: FormEvent) {
     e.preventDefault();
     await apiPost("/techniques", { manufacturer: mfr, model, series: series || null });
     setMfr(""); setModel(""); setSeries("");
-    load();
+    reload();
   }
 
   async function toggleActive(t: Technique) {
     await apiPatch(`/techniques/${t.id}`, { active: !t.active });
-    load();
+    reload();
   }
 
   return (
@@ -1,5 +1,5 @@
 import { type FormEvent, useEffect, useState } from "react";
-import { apiGet, apiPatch, apiPost, apiDelete } from "../../api/client";
+import { apiGetAll, apiPatch, apiPost, apiDelete } from "../../api/client";
 import { Table, Th, Td, Tr } from "../../ui/Table";
 
 interface UserItem {
@@ -28,7 +28,7 @@ export default function AdminUsers() {
   function load() {
     setLoading(true);
     setError(false);
-    apiGet<UserItem[]>("/admin/users")
+    apiGetAll<UserItem>("/admin/users")
       .then(setItems)
       .catch(() => setError(true))
       .finally(() => setLoading(false));